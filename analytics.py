@@ -0,0 +1,193 @@
+"""Columnar in-memory analytics over daily entries for the Reports screen."""
+import threading
+from datetime import date
+
+import numpy as np
+
+from database import entries_source, get_connection
+
+ENTRY_DTYPE = np.dtype([
+    ("id", np.int64),
+    ("entry_date", np.int32),
+    ("customer", np.int32),
+    ("product", np.int16),
+    ("quantity", np.float32),
+    ("amount", np.float32),
+])
+LOAD_CHUNK = 100000
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+EPOCH = date(1970, 1, 1)
+
+# Customer 0 stands for entries without one; refreshes read new ids by rowid ({date} is "+").
+ENTRY_ARRAYS_SQL = '''
+    SELECT e.id, e.entry_date, IFNULL(e.customer_id, 0), e.product_id, e.quantity, e.amount
+    FROM {entries} e
+    WHERE e.id > ? AND {date}e.entry_date >= ? AND {date}e.entry_date < ? AND e.product_id IS NOT NULL
+'''
+
+def epoch_days(days):
+    """Convert an array of YYYYMMDD ints to days since 1970-01-01."""
+    year, rest = np.divmod(days, 10000)
+    month, day = np.divmod(rest, 100)
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    return (months.astype("datetime64[D]").astype(np.int64) + day - 1).astype(np.int32)
+
+def epoch_date(days):
+    """Return the date for a number of days since 1970-01-01."""
+    return date.fromordinal(EPOCH.toordinal() + int(days))
+
+class EntryAnalytics:
+    """The entries of [start, end) as numpy columns, with report figures."""
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop the loaded entries."""
+        self.last_id = 0
+        self.day = np.empty(0, np.int32)
+        self.month = np.empty(0, np.int16)
+        self.customer = np.empty(0, np.int32)
+        self.product = np.empty(0, np.int16)
+        self.quantity = np.empty(0, np.float32)
+        self.amount = np.empty(0, np.float32)
+
+    def __len__(self):
+        return len(self.day)
+
+    def refresh(self, conn=None):
+        """Load entries added since the last refresh; return the number appended."""
+        conn = conn or get_connection()
+        with self.lock:
+            snapshot = not conn.in_transaction
+            if snapshot:
+                conn.execute("BEGIN")  # Read the entries and the totals at one point in time
+            try:
+                added = self._append(conn)
+                if not self._matches_totals(conn):
+                    self.clear()
+                    added = self._append(conn)
+            finally:
+                if snapshot:
+                    conn.commit()
+            return added
+
+    def _append(self, conn):
+        start = self.start or 0
+        end = self.end or 99991232
+        sql = ENTRY_ARRAYS_SQL.format(entries=entries_source(conn, self.start, self.end),
+                                      date="+" if self.last_id else "")
+        cursor = conn.execute(sql, (self.last_id, start, end))
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=ENTRY_DTYPE))
+        if not chunks:
+            return 0
+        new = np.concatenate(chunks)
+        day = epoch_days(new["entry_date"])
+        year, rest = np.divmod(new["entry_date"], 10000)
+        self.day = np.concatenate([self.day, day])
+        self.month = np.concatenate([self.month, ((year - 1970) * 12 + rest // 100 - 1).astype(np.int16)])
+        self.customer = np.concatenate([self.customer, new["customer"]])
+        self.product = np.concatenate([self.product, new["product"]])
+        self.quantity = np.concatenate([self.quantity, new["quantity"]])
+        self.amount = np.concatenate([self.amount, new["amount"]])
+        self.last_id = max(self.last_id, int(new["id"].max()))
+        return len(new)
+
+    def _matches_totals(self, conn):
+        entries, quantity, amount = conn.execute('''
+            SELECT IFNULL(SUM(entries), 0), IFNULL(SUM(quantity), 0), IFNULL(SUM(amount), 0)
+            FROM DailyProductTotals
+            WHERE entry_date >= ? AND entry_date < ?
+        ''', (self.start or 0, self.end or 99991232)).fetchone()
+        # The columns are float32, so allow for their rounding
+        return (entries == len(self)
+                and np.isclose(quantity, self.quantity.sum(dtype=np.float64), rtol=1e-6, atol=1e-3)
+                and np.isclose(amount, self.amount.sum(dtype=np.float64), rtol=1e-6, atol=1e-2))
+
+    def product_daily_volume(self):
+        """Return (dates, product_ids, volumes) with volumes[day][product] totals."""
+        if not len(self):
+            return [], [], np.zeros((0, 0))
+        first = int(self.day.min())
+        days = int(self.day.max()) - first + 1
+        products = int(self.product.max()) + 1
+        cells = (self.day - first).astype(np.int64) * products + self.product
+        volumes = np.bincount(cells, weights=self.quantity, minlength=days * products).reshape(days, products)
+        product_ids = np.flatnonzero(np.bincount(self.product, minlength=products))
+        dates = [epoch_date(first + offset) for offset in range(days)]
+        return dates, product_ids.tolist(), volumes[:, product_ids]
+
+    def customer_monthly_trend(self, customer_id):
+        """Return (YYYY-MM, quantity, amount) per month for one customer."""
+        mask = self.customer == customer_id
+        if not mask.any():
+            return []
+        months = self.month[mask]
+        first = int(months.min())
+        offsets = months - first
+        quantity = np.bincount(offsets, weights=self.quantity[mask])
+        amount = np.bincount(offsets, weights=self.amount[mask])
+        return [(f"{(first + i) // 12 + 1970:04d}-{(first + i) % 12 + 1:02d}", float(quantity[i]), float(amount[i]))
+                for i in range(len(quantity))]
+
+    def top_customers(self, count=10):
+        """Return (customer_id, quantity, amount) for the biggest customers by amount."""
+        if not len(self):
+            return []
+        amount = np.bincount(self.customer, weights=self.amount)
+        amount[0] = 0  # Entries without a customer
+        quantity = np.bincount(self.customer, weights=self.quantity)
+        count = min(count, int(np.count_nonzero(amount)))
+        if count <= 0:
+            return []
+        top = np.argpartition(-amount, count - 1)[:count]
+        top = top[np.argsort(-amount[top], kind="stable")]
+        return [(int(i), float(quantity[i]), float(amount[i])) for i in top]
+
+    def weekday_pattern(self):
+        """Return (weekday, average quantity, average amount) per day of the week."""
+        if not len(self):
+            return [(name, 0.0, 0.0) for name in WEEKDAYS]
+        weekday = (self.day + 3) % 7  # 1970-01-01 was a Thursday
+        quantity = np.bincount(weekday, weights=self.quantity, minlength=7)
+        amount = np.bincount(weekday, weights=self.amount, minlength=7)
+        calendar = (np.arange(int(self.day.min()), int(self.day.max()) + 1) + 3) % 7
+        days = np.maximum(np.bincount(calendar, minlength=7), 1)
+        return [(WEEKDAYS[i], float(quantity[i] / days[i]), float(amount[i] / days[i])) for i in range(7)]
+
+    def report(self, customer_id=None, top=10):
+        """Return every report figure at once, consistent with each other."""
+        with self.lock:
+            return {
+                "entries": len(self),
+                "daily_volume": self.product_daily_volume(),
+                "top_customers": self.top_customers(top),
+                "trend": self.customer_monthly_trend(customer_id) if customer_id is not None else [],
+                "weekdays": self.weekday_pattern(),
+            }
+
+class AnalyticsCache:
+    """Keep the last requested range loaded between visits to the Reports screen."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+
+    def get(self, start=None, end=None):
+        """Return the EntryAnalytics for [start, end), brought up to date."""
+        with self._lock:
+            if self._current is None or (self._current.start, self._current.end) != (start, end):
+                self._current = EntryAnalytics(start, end)
+            current = self._current
+        current.refresh()
+        return current
+
+analytics_cache = AnalyticsCache()
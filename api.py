@@ -0,0 +1,280 @@
+"""Local HTTP/JSON API for recording daily entries from several devices at once."""
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+import customer_queries
+import database
+from dates import day_iso
+from entry_queries import PAGE_SIZE, EntryFilter, fetch_entries_page
+import services
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 500  # Entries per group commit
+MAX_BODY = 1 << 20
+READ_THREADS = 4
+
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+log = logging.getLogger("dairy.api")
+
+class HttpError(Exception):
+    """A request error answered with its status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def limit_param(query, default, most):
+    """Return the limit query parameter, at most most; reject anything below 1."""
+    try:
+        limit = int(query.get("limit", default))
+    except ValueError:
+        raise HttpError(400, "limit must be a whole number") from None
+    if limit < 1:
+        raise HttpError(400, "limit must be at least 1")
+    return min(limit, most)
+
+class EntryWriter:
+    """The single writer: batches concurrent inserts into group commits."""
+
+    def __init__(self, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        # One thread, so every commit uses the same write connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self.batches = 0
+        self.entries = 0  # Committed or failed
+        self.written = 0
+        self.task = None
+
+    def start(self):
+        """Start the writer task on the running event loop."""
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def add(self, params):
+        """Queue one entry's insert parameters; return its ID once committed."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((params, future))
+        return await future
+
+    async def run(self):
+        """Commit whatever is queued, one transaction per batch, forever."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, services.add_entries, [params for params, _ in batch])
+            except Exception as e:  # The whole transaction failed
+                results = [e] * len(batch)
+            self.batches += 1
+            self.entries += len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue  # The client went away
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    self.written += 1
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop the writer and release its connection thread."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown()
+
+class EntryApi:
+    """Routes HTTP requests to the services, one keep-alive connection per client."""
+
+    def __init__(self, max_batch=MAX_BATCH, read_threads=READ_THREADS):
+        self.writer = EntryWriter(max_batch)
+        self.readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="api-reader")
+        self.routes = {
+            "/entries": {"GET": self.get_entries, "POST": self.post_entries},
+            "/customers": {"GET": self.get_customers},
+            "/products": {"GET": self.get_products},
+            "/dashboard": {"GET": self.get_dashboard},
+            "/status": {"GET": self.get_status},
+        }
+
+    async def read(self, fn, *args):
+        """Run fn(*args) on a reader thread, with that thread's connection."""
+        return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests on one client connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (len(parts) == 3 and parts[2] == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if len(parts) != 3 or length < 0:
+                    status, payload, keep_alive = 400, {"error": "malformed request"}, False
+                elif length > MAX_BODY:
+                    status, payload, keep_alive = 413, {"error": "request body too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(parts[0], parts[1], body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # The client hung up mid-request
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        """Return (status, JSON payload) for one request."""
+        url = urlsplit(target)
+        handlers = self.routes.get(url.path)
+        if handlers is None:
+            return 404, {"error": f"no such resource: {url.path}"}
+        handler = handlers.get(method)
+        if handler is None:
+            return 405, {"error": f"{method} is not allowed on {url.path}"}
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            return await handler(query, body)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except (ValueError, LookupError) as e:
+            return 400, {"error": str(e)}
+        except sqlite3.IntegrityError as e:
+            return 409, {"error": str(e)}
+        except Exception:
+            log.exception("%s %s failed", method, target)
+            return 500, {"error": "internal error"}
+
+    async def add_entry(self, item):
+        """Validate one posted entry and return its ID once committed."""
+        if not isinstance(item, dict):
+            raise ValueError("each entry must be a JSON object")
+        missing = [name for name in ("customer", "product", "quantity") if name not in item]
+        if missing:
+            raise ValueError(f"missing field(s): {', '.join(missing)}")
+        params = await self.read(services.entry_params, item.get("date") or date.today(),
+                                 item["customer"], item["product"], item["quantity"])
+        return await self.writer.add(params)
+
+    async def post_entries(self, query, body):
+        """Record one entry, or a list of them with a result per entry."""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HttpError(400, "request body must be JSON") from None
+        if not isinstance(data, list):
+            return 201, {"id": await self.add_entry(data)}
+        results = await asyncio.gather(*(self.add_entry(item) for item in data), return_exceptions=True)
+        return 200, [{"error": str(result)} if isinstance(result, Exception) else {"id": result}
+                     for result in results]
+
+    async def get_entries(self, query, body):
+        """Return a page of entries, newest first, and the key of the next page."""
+        start, end = services.entry_date_range(query.get("from"), query.get("to"))
+        customer_id = int(query["customer"]) if query.get("customer") else None
+        after = tuple(int(part) for part in query["after"].split(",")) if query.get("after") else None
+        limit = limit_param(query, PAGE_SIZE, PAGE_SIZE)
+        entry_filter = EntryFilter(start, end, customer_id)
+        rows = await self.read(lambda: fetch_entries_page(database.get_connection(), entry_filter, after, limit=limit))
+        return 200, {
+            "entries": [{"id": entry_id, "date": day_iso(day), "customer": customer, "product": product,
+                         "quantity": quantity} for entry_id, day, customer, product, quantity in rows],
+            "next": f"{rows[-1][1]},{rows[-1][0]}" if len(rows) == limit else None,
+        }
+
+    async def get_customers(self, query, body):
+        """Return the customers matching q."""
+        limit = limit_param(query, customer_queries.SEARCH_LIMIT, customer_queries.LIST_LIMIT)
+        rows = await self.read(services.search_customers, query.get("q", ""), limit)
+        return 200, [{"id": customer_id, "name": name, "address": address, "contact": contact}
+                     for customer_id, name, address, contact in rows]
+
+    async def get_products(self, query, body):
+        """Return every product name."""
+        return 200, await self.read(services.product_names)
+
+    async def get_dashboard(self, query, body):
+        """Return the dashboard figures."""
+        return 200, await self.read(services.dashboard_stats)
+
+    async def get_status(self, query, body):
+        """Return the writer's batching statistics."""
+        writer = self.writer
+        return 200, {"batches": writer.batches, "written": writer.written, "queued": writer.queue.qsize(),
+                     "mean_batch": writer.entries / writer.batches if writer.batches else 0}
+
+    async def serve(self, host, port, ready=None):
+        """Serve until cancelled; ready(port) is called once listening."""
+        self.writer.start()
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        try:
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[1])
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.writer.close()
+            self.readers.shutdown()
+
+def main(argv=None):
+    """Run the entry API until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the daily entry HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: this machine only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT}; 0 picks one)")
+    parser.add_argument("--db", help=f"database file (default: {database.DB_PATH})")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH,
+                        help=f"most entries per group commit (default: {MAX_BATCH})")
+    args = parser.parse_args(argv)
+    if args.db:
+        database.DB_PATH = args.db
+    logging.basicConfig(level=logging.INFO)
+    database.init_db()
+    services.ensure_default_products()
+    api = EntryApi(args.max_batch)
+    try:
+        asyncio.run(api.serve(args.host, args.port,
+                              ready=lambda port: print(f"Serving on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.connections.close_all()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
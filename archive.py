@@ -0,0 +1,133 @@
+"""Move closed, fully billed months out of the live DailyEntries table."""
+from datetime import date
+
+from billing_queries import month_bounds, month_key
+from database import ARCHIVE_SCHEMA, ENTRY_FIELDS, attach_archive, bump_data_version, hot_start
+from dates import to_day
+
+# Complete months kept live besides the current one
+KEEP_MONTHS = 3
+
+ARCHIVE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {schema}.DailyEntries_{year} (
+        id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        entry_date INTEGER NOT NULL, -- YYYYMMDD
+        product_id INTEGER,
+        quantity REAL,
+        rate REAL,
+        amount REAL
+    )
+'''
+ARCHIVE_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_entries_{year}_date ON DailyEntries_{year} (entry_date)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_entries_{year}_customer "
+    "ON DailyEntries_{year} (customer_id, entry_date)",
+]
+
+class ArchiveResult:
+    """Outcome of an archive or restore run."""
+
+    def __init__(self):
+        self.months = []
+        self.entries = 0
+
+    def summary(self):
+        """Return a one-line human readable summary."""
+        if not self.months:
+            return "Nothing to do"
+        return f"{self.entries} entries in {len(self.months)} months ({self.months[0]} to {self.months[-1]})"
+
+def default_through(today=None, keep_months=KEEP_MONTHS):
+    """Return the latest month to archive while keeping keep_months live."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - keep_months - 1
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def archived_months(conn):
+    """Return (month, entries, archived_at) for every archived month."""
+    return conn.execute("SELECT month, entries, archived_at FROM ArchivedMonths ORDER BY month").fetchall()
+
+def archive_through(conn, month, today=None):
+    """Move every live entry up to the end of month into the archive."""
+    if conn.in_transaction:
+        raise ValueError("Cannot archive inside a transaction")
+    month = month_key(month)
+    _, end = month_bounds(month)
+    if end > to_day(today or date.today()) // 100 * 100 + 1:
+        raise ValueError(f"{month} is not over yet")
+    unbilled = [row[0] for row in conn.execute(
+        "SELECT DISTINCT month FROM BillingDirty WHERE month <= ? ORDER BY month", (month,)
+    )]
+    if unbilled:
+        raise ValueError(f"Run billing first for {', '.join(unbilled)}")
+    boundary = hot_start(conn) or 0
+    result = ArchiveResult()
+    if end <= boundary:
+        return result
+
+    counts = conn.execute('''
+        SELECT entry_date / 100, COUNT(*) FROM DailyEntries
+        WHERE entry_date < ? GROUP BY entry_date / 100
+    ''', (end,)).fetchall()
+    months = [(f"{key // 100:04d}-{key % 100:02d}", count) for key, count in counts]
+    if not months or months[-1][0] != month:
+        months.append((month, 0))  # Still closes the month
+    years = sorted({key // 100 for key, _ in counts})
+
+    attach_archive(conn, create=True)
+    with conn:
+        for year in years:
+            conn.execute(ARCHIVE_TABLE_SQL.format(schema=ARCHIVE_SCHEMA, year=year))
+            for sql in ARCHIVE_INDEX_SQL:
+                conn.execute(sql.format(schema=ARCHIVE_SCHEMA, year=year))
+            table = f"{ARCHIVE_SCHEMA}.DailyEntries_{year}"
+            conn.execute(f"DELETE FROM {table} WHERE entry_date >= ?", (boundary,))  # Interrupted runs
+            conn.execute(
+                f"INSERT INTO {table} ({ENTRY_FIELDS}) SELECT {ENTRY_FIELDS} FROM main.DailyEntries "
+                "WHERE entry_date >= ? AND entry_date < ?",
+                (year * 10000 + 101, min(end, (year + 1) * 10000 + 101))
+            )
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO Maintenance (flag) VALUES ('archiving')")
+        conn.executemany(
+            "INSERT OR REPLACE INTO ArchivedMonths (month, end_day, entries) VALUES (?, ?, ?)",
+            ((name, month_bounds(name)[1], count) for name, count in months)
+        )
+        conn.execute("DELETE FROM DailyEntries WHERE entry_date < ?", (end,))
+        conn.execute("DELETE FROM StandingOrderDays WHERE entry_date < ?", (end,))  # Closed for good
+        conn.execute("DELETE FROM Maintenance WHERE flag = 'archiving'")
+        bump_data_version(conn, "DailyEntries")
+    result.months = [name for name, _ in months]
+    result.entries = sum(count for _, count in months)
+    return result
+
+def restore_from(conn, month):
+    """Move archived entries from month onwards back into DailyEntries."""
+    if conn.in_transaction:
+        raise ValueError("Cannot restore inside a transaction")
+    month = month_key(month)
+    start, _ = month_bounds(month)
+    result = ArchiveResult()
+    rows = conn.execute(
+        "SELECT month, entries FROM ArchivedMonths WHERE month >= ? ORDER BY month", (month,)
+    ).fetchall()
+    if not rows:
+        return result
+    years = sorted({int(name[:4]) for name, count in rows if count})
+    with conn:
+        conn.execute("DELETE FROM ArchivedMonths WHERE month >= ?", (month,))
+        conn.execute("INSERT OR IGNORE INTO Maintenance (flag) VALUES ('defer_totals')")
+        for year in years:
+            conn.execute(
+                f"INSERT INTO main.DailyEntries ({ENTRY_FIELDS}) SELECT {ENTRY_FIELDS} "
+                f"FROM {ARCHIVE_SCHEMA}.DailyEntries_{year} WHERE entry_date >= ?", (start,)
+            )
+        conn.execute("DELETE FROM Maintenance WHERE flag = 'defer_totals'")
+        bump_data_version(conn, "DailyEntries")
+    with conn:
+        for year in years:
+            conn.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.DailyEntries_{year} WHERE entry_date >= ?", (start,))
+    result.months = [name for name, _ in rows]
+    result.entries = sum(count for _, count in rows)
+    return result
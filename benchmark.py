@@ -0,0 +1,727 @@
+"""Benchmarks for the dairy management hot paths."""
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import database
+from importer import import_entries_csv
+from lookups import lookups
+from billing_queries import fetch_month_summary, month_bounds
+from datagen import generate_dataset
+from dates import from_day, to_day
+from services import DEFAULT_PRODUCTS
+import standing_orders
+
+def time_call(func, *args, repeat=5):
+    """Return the best wall-clock time of func(*args) in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+# Month billing as it was first written: a scan with correlated lookups
+LEGACY_MONTH_SUMMARY_SQL = '''
+    SELECT (SELECT name FROM Customers WHERE id = customer_id) AS customer,
+           SUM(quantity * (SELECT rate FROM Products WHERE id = product_id)) AS total
+    FROM DailyEntries
+    WHERE entry_date / 100 = ?
+    GROUP BY customer_id
+'''
+
+# The same summary aggregated from DailyEntries over a [start, end) day range
+MONTH_SUMMARY_FROM_ENTRIES_SQL = '''
+    SELECT c.name AS customer, SUM(e.amount) AS total
+    FROM DailyEntries e
+    LEFT JOIN Customers c ON c.id = e.customer_id
+    WHERE e.entry_date >= ? AND e.entry_date < ?
+    GROUP BY e.customer_id
+'''
+
+def bench_month_billing(customers, years_list, month="2024-12"):
+    """Time one month of billing against datasets with growing history."""
+    print(f"Month billing for {month}, {customers} customers")
+    print(f"{'years':>5} {'total rows':>12} {'month rows':>11} {'totals (ms)':>12} "
+          f"{'range (ms)':>11} {'scan (ms)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in years_list:
+            path = os.path.join(tmp, f"bench_{years}.db")
+            total_rows = generate_dataset(path, customers, years)
+            conn = sqlite3.connect(path)
+            month_rows = conn.execute(
+                "SELECT COUNT(*) FROM DailyEntries WHERE entry_date >= ? AND entry_date < ?",
+                month_bounds(month)
+            ).fetchone()[0]
+            totals = time_call(fetch_month_summary, conn, month)
+            ranged = time_call(
+                lambda: conn.execute(MONTH_SUMMARY_FROM_ENTRIES_SQL, month_bounds(month)).fetchall()
+            )
+            legacy = time_call(lambda: conn.execute(LEGACY_MONTH_SUMMARY_SQL, (month_bounds(month)[0] // 100,)).fetchall())
+            conn.close()
+            print(f"{years:>5} {total_rows:>12} {month_rows:>11} {totals * 1000:>12.2f} "
+                  f"{ranged * 1000:>11.2f} {legacy * 1000:>14.2f}")
+
+def bench_billing_run(customers=2000, years=1, month="2024-12"):
+    """Time a billing run from scratch, re-run unchanged, and after one new entry."""
+    from billing_queries import run_billing
+
+    print(f"Billing run for {month}, {customers} customers x {years} years")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_billing_run.db")
+        generate_dataset(path, customers, years, billing=False)
+        conn = database.get_connection()
+
+        def run():
+            with database.transaction():
+                return run_billing(conn, month)
+
+        started = time.perf_counter()
+        run()
+        first = time.perf_counter() - started
+        rerun = time_call(run)
+        with database.transaction():
+            conn.execute(database.ENTRY_INSERT_SQL, (month_bounds(month)[0], 1, 1, 1.0))
+        started = time.perf_counter()
+        result = run()
+        changed = time.perf_counter() - started
+        print(f"  first run: {first * 1000:8.2f} ms   unchanged: {rerun * 1000:8.2f} ms   "
+              f"one entry changed: {changed * 1000:8.2f} ms ({result.billed} bill)")
+        database.connections.close()
+
+def bench_analytics(customers=2000, years=1):
+    """Time the Reports analytics: first load, refresh and figures vs. SQL group-bys."""
+    from analytics import EntryAnalytics
+
+    print(f"Entry analytics, {customers} customers x {years} years")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_analytics.db")
+        generate_dataset(path, customers, years, billing=False)
+        conn = database.get_connection()
+        analytics = EntryAnalytics()
+        started = time.perf_counter()
+        analytics.refresh(conn)
+        load = time.perf_counter() - started
+        refresh = time_call(analytics.refresh, conn)
+        figures = time_call(analytics.report, 1)
+        sql = time_call(lambda: [conn.execute(query).fetchall() for query in (
+            "SELECT entry_date, product_id, SUM(quantity) FROM DailyEntries GROUP BY entry_date, product_id",
+            "SELECT customer_id, SUM(amount) AS total FROM DailyEntries "
+            "GROUP BY customer_id ORDER BY total DESC LIMIT 10",
+            "SELECT entry_date / 100, SUM(quantity) FROM DailyEntries WHERE customer_id = 1 GROUP BY entry_date / 100",
+        )], repeat=1)
+        print(f"  {len(analytics)} entries   load: {load * 1000:8.2f} ms   refresh: {refresh * 1000:8.2f} ms   "
+              f"all figures: {figures * 1000:8.2f} ms   SQL group-bys: {sql * 1000:8.2f} ms")
+        database.connections.close()
+
+def bench_dashboard(customers=1000, years=2):
+    """Compare the dashboard's snapshot reads with the full-scan queries they replace."""
+    from dashboard import DashboardStats
+
+    legacy = [
+        "SELECT COUNT(*) FROM Customers",
+        "SELECT COUNT(*) FROM DailyEntries WHERE entry_date = 20241231",
+        "SELECT SUM(total - paid) FROM Billing WHERE paid < total",
+    ]
+    print(f"Dashboard figures, {customers} customers x {years} years")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_dashboard.db")
+        generate_dataset(path, customers, years)
+        conn = database.get_connection()
+        stats = DashboardStats()
+        today = date(2024, 12, 31)
+        scans = time_call(lambda: [conn.execute(sql).fetchall() for sql in legacy])
+        snapshot = time_call(stats.fetch, conn, today)
+        print(f"  direct queries: {scans * 1000:8.2f} ms   snapshot: {snapshot * 1000:8.2f} ms")
+        database.connections.close()
+
+def bench_entry_inserts(count=500):
+    """Compare single-entry inserts on fresh connections with the shared one."""
+    print(f"Single-entry inserts, {count} entries")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_inserts.db")
+        generate_dataset(path, customers=10, years=0)
+        sql = database.ENTRY_INSERT_SQL
+
+        def fresh_connections():
+            for i in range(count):
+                conn = sqlite3.connect(path)
+                conn.execute(sql, (20250101, i % 10 + 1, 1, 1.0))
+                conn.commit()
+                conn.close()
+
+        def shared_connection():
+            for i in range(count):
+                with database.transaction() as conn:
+                    conn.execute(sql, (20250101, i % 10 + 1, 1, 1.0))
+
+        for name, func in (("fresh connection", fresh_connections), ("shared connection", shared_connection)):
+            elapsed = time_call(func, repeat=1)
+            print(f"{name:>18}: {count / elapsed:>10.0f} entries/s")
+        database.connections.close()
+
+def bench_csv_import(rows=200000, customers=1000):
+    """Measure bulk CSV import throughput."""
+    print(f"CSV import, {rows} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_import.db")
+        generate_dataset(path, customers=customers, years=0)
+        csv_path = os.path.join(tmp, "entries.csv")
+        rng = random.Random(7)
+        start = date(2024, 1, 1)
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["date", "customer", "product", "quantity"])
+            for i in range(rows):
+                writer.writerow([
+                    (start + timedelta(days=i // customers % 365)).isoformat(),
+                    f"Customer {rng.randint(1, customers)}",
+                    rng.choice(DEFAULT_PRODUCTS)[0],
+                    rng.choice((0.5, 1.0, 2.0)),
+                ])
+        lookups.invalidate()
+        started = time.perf_counter()
+        result = import_entries_csv(csv_path)
+        elapsed = time.perf_counter() - started
+        database.connections.close()
+        print(f"{result.summary()} in {elapsed:.2f}s: {result.inserted / elapsed:,.0f} rows/s")
+
+def bench_standing_orders(customers=10000, month="2025-03"):
+    """Time generating a month of standing order entries, then re-running it."""
+    print(f"Standing orders, {customers} customers, {month}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_standing.db")
+        generate_dataset(path, customers=customers, years=0)
+        with database.transaction() as conn:
+            for customer_id in range(1, customers + 1):
+                standing_orders.add_standing_order(conn, customer_id, customer_id % 3 + 1, 1.0, 20250101)
+        first, end = month_bounds(month)
+        last = to_day(from_day(end) - timedelta(days=1))
+        for name in ("generate", "re-run"):
+            started = time.perf_counter()
+            with database.transaction() as conn:
+                written = standing_orders.generate_entries(conn, first, last)
+            elapsed = time.perf_counter() - started
+            print(f"{name:>10}: {written} entries in {elapsed:.2f}s")
+        database.connections.close()
+
+def export_peak_rss(path, fmt):
+    """Export every entry in the database at path; return (rows, peak RSS in MiB)."""
+    from reports import ReportGenerator
+
+    database.DB_PATH = path
+    export = {
+        "csv": ReportGenerator.export_daily_entries_to_csv,
+        "xlsx": ReportGenerator.export_daily_entries_to_excel,
+        "pdf": ReportGenerator.export_daily_entries_to_pdf,
+    }[fmt]
+    rows = export(os.path.join(os.path.dirname(path), f"export.{fmt}"))
+    return rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def bench_export_memory(row_counts=(50000, 200000, 800000), formats=("csv", "xlsx", "pdf"), customers=100):
+    """Show that streaming export peak memory stays flat as row count grows."""
+    print("Streaming export peak RSS (MiB)")
+    print(f"{'rows':>10} " + " ".join(f"{fmt:>8}" for fmt in formats))
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp, ctx.Pool(1, maxtasksperchild=1) as pool:
+        for count in row_counts:
+            path = os.path.join(tmp, f"bench_export_{count}.db")
+            generate_dataset(path, customers=customers, days=count // customers)
+            peaks = [pool.apply(export_peak_rss, (path, fmt))[1] for fmt in formats]
+            print(f"{count:>10} " + " ".join(f"{peak:>8.1f}" for peak in peaks))
+    print("RSS includes SQLite's page cache (up to 64 MiB) and memory-mapped database pages\n"
+          "(up to 256 MiB); both are bounded. reportlab keeps finished PDF pages in memory\n"
+          "until the file is saved.")
+
+def bench_pdf_render(row_counts=(10000, 1000000)):
+    """Time the paginated PDF table renderer on synthetic report rows."""
+    from pdf_render import Column, PdfTable
+
+    print("PDF table rendering")
+    columns = [
+        Column("Date", 90),
+        Column("Customer", 200),
+        Column("Product", 150),
+        Column("Quantity", 90, align="right", total=True, fmt=lambda value: f"{value:.2f}"),
+    ]
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in row_counts:
+            path = os.path.join(tmp, f"report_{count}.pdf")
+
+            def render():
+                table = PdfTable(path, "Daily Entries Report", columns)
+                chunk = []
+                for i in range(count):
+                    chunk.append((f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Customer {rng.randint(1, 5000)}",
+                                  rng.choice(DEFAULT_PRODUCTS)[0], rng.choice((0.5, 1.0, 2.0))))
+                    if len(chunk) == 5000:
+                        table.write_rows(chunk)
+                        chunk = []
+                table.write_rows(chunk)
+                table.close()
+                return table.page
+
+            started = time.perf_counter()
+            pages = render()
+            elapsed = time.perf_counter() - started
+            print(f"{count:>10} rows: {pages:>6} pages in {elapsed:6.2f}s "
+                  f"({count / elapsed:,.0f} rows/s, {os.path.getsize(path) / 2**20:.1f} MiB)")
+
+def bench_invoices(customers=2000, days=30, worker_counts=None):
+    """Time batch invoice generation with growing process pools."""
+    from invoices import generate_invoices
+
+    cpus = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpus} - {n for n in (2, 4) if n > cpus})
+    print(f"Invoice generation, {customers} customers x {days} days ({cpus} CPUs)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_invoices.db")
+        generate_dataset(path, customers=customers, days=days)
+        month = (date(2025, 1, 1) - timedelta(days=1)).strftime("%Y-%m")
+        for workers in worker_counts:
+            out = os.path.join(tmp, f"invoices_{workers}")
+            started = time.perf_counter()
+            result = generate_invoices(month, base_dir=out, workers=workers)
+            elapsed = time.perf_counter() - started
+            print(f"{workers:>3} workers: {result.written} invoices in {elapsed:6.2f}s "
+                  f"({result.written / elapsed:,.0f} invoices/s)")
+        database.connections.close()
+
+# Most a Tk timer may fire late while billing and an export run in the background
+UI_LATENCY_BUDGET_MS = 50
+
+class HeadlessLoop:
+    """Stand-in for a Tk root without a display: runs after() callbacks on this thread."""
+
+    def __init__(self):
+        self.timers = []  # (deadline, sequence, callback) heap
+        self.sequence = itertools.count()
+        self.running = False
+
+    def after(self, ms, callback):
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, next(self.sequence), callback))
+
+    def after_idle(self, callback):
+        self.after(0, callback)
+
+    def quit(self):
+        self.running = False
+
+    def mainloop(self):
+        self.running = True
+        while self.running and self.timers:
+            deadline, _, callback = heapq.heappop(self.timers)
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            callback()
+
+def bench_ui_latency(customers=2000, days=365, tick_ms=10):
+    """Check Tk event lateness while billing and exports run on the task runner."""
+    import tkinter as tk
+    from services import export_daily_entries
+    from tasks import TaskRunner, report_progress
+
+    print(f"UI latency during background work, {customers} customers x {days} days")
+    try:
+        root = tk.Tk()
+        root.withdraw()
+    except tk.TclError:
+        print("  no display: timing a headless event loop")
+        root = HeadlessLoop()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_latency.db")
+        generate_dataset(path, customers=customers, days=days)
+        start, end = date(2025, 1, 1) - timedelta(days=days), date(2025, 1, 1)
+        tasks = TaskRunner(root)
+        lateness = []
+        remaining = [2]
+        expected = [time.perf_counter() + tick_ms / 1000]
+
+        def tick():
+            now = time.perf_counter()
+            lateness.append(now - expected[0])
+            expected[0] = now + tick_ms / 1000
+            root.after(tick_ms, tick)
+
+        def finished(_):
+            remaining[0] -= 1
+            if not remaining[0]:
+                root.quit()
+
+        def billing():
+            conn = database.get_connection()
+            return conn.execute(MONTH_SUMMARY_FROM_ENTRIES_SQL, (to_day(start), to_day(end))).fetchall()
+
+        def export():
+            return export_daily_entries(os.path.join(tmp, "entries.csv"), start, end, fmt="csv",
+                                        progress=report_progress)
+
+        started = time.perf_counter()
+        root.after(tick_ms, tick)
+        tasks.submit(billing, on_done=finished)
+        tasks.submit(export, on_done=finished, on_progress=lambda done, total: None)
+        root.mainloop()
+        elapsed = time.perf_counter() - started
+        tasks.shutdown()
+        if isinstance(root, tk.Tk):
+            root.destroy()
+        database.connections.close_all()
+        lateness.sort()
+        p99 = lateness[int(len(lateness) * 0.99) - 1] if lateness else 0.0
+        print(f"  work took {elapsed:.2f}s; {len(lateness)} ticks, "
+              f"p99 late {p99 * 1000:.1f} ms, max late {max(lateness, default=0) * 1000:.1f} ms")
+        assert lateness, "no timer fired while the work ran"
+        assert p99 * 1000 <= UI_LATENCY_BUDGET_MS, \
+            f"p99 timer lateness {p99 * 1000:.1f} ms is over the {UI_LATENCY_BUDGET_MS} ms budget"
+
+def bench_tree_refresh(rows=5000, edits=20):
+    """Compare refreshing a Treeview by reloading every row with a TreeBinding change set."""
+    import tkinter as tk
+    from ui_utils import TreeBinding, UIUtils
+
+    print(f"Treeview refresh after one edit, {rows} rows")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"  skipped: no display ({e})")
+        return
+    root.withdraw()
+    columns = ("id", "name", "address", "contact")
+    data = [(i, f"Customer {i}", f"Address {i}", f"{9000000000 + i}") for i in range(1, rows + 1)]
+
+    tree = UIUtils.create_treeview(root, columns)
+    for row in data:
+        tree.insert("", tk.END, values=row)
+    binding = TreeBinding(root, columns)
+    binding.set_rows(data)
+
+    def reload():
+        for i in range(edits):
+            for item in tree.get_children():
+                tree.delete(item)
+            for row in data:
+                tree.insert("", tk.END, values=row)
+            root.update_idletasks()
+
+    def apply():
+        for i in range(edits):
+            binding.apply(updated=[(i + 1, f"Customer {i + 1} edited", f"Address {i + 1}", "")])
+            root.update_idletasks()
+
+    for name, func in (("full reload", reload), ("change set", apply)):
+        elapsed = time_call(func, repeat=1) / edits
+        print(f"{name:>12}: {elapsed * 1000:8.2f} ms per edit")
+    root.destroy()
+
+GUI_STARTUP_SCRIPT = """
+import sys, tkinter as tk
+import database, main
+database.DB_PATH = sys.argv[1]
+try:
+    root = tk.Tk()
+except tk.TclError:
+    sys.exit(0)  # No display: the import alone was timed
+app = main.DairyManagementApp(root)
+root.update()
+app.tasks.shutdown()
+root.destroy()
+"""
+
+def bench_startup(repeat=5):
+    """Time cold starts of the CLI and the GUI in fresh interpreters."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"Cold start (best of {repeat})")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_startup.db")
+        generate_dataset(path, customers=200, days=30)
+        commands = [
+            ("cli dashboard", [sys.executable, os.path.join(here, "cli.py"), "--db", path, "dashboard"]),
+            ("gui", [sys.executable, "-c", GUI_STARTUP_SCRIPT, path]),
+        ]
+        for name, command in commands:
+            best = time_call(lambda: subprocess.run(command, cwd=here, check=True, capture_output=True),
+                             repeat=repeat)
+            print(f"{name:>14}: {best * 1000:8.1f} ms")
+        heavy = subprocess.run(
+            [sys.executable, "-c", "import sys, main, cli; print(' '.join(m for m in "
+             "('pandas', 'reportlab', 'openpyxl', 'tkcalendar', 'babel') if m in sys.modules))"],
+            cwd=here, check=True, capture_output=True, text=True).stdout.strip()
+        print(f"  heavy modules loaded at startup: {heavy or 'none'}")
+
+async def http_request(reader, writer, method, path, payload=None):
+    """Send one keep-alive HTTP request and return (status, decoded JSON body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def post_entries_load(host, port, clients, entries, customers):
+    """Post entries from concurrent clients; return (latencies, errors, elapsed seconds)."""
+    import asyncio
+
+    products = [name for name, _ in DEFAULT_PRODUCTS]
+    today = date.today().isoformat()
+    latencies, errors = [], []
+
+    async def client(number):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in range(entries):
+                entry = {"date": today, "customer": (number * entries + i) % customers + 1,
+                         "product": products[i % len(products)], "quantity": 1.0}
+                started = time.perf_counter()
+                status, reply = await http_request(reader, writer, "POST", "/entries", entry)
+                latencies.append(time.perf_counter() - started)
+                if status != 201:
+                    errors.append(reply)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+async def api_status(host, port):
+    """Return the API's writer statistics."""
+    import asyncio
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await http_request(reader, writer, "GET", "/status"))[1]
+    finally:
+        writer.close()
+
+def start_api_server(path, max_batch):
+    """Start api.py on a free local port in its own process; return (process, port)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(here, "api.py"), "--db", path, "--port", "0", "--max-batch", str(max_batch)],
+        cwd=here, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving on"):
+        process.kill()
+        raise RuntimeError("api.py did not start")
+    return process, int(line.rsplit(":", 1)[1])
+
+def bench_api(clients=200, entries=50, customers=1000, max_batches=None, url=None):
+    """Load-test the entry API: entries/s and latency percentiles under many clients."""
+    import asyncio
+    from urllib.parse import urlsplit
+
+    from api import MAX_BATCH
+
+    print(f"Entry API, {clients} clients x {entries} entries")
+    with tempfile.TemporaryDirectory() as tmp:
+        if url:
+            location = urlsplit(url)
+            runs = [(url, None, location.hostname, location.port)]
+        else:
+            path = os.path.join(tmp, "bench_api.db")
+            generate_dataset(path, customers, days=30)
+            runs = [(f"max batch {max_batch}", max_batch, "127.0.0.1", None)
+                    for max_batch in max_batches or (1, MAX_BATCH)]
+        for label, max_batch, host, port in runs:
+            process = None
+            if max_batch is not None:
+                process, port = start_api_server(path, max_batch)
+            try:
+                latencies, errors, elapsed = asyncio.run(
+                    post_entries_load(host, port, clients, entries, customers))
+                status = asyncio.run(api_status(host, port))
+            finally:
+                if process is not None:
+                    process.terminate()
+                    process.wait()
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[int(len(latencies) * 0.99)]
+            print(f"  {label:>16}: {len(latencies) / elapsed:8.0f} entries/s   p50 {p50 * 1000:7.1f} ms   "
+                  f"p99 {p99 * 1000:7.1f} ms   mean batch {status['mean_batch']:6.1f}   errors {len(errors)}")
+            if errors:
+                print(f"    first error: {errors[0]}")
+
+def load_main(args):
+    """Run the entry API load test."""
+    bench_api(args.clients, args.entries, args.customers, url=args.url)
+    return 0
+
+# A suite metric regresses when this much slower and by more than SUITE_MIN_DELTA seconds
+SUITE_TOLERANCE = 0.25
+SUITE_MIN_DELTA = 0.001
+
+def run_suite(path, repeat=5, inserts=200):
+    """Time every hot path against the database at path; return {metric: seconds}."""
+    import services
+    from customer_queries import LIST_LIMIT
+    from dashboard import dashboard_cache
+    from entry_queries import EntryFilter, fetch_entries_page
+
+    database.DB_PATH = path
+    database.init_db()
+    lookups.invalidate()
+    conn = database.get_connection()
+    month = conn.execute("SELECT MAX(month) FROM MonthlyTotals").fetchone()[0]
+    start, end = month_bounds(month)
+    customers = conn.execute("SELECT COUNT(*) FROM Customers").fetchone()[0]
+    customer_filter = EntryFilter(customer_id=max(customers // 2, 1))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        timed = [
+            ("calculate_billing", lambda: services.month_billing(month), repeat),
+            ("run_billing", lambda: services.run_billing(month), repeat),
+            ("load_entries", lambda: fetch_entries_page(conn, EntryFilter()), repeat),
+            ("load_entries_customer", lambda: fetch_entries_page(conn, customer_filter), repeat),
+            ("load_customers", lambda: services.search_customers("", LIST_LIMIT), repeat),
+            ("search_customers", lambda: services.search_customers(f"Customer {customers // 3}"), repeat),
+            ("dashboard", dashboard_cache.refresh, repeat),
+            ("entry_analytics", lambda: services.entry_analytics(customer_id=1), repeat),
+            ("export_entries_excel",
+             lambda: services.export_daily_entries(os.path.join(tmp, "entries.xlsx"), start, end), 1),
+            ("export_entries_pdf",
+             lambda: services.export_daily_entries(os.path.join(tmp, "entries.pdf"), start, end), 1),
+            ("export_billing_excel",
+             lambda: services.export_billing_excel(month, os.path.join(tmp, "billing.xlsx")), repeat),
+            ("export_billing_pdf",
+             lambda: services.export_billing_pdf(month, os.path.join(tmp, "billing.pdf")), repeat),
+        ]
+        for name, func, runs in timed:
+            results[name] = time_call(func, repeat=runs)
+
+    first_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM DailyEntries").fetchone()[0]
+    names = [f"Customer {i % customers + 1}" for i in range(inserts)]
+    started = time.perf_counter()
+    for name in names:
+        services.add_entry(end, name, DEFAULT_PRODUCTS[0][0], 1.0)
+    results["entry_insert"] = (time.perf_counter() - started) / inserts
+    with database.transaction():
+        conn.execute("DELETE FROM DailyEntries WHERE id > ?", (first_id,))
+    database.connections.close()
+    return results
+
+def compare_results(results, baseline, tolerance=SUITE_TOLERANCE, min_delta=SUITE_MIN_DELTA):
+    """Return [(metric, baseline, current)] for metrics that regressed."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current > previous * (1 + tolerance) and current - previous > min_delta:
+            regressions.append((name, previous, current))
+    return regressions
+
+def suite_main(args):
+    """Run the hot path suite, save its JSON results and check for regressions."""
+    import json
+    import platform
+    from datetime import datetime
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "bench_suite.db")
+        if not os.path.exists(path):
+            print(f"Generating {args.customers} customers x {args.years} years into {path}")
+            generate_dataset(path, args.customers, args.years)
+        results = run_suite(path, repeat=args.repeat)
+        check = sqlite3.connect(path)
+        customers, entries = check.execute(
+            "SELECT (SELECT COUNT(*) FROM Customers), (SELECT COUNT(*) FROM DailyEntries)").fetchone()
+        check.close()
+
+    for name, seconds in results.items():
+        print(f"{name:>24}: {seconds * 1000:10.2f} ms")
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "dataset": {"path": args.db, "customers": customers, "entries": entries},
+        "environment": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                        "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("dataset", {}).get("entries") != entries:
+            print("Warning: the baseline was recorded on a different dataset")
+        regressions = compare_results(results, baseline["results"], args.tolerance)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous * 1000:.2f} ms -> {current * 1000:.2f} ms "
+                  f"({current / previous - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+def run_all(args):
+    """Run the exploratory benchmarks, printing tables."""
+    bench_month_billing(args.customers, args.years)
+    bench_dashboard()
+    bench_billing_run()
+    bench_analytics()
+    bench_entry_inserts()
+    bench_csv_import()
+    bench_standing_orders()
+    bench_export_memory()
+    bench_pdf_render()
+    bench_invoices()
+    bench_ui_latency()
+    bench_tree_refresh()
+    bench_startup()
+    bench_api()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 5])
+    parser.set_defaults(run=run_all)
+    commands = parser.add_subparsers(dest="command")
+
+    suite = commands.add_parser("suite", help="time each hot path and compare with a baseline")
+    suite.add_argument("--db", help="dataset to use; generated there first if missing")
+    suite.add_argument("--customers", type=int, default=10000)
+    suite.add_argument("--years", type=int, default=5)
+    suite.add_argument("--repeat", type=int, default=5)
+    suite.add_argument("--output", help="write the results to this JSON file")
+    suite.add_argument("--baseline", help="fail if slower than the results in this JSON file")
+    suite.add_argument("--tolerance", type=float, default=SUITE_TOLERANCE,
+                       help=f"allowed slowdown as a fraction (default: {SUITE_TOLERANCE})")
+    suite.set_defaults(run=suite_main)
+
+    load = commands.add_parser("load", help="load-test the entry API with many concurrent clients")
+    load.add_argument("--url", help="API to load, e.g. http://127.0.0.1:8765; "
+                                    "by default api.py is started on a generated dataset")
+    load.add_argument("--clients", type=int, default=200)
+    load.add_argument("--entries", type=int, default=50, help="entries posted by each client")
+    load.add_argument("--customers", type=int, default=1000,
+                      help="customer IDs posted to; must exist in the database at --url")
+    load.set_defaults(run=load_main)
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import get_connection
-import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from billing_queries import month_bounds
+from database import profiled
+import services
+from tasks import TaskRunner, report_progress
+from ui_utils import TreeBinding, UIUtils
 
+@profiled
 class BillingManager:
-    def __init__(self, parent_frame):
+    def __init__(self, parent_frame, tasks=None):
         self.parent = parent_frame
+        self.tasks = tasks or TaskRunner(parent_frame)
+        self.month = None  # Month whose bills are shown
         self.setup_ui()
 
     def setup_ui(self):
@@ -28,99 +32,104 @@ class BillingManager:
         ttk.Button(btn_frame, text="Calculate Billing", command=self.calculate_billing).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Export to Excel", command=self.export_to_excel).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Export to PDF", command=self.export_to_pdf).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Generate Invoices", command=self.generate_invoices).pack(side=tk.LEFT, padx=2)
 
         # Billing summary list
         list_frame = ttk.LabelFrame(self.parent, text="Billing Summary", padding=10)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        self.tree = ttk.Treeview(list_frame, columns=("customer", "total", "paid"), show="headings")
-        self.tree.heading("customer", text="Customer")
-        self.tree.heading("total", text="Total")
-        self.tree.heading("paid", text="Paid")
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_entry = ttk.Entry(filter_frame)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.filter_entry.bind("<KeyRelease>", lambda event: self.bills.filter(self.filter_entry.get(), ("customer",)))
+
+        # Keyed by bill ID, so a recalculation only touches the bills that changed
+        self.bills = TreeBinding(list_frame, ("id", "customer", "total", "paid"),
+                                 display=("customer", "total", "paid"))
+        self.tree = self.bills.tree
         self.tree.pack(fill=tk.BOTH, expand=True)
 
-    def calculate_billing(self):
-        """Calculate billing for the selected month."""
+    def get_month(self):
+        """Return the entered month, or None after reporting why it is invalid."""
         month = self.month_entry.get()
         if not month:
             messagebox.showerror("Error", "Please enter a month in YYYY-MM format")
+            return None
+
+        try:
+            month_bounds(month)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
+        return month
+
+    def calculate_billing(self):
+        """Calculate billing for the selected month."""
+        month = self.get_month()
+        if month is None:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   SUM(quantity * (SELECT rate FROM Products WHERE id = product_id)) AS total
-            FROM DailyEntries
-            WHERE strftime('%Y-%m', entry_date) = ?
-            GROUP BY customer_id
-        ''', (month,))
-        rows = cursor.fetchall()
-        conn.close()
+        self.tasks.submit(lambda: services.run_billing(month),
+                          key="billing.calculate", on_done=self.show_billing,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to calculate billing: {str(e)}"))
 
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def show_billing(self, outcome):
+        """Show the month's saved bills, updating only the rows that changed."""
+        result, rows = outcome
+        self.month = result.month
+        self.bills.set_rows(rows)
 
-        # Insert new items
-        for row in rows:
-            self.tree.insert("", tk.END, values=row)
+        if result.overpaid:
+            messagebox.showwarning("Billing", result.summary())
+        else:
+            messagebox.showinfo("Success", result.summary())
 
-        messagebox.showinfo("Success", "Billing calculated successfully")
+    def refresh(self, changed=None):
+        """Reload the bills shown, e.g. after payments or a billing run elsewhere."""
+        if self.month is None:
+            return
+        month = self.month
+        self.tasks.submit(lambda: services.month_bills(month), key="billing.refresh",
+                          on_done=self.bills.set_rows)
 
     def export_to_excel(self):
         """Export billing summary to Excel."""
-        month = self.month_entry.get()
-        if not month:
-            messagebox.showerror("Error", "Please enter a month in YYYY-MM format")
+        month = self.get_month()
+        if month is None:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   SUM(quantity * (SELECT rate FROM Products WHERE id = product_id)) AS total
-            FROM DailyEntries
-            WHERE strftime('%Y-%m', entry_date) = ?
-            GROUP BY customer_id
-        ''', (month,))
-        rows = cursor.fetchall()
-        conn.close()
-
-        df = pd.DataFrame(rows, columns=["Customer", "Total"])
-        df.to_excel(f'billing_summary_{month}.xlsx', index=False)
-        messagebox.showinfo("Success", f"Billing summary exported to billing_summary_{month}.xlsx")
+        self.tasks.submit(
+            lambda: services.export_billing_excel(month),
+            on_done=lambda path: messagebox.showinfo("Success", f"Billing summary exported to {path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export billing summary: {str(e)}"))
 
     def export_to_pdf(self):
         """Export billing summary to PDF."""
-        month = self.month_entry.get()
-        if not month:
-            messagebox.showerror("Error", "Please enter a month in YYYY-MM format")
+        month = self.get_month()
+        if month is None:
+            return
+
+        self.tasks.submit(
+            lambda: services.export_billing_pdf(month),
+            on_done=lambda path: messagebox.showinfo("Success", f"Billing summary exported to {path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export billing summary: {str(e)}"))
+
+    def generate_invoices(self):
+        """Write an individual PDF invoice for every customer billed in the month."""
+        month = self.get_month()
+        if month is None:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   SUM(quantity * (SELECT rate FROM Products WHERE id = product_id)) AS total
-            FROM DailyEntries
-            WHERE strftime('%Y-%m', entry_date) = ?
-            GROUP BY customer_id
-        ''', (month,))
-        rows = cursor.fetchall()
-        conn.close()
-
-        pdf_file = f'billing_summary_{month}.pdf'
-        c = canvas.Canvas(pdf_file, pagesize=letter)
-        c.drawString(100, 750, f"Billing Summary for {month}")
-        c.drawString(100, 730, "Customer")
-        c.drawString(300, 730, "Total")
-
-        y = 710
-        for row in rows:
-            c.drawString(100, y, row[0])
-            c.drawString(300, y, str(row[1]))
-            y -= 20
-
-        c.save()
-        messagebox.showinfo("Success", f"Billing summary exported to {pdf_file}")
\ No newline at end of file
+        UIUtils.run_with_progress(self.tasks, self.parent, "Generating invoices",
+                                  lambda: services.generate_invoices(month, progress=report_progress),
+                                  on_done=self.show_invoice_result)
+
+    def show_invoice_result(self, result):
+        """Report the outcome of an invoice run."""
+        if result.failed:
+            details = "\n".join(f"Customer {customer_id}: {reason}" for customer_id, reason in result.failed[:20])
+            messagebox.showwarning("Invoices", f"{result.summary()}\n\n{details}")
+        else:
+            messagebox.showinfo("Success", result.summary())
@@ -0,0 +1,99 @@
+from datetime import date
+
+from dates import to_day
+
+# Month billing summary, one row per customer, read from MonthlyTotals
+MONTH_SUMMARY_SQL = '''
+    SELECT c.name AS customer, SUM(t.amount) AS total
+    FROM MonthlyTotals t
+    LEFT JOIN Customers c ON c.id = t.customer_id
+    WHERE t.month = ?
+    GROUP BY t.customer_id
+'''
+
+# Bills of one month with their customer names
+MONTH_BILLS_SQL = '''
+    SELECT b.id, c.name AS customer, b.total, b.paid
+    FROM Billing b
+    LEFT JOIN Customers c ON c.id = b.customer_id
+    WHERE b.month = ?
+    ORDER BY c.name
+'''
+
+# Fresh totals for the pairs marked in BillingDirty, with the amount already paid
+DIRTY_TOTALS_SQL = '''
+    SELECT d.month, d.customer_id,
+           ROUND(IFNULL((SELECT SUM(t.amount) FROM MonthlyTotals t
+                         WHERE t.month = d.month AND t.customer_id = d.customer_id), 0), 2) AS total,
+           b.id IS NOT NULL AS billed, IFNULL(b.paid, 0) AS paid
+    FROM BillingDirty d
+    LEFT JOIN Billing b ON b.customer_id = d.customer_id AND b.month = d.month
+'''
+
+UPSERT_BILL_SQL = '''
+    INSERT INTO Billing (customer_id, month, total) VALUES (?, ?, ?)
+    ON CONFLICT (customer_id, month) DO UPDATE SET total = excluded.total
+'''
+
+class BillingRunResult:
+    """Outcome of a billing run."""
+
+    def __init__(self, month):
+        self.month = month
+        self.billed = 0
+        self.overpaid = []  # (month, customer_id, total, paid)
+
+    def summary(self):
+        """Return a one-line human readable summary."""
+        scope = self.month or "all months"
+        if not self.billed and not self.overpaid:
+            return f"Billing for {scope} is up to date"
+        text = f"{self.billed} bills updated for {scope}"
+        if self.overpaid:
+            text += f", {len(self.overpaid)} left unchanged because the new total is below the amount paid"
+        return text
+
+def run_billing(conn, month=None):
+    """Recompute the changed Billing rows of a YYYY-MM month, or all if None; call inside a transaction."""
+    sql, params = DIRTY_TOTALS_SQL, ()
+    if month is not None:
+        month = month_key(month)
+        sql, params = sql + " WHERE d.month = ?", (month,)
+    result = BillingRunResult(month)
+    bills, done = [], []
+    for bill_month, customer_id, total, billed, paid in conn.execute(sql, params):
+        if total < paid:
+            result.overpaid.append((bill_month, customer_id, total, paid))
+            continue
+        if total > 0 or billed:
+            bills.append((customer_id, bill_month, total))
+        done.append((bill_month, customer_id))
+    conn.executemany(UPSERT_BILL_SQL, bills)
+    conn.executemany("DELETE FROM BillingDirty WHERE month = ? AND customer_id = ?", done)
+    result.billed = len(bills)
+    return result
+
+def fetch_month_bills(conn, month):
+    """Fetch (bill id, customer, total, paid) rows of the month's bills."""
+    return conn.execute(MONTH_BILLS_SQL, (month_key(month),)).fetchall()
+
+def month_bounds(month):
+    """Return the [start, end) YYYYMMDD day range for a YYYY-MM month string."""
+    try:
+        year, mon = (int(part) for part in month.split("-"))
+        start = date(year, mon, 1)
+    except ValueError:
+        raise ValueError(f"Invalid month '{month}', expected YYYY-MM") from None
+    end = date(year + 1, 1, 1) if mon == 12 else date(year, mon + 1, 1)
+    return to_day(start), to_day(end)
+
+def month_key(month):
+    """Return a month string as the YYYY-MM stored in the database, e.g. '2025-1' as '2025-01'."""
+    start, _ = month_bounds(month)
+    return f"{start // 10000:04d}-{start // 100 % 100:02d}"
+
+def fetch_month_summary(conn, month):
+    """Fetch (customer, total) rows for every customer billed in the month."""
+    cursor = conn.cursor()
+    cursor.execute(MONTH_SUMMARY_SQL, (month_key(month),))
+    return cursor.fetchall()
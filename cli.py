@@ -0,0 +1,219 @@
+"""Command-line entry point for running billing, exports and imports without the GUI."""
+import argparse
+import sqlite3
+import sys
+from datetime import timedelta
+
+import archive
+from billing_queries import month_bounds
+import database
+from dates import from_day, to_day
+import services
+
+def print_progress(done, total=None):
+    """Show progress on stderr when it is a terminal."""
+    if sys.stderr.isatty():
+        text = f"{done}/{total}" if total else f"{done}"
+        print(f"\r{text}", end="", file=sys.stderr, flush=True)
+
+def end_progress():
+    """Finish a progress line started by print_progress."""
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+
+def run_bill(args):
+    """Bring the month's bills up to date, print them and write the requested outputs."""
+    result, rows = services.run_billing(args.month)
+    for _, customer, total, paid in rows:
+        print(f"{customer}\t{total or 0:.2f}\t{paid or 0:.2f}")
+    print(f"{len(rows)} customers, total {sum(row[2] or 0 for row in rows):.2f}, "
+          f"paid {sum(row[3] or 0 for row in rows):.2f}")
+    print(result.summary())
+    for month, customer_id, total, paid in result.overpaid:
+        print(f"Customer {customer_id}: {month} total {total:.2f} is below the {paid:.2f} already paid",
+              file=sys.stderr)
+    if args.excel is not None:
+        print(f"Billing summary exported to {services.export_billing_excel(args.month, args.excel or None)}")
+    if args.pdf is not None:
+        print(f"Billing summary exported to {services.export_billing_pdf(args.month, args.pdf or None)}")
+    if args.invoices:
+        result = services.generate_invoices(args.month, args.invoice_dir, args.workers, progress=print_progress)
+        end_progress()
+        print(result.summary())
+        for customer_id, reason in result.failed:
+            print(f"Customer {customer_id}: {reason}", file=sys.stderr)
+        if result.failed:
+            return 1
+    return 0
+
+def run_export(args):
+    """Export daily entries to the given file."""
+    start, end = services.entry_date_range(args.start, args.end)
+    count = services.export_daily_entries(args.path, start, end, fmt=args.format, progress=print_progress)
+    end_progress()
+    print(f"{count} entries exported to {args.path}")
+    return 0
+
+def run_import(args):
+    """Import daily entries from a CSV file."""
+    result = services.import_entries(args.path, progress=print_progress)
+    end_progress()
+    print(result.summary())
+    for line, reason in result.rejected:
+        print(f"Line {line}: {reason}", file=sys.stderr)
+    return 1 if result.rejected else 0
+
+def run_dashboard(args):
+    """Print the dashboard figures."""
+    stats = services.dashboard_stats()
+    print(f"Total Customers: {stats['customers']}")
+    print(f"Today's Entries: {stats['today']}")
+    print(f"Outstanding Payments: {stats['outstanding']:.2f}")
+    print(f"This Month's Sales to Date: {stats['month_sales']:.2f}")
+    for name, quantity in stats["today_by_product"]:
+        print(f"    {name}: {quantity:.2f}")
+    return 0
+
+def run_archive(args):
+    """Archive closed months, restore archived ones or list them."""
+    if args.list:
+        for month, entries, archived_at in services.archived_months():
+            print(f"{month}\t{entries}\t{archived_at}")
+        return 0
+    if args.restore_from:
+        print(f"Restored {services.restore_entries(args.restore_from).summary()}")
+        return 0
+    through = args.through or archive.default_through(keep_months=args.keep_months)
+    print(f"Archived {services.archive_entries(through).summary()}")
+    if args.vacuum:
+        services.vacuum()
+    return 0
+
+def run_rate(args):
+    """Set a product's rate from a date on, or list its rates."""
+    if args.rate is not None:
+        repriced = services.set_product_rate(args.product, args.rate, args.start, args.reprice)
+        if args.reprice:
+            print(f"{repriced} entries repriced")
+    for effective_from, rate in services.product_rates(args.product):
+        print(f"{effective_from}\t{rate:.2f}")
+    return 0
+
+def run_standing(args):
+    """Add, list, pause or end standing orders, or generate their entries."""
+    if args.action == "add":
+        order_id = services.add_standing_order(args.customer, args.product, args.quantity,
+                                               args.start, args.end, args.days)
+        print(f"Standing order {order_id} added")
+    elif args.action == "list":
+        for row in services.list_standing_orders(args.customer):
+            print("\t".join(str(value) for value in row))
+    elif args.action == "pause":
+        services.pause_standing_order(args.order_id, args.start, args.end)
+    elif args.action == "end":
+        services.end_standing_order(args.order_id, args.on)
+    else:
+        start, end = args.start, args.end
+        if args.month:
+            first, after = month_bounds(args.month)
+            start, end = first, to_day(from_day(after) - timedelta(days=1))
+        print(f"{services.generate_standing_entries(start, end)} entries generated")
+    return 0
+
+def build_parser():
+    """Return the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(description="Dairy management batch commands.")
+    parser.add_argument("--db", help=f"database file (default: {database.DB_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bill = commands.add_parser("bill", help="calculate and save a month's billing")
+    bill.add_argument("--month", required=True, help="month in YYYY-MM format")
+    bill.add_argument("--excel", nargs="?", const="", metavar="PATH",
+                      help="also export the summary to Excel")
+    bill.add_argument("--pdf", nargs="?", const="", metavar="PATH",
+                      help="also export the summary to PDF")
+    bill.add_argument("--invoices", action="store_true", help="also write per-customer PDF invoices")
+    bill.add_argument("--invoice-dir", help="directory for invoices (default: invoices)")
+    bill.add_argument("--workers", type=int, help="invoice rendering processes (default: one per CPU)")
+    bill.set_defaults(run=run_bill)
+
+    export = commands.add_parser("export", help="export daily entries")
+    export.add_argument("path", help="output file; .csv, .xlsx or .pdf")
+    export.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    export.add_argument("--to", dest="end", help="last date (inclusive), YYYY-MM-DD")
+    export.add_argument("--format", choices=sorted(services.ENTRY_EXPORT_FORMATS),
+                        help="output format (default: from the file extension)")
+    export.set_defaults(run=run_export)
+
+    import_ = commands.add_parser("import", help="import daily entries from a CSV file")
+    import_.add_argument("path", help="CSV file with date,customer,product,quantity columns")
+    import_.set_defaults(run=run_import)
+
+    dashboard = commands.add_parser("dashboard", help="print the dashboard figures")
+    dashboard.set_defaults(run=run_dashboard)
+
+    archive_ = commands.add_parser("archive", help="move closed, billed months out of the live database")
+    action = archive_.add_mutually_exclusive_group()
+    action.add_argument("--through", metavar="YYYY-MM", help="last month to archive")
+    action.add_argument("--keep-months", type=int, default=archive.KEEP_MONTHS,
+                        help="archive all but the current month and this many before it "
+                             f"(default: {archive.KEEP_MONTHS})")
+    action.add_argument("--restore-from", metavar="YYYY-MM",
+                        help="move archived entries from this month on back into the live database")
+    action.add_argument("--list", action="store_true", help="list the archived months")
+    archive_.add_argument("--vacuum", action="store_true", help="compact the live database afterwards")
+    archive_.set_defaults(run=run_archive)
+
+    rate = commands.add_parser("rate", help="set a product's rate from a date on, or list its rates")
+    rate.add_argument("product", help="product name")
+    rate.add_argument("rate", nargs="?", type=float, help="new rate; omit to list the product's rates")
+    rate.add_argument("--from", dest="start", help="first day of the new rate, YYYY-MM-DD (default: today)")
+    rate.add_argument("--reprice", action="store_true",
+                      help="also reprice entries already written from that day on")
+    rate.set_defaults(run=run_rate)
+
+    standing = commands.add_parser("standing", help="manage standing orders and generate their entries")
+    standing.set_defaults(run=run_standing)
+    actions = standing.add_subparsers(dest="action", required=True)
+    add = actions.add_parser("add", help="add a standing order")
+    add.add_argument("customer", help="customer name")
+    add.add_argument("product", help="product name")
+    add.add_argument("quantity", type=float, help="quantity per delivery")
+    add.add_argument("--from", dest="start", help="first delivery, YYYY-MM-DD (default: today)")
+    add.add_argument("--to", dest="end", help="last delivery, YYYY-MM-DD (default: until ended)")
+    add.add_argument("--days", help="weekdays, e.g. mon,wed,fri (default: daily)")
+    list_ = actions.add_parser("list", help="list the current standing orders")
+    list_.add_argument("--customer", help="only this customer's orders")
+    pause = actions.add_parser("pause", help="suspend an order between two dates")
+    pause.add_argument("order_id", type=int)
+    pause.add_argument("--from", dest="start", required=True, help="first day paused, YYYY-MM-DD")
+    pause.add_argument("--to", dest="end", required=True, help="last day paused, YYYY-MM-DD")
+    end = actions.add_parser("end", help="end an order")
+    end.add_argument("order_id", type=int)
+    end.add_argument("--on", help="last delivery, YYYY-MM-DD (default: today)")
+    generate = actions.add_parser("generate", help="write the standing orders' daily entries")
+    period = generate.add_mutually_exclusive_group()
+    period.add_argument("--month", metavar="YYYY-MM", help="a whole month")
+    period.add_argument("--from", dest="start", help="first day, YYYY-MM-DD (default: today)")
+    generate.add_argument("--to", dest="end", help="last day, YYYY-MM-DD (default: the first)")
+    return parser
+
+def main(argv=None):
+    """Run one subcommand and return its exit status."""
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database.DB_PATH = args.db
+    try:
+        database.init_db()
+        services.ensure_default_products()
+        with database.profiler.span(f"cli {args.command}"):
+            return args.run(args)
+    except (ValueError, LookupError, OSError, sqlite3.Error) as e:
+        end_progress()
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        database.connections.close_all()
+
+if __name__ == "__main__":
+    sys.exit(main())
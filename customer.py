@@ -1,10 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import get_connection
+from customer_queries import LIST_LIMIT
+from database import profiled
+import services
+from tasks import TaskRunner
+from ui_utils import Debouncer, TreeBinding, TYPE_AHEAD_DELAY_MS
 
+# Columns a search looks in, as customer_queries.search_customers does
+SEARCH_COLUMNS = ("name", "address", "contact")
+
+def refines(text, loaded_text):
+    """Return whether text can only match a subset of what loaded_text matched."""
+    words = text.casefold().split()
+    return all(any(old in word for word in words) for old in loaded_text.casefold().split())
+
+@profiled
 class CustomerManager:
-    def __init__(self, parent_frame):
+    def __init__(self, parent_frame, tasks=None):
         self.parent = parent_frame
+        self.tasks = tasks or TaskRunner(parent_frame)
+        self.generation = 0  # Bumped per search so stale results are dropped
+        self.loaded_text = None  # Search whose complete results are loaded, if any
         self.setup_ui()
         self.load_customers()
 
@@ -40,11 +56,18 @@ class CustomerManager:
         list_frame = ttk.LabelFrame(self.parent, text="Customer List", padding=10)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        self.tree = ttk.Treeview(list_frame, columns=("id", "name", "address", "contact"), show="headings")
-        self.tree.heading("id", text="ID")
-        self.tree.heading("name", text="Name")
-        self.tree.heading("address", text="Address")
-        self.tree.heading("contact", text="Contact")
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(search_frame)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_status = ttk.Label(search_frame)
+        self.search_status.pack(side=tk.LEFT)
+        self.search_debouncer = Debouncer(self.search_entry, TYPE_AHEAD_DELAY_MS, self.load_customers)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.search_debouncer.trigger())
+
+        self.customers = TreeBinding(list_frame, ("id", "name", "address", "contact"), headings={"id": "ID"})
+        self.tree = self.customers.tree
         self.tree.column("id", width=50)
         self.tree.column("name", width=150)
         self.tree.column("address", width=200)
@@ -55,20 +78,41 @@ class CustomerManager:
         self.tree.bind("<<TreeviewSelect>>", self.on_customer_select)
 
     def load_customers(self):
-        """Load customers from database into treeview."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, address, contact FROM Customers")
-        rows = cursor.fetchall()
-        conn.close()
+        """Show the customers matching the search box."""
+        text = self.search_entry.get()
+        self.generation += 1
+        generation = self.generation
+        if self.loaded_text is not None and refines(text, self.loaded_text):
+            self.customers.filter(text, SEARCH_COLUMNS)
+            self.show_status(truncated=False)
+            return
 
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        def done(rows):
+            if generation == self.generation:
+                self.show_customers(text, rows)
+
+        self.tasks.submit(lambda: services.search_customers(text, LIST_LIMIT),
+                          key="customers.load", on_done=done)
+
+    def refresh(self, changed=None):
+        """Search the database again, e.g. after customers changed elsewhere."""
+        self.loaded_text = None
+        self.load_customers()
 
-        # Insert new items
-        for row in rows:
-            self.tree.insert("", tk.END, values=row)
+    def show_customers(self, text, rows):
+        """Show the customer rows found for text, updating only what changed."""
+        truncated = len(rows) >= LIST_LIMIT
+        self.loaded_text = None if truncated else text
+        self.customers.set_rows(rows)
+        self.customers.filter(text, SEARCH_COLUMNS)
+        self.show_status(truncated)
+
+    def show_status(self, truncated):
+        """Show how many customers are listed."""
+        if truncated:
+            self.search_status.configure(text=f"First {LIST_LIMIT} shown; search to narrow")
+        else:
+            self.search_status.configure(text=f"{len(self.customers)} shown")
 
     def add_customer(self):
         """Add a new customer to the database."""
@@ -80,20 +124,14 @@ class CustomerManager:
             messagebox.showerror("Error", "Name and Contact are required fields")
             return
 
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO Customers (name, address, contact) VALUES (?, ?, ?)",
-                (name, address, contact)
-            )
-            conn.commit()
-            conn.close()
-            self.load_customers()
+        def added(customer_id):
+            self.customers.apply(inserted=[(customer_id, name, address, contact)])
+            self.show_status(truncated=self.loaded_text is None)
             self.clear_form()
             messagebox.showinfo("Success", "Customer added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add customer: {str(e)}")
+
+        self.tasks.submit(lambda: services.add_customer(name, address, contact), on_done=added, on_error=lambda e: messagebox.showerror(
+            "Error", f"Failed to add customer: {str(e)}"))
 
     def update_customer(self):
         """Update selected customer in the database."""
@@ -102,24 +140,18 @@ class CustomerManager:
             messagebox.showerror("Error", "No customer selected")
             return
 
-        customer_id = self.tree.item(selected[0], "values")[0]
+        customer_id = self.customers.row(selected[0])[0]
         name = self.name_entry.get()
         address = self.address_entry.get()
         contact = self.contact_entry.get()
 
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE Customers SET name=?, address=?, contact=? WHERE id=?",
-                (name, address, contact, customer_id)
-            )
-            conn.commit()
-            conn.close()
-            self.load_customers()
+        def updated(_):
+            self.customers.apply(updated=[(customer_id, name, address, contact)])
+            self.show_status(truncated=self.loaded_text is None)
             messagebox.showinfo("Success", "Customer updated successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update customer: {str(e)}")
+
+        self.tasks.submit(lambda: services.update_customer(customer_id, name, address, contact), on_done=updated, on_error=lambda e: messagebox.showerror(
+            "Error", f"Failed to update customer: {str(e)}"))
 
     def delete_customer(self):
         """Delete selected customer from the database."""
@@ -131,18 +163,16 @@ class CustomerManager:
         if not messagebox.askyesno("Confirm", "Are you sure you want to delete this customer?"):
             return
 
-        customer_id = self.tree.item(selected[0], "values")[0]
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM Customers WHERE id=?", (customer_id,))
-            conn.commit()
-            conn.close()
-            self.load_customers()
+        customer_id = self.customers.row(selected[0])[0]
+
+        def deleted(_):
+            self.customers.apply(deleted=[customer_id])
+            self.show_status(truncated=self.loaded_text is None)
             self.clear_form()
             messagebox.showinfo("Success", "Customer deleted successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete customer: {str(e)}")
+
+        self.tasks.submit(lambda: services.delete_customer(customer_id), on_done=deleted, on_error=lambda e: messagebox.showerror(
+            "Error", f"Failed to delete customer: {str(e)}"))
 
     def clear_form(self):
         """Clear all form fields."""
@@ -152,10 +182,10 @@ class CustomerManager:
 
     def on_customer_select(self, event):
         """Populate form fields when a customer is selected from the treeview."""
-        selected = self.tree.selection()
+        selected = self.customers.selected()
         if selected:
-            values = self.tree.item(selected[0], "values")
+            values = selected[0]
             self.clear_form()
             self.name_entry.insert(0, values[1])
             self.address_entry.insert(0, values[2] if values[2] else "")
-            self.contact_entry.insert(0, values[3])
\ No newline at end of file
+            self.contact_entry.insert(0, values[3] or "")
\ No newline at end of file
@@ -0,0 +1,48 @@
+SEARCH_LIMIT = 20  # Type-ahead suggestions
+LIST_LIMIT = 500  # Rows in the customer list
+
+# Customers matching a CustomerSearch query, in rowid order so broad matches stop at the limit
+CUSTOMER_MATCH_SQL = '''
+    SELECT c.id, c.name, c.address, c.contact
+    FROM CustomerSearch s
+    JOIN Customers c ON c.id = s.rowid
+    WHERE CustomerSearch MATCH ?
+'''
+
+CUSTOMER_SELECT_SQL = '''
+    SELECT c.id, c.name, c.address, c.contact
+    FROM Customers c
+'''
+
+def has_search_index(conn):
+    """Return whether the CustomerSearch index exists in this database."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'CustomerSearch'"
+    ).fetchone() is not None
+
+def search_customers(conn, text, limit=SEARCH_LIMIT):
+    """Return up to limit (id, name, address, contact) rows matching every word of text."""
+    words = (text or "").split()
+    indexed = has_search_index(conn)
+    long_words = [word for word in words if len(word) >= 3] if indexed else []
+    conditions, params = [], []
+    for word in words:
+        if word in long_words:
+            continue
+        pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append("(c.name LIKE ? ESCAPE '\\' OR c.address LIKE ? ESCAPE '\\' "
+                          "OR c.contact LIKE ? ESCAPE '\\')")
+        params += [pattern] * 3
+    if long_words:
+        sql, order, joiner = CUSTOMER_MATCH_SQL, " ORDER BY s.rowid", " AND "
+        params.insert(0, " ".join('"' + word.replace('"', '""') + '"' for word in long_words))
+    else:
+        sql, order, joiner = CUSTOMER_SELECT_SQL, " ORDER BY c.id", " WHERE "
+    if conditions:
+        sql += joiner + " AND ".join(conditions)
+    return conn.execute(sql + order + " LIMIT ?", (*params, limit)).fetchall()
+
+def customer_label(row):
+    """Return the text a combobox shows for an (id, name, address, contact) row."""
+    customer_id, name, _, contact = row
+    return f"{name} ({contact}) #{customer_id}" if contact else f"{name} #{customer_id}"
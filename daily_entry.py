@@ -1,15 +1,41 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database import get_connection
+from tkinter import ttk, messagebox, filedialog
+from customer_queries import customer_label
+from database import get_connection, profiled
+from dates import day_iso
+from entry_queries import PAGE_SIZE, EntryFilter, fetch_entries_page
+from lookups import lookups
+import services
+from tasks import TaskRunner, report_progress
+from ui_utils import TypeAhead, UIUtils
 
+# Upper bound on rows held by the entries Treeview
+MAX_LOADED_ROWS = 5 * PAGE_SIZE
+
+def search_customer_labels(text):
+    """Return (id, label) pairs for the customers matching text."""
+    return [(row[0], customer_label(row)) for row in services.search_customers(text)]
+
+@profiled
 class DailyEntryManager:
-    def __init__(self, parent_frame):
+    def __init__(self, parent_frame, tasks=None):
         self.parent = parent_frame
+        self.tasks = tasks or TaskRunner(parent_frame)
+        self.entry_filter = EntryFilter()
+        self.generation = 0  # Bumped on reload so stale pages are dropped
+        self.row_keys = {}  # Treeview iid -> (entry_date, id)
+        self.has_more_before = False
+        self.has_more_after = False
+        self.paging = False
         self.setup_ui()
         self.load_products()
+        self.load_customers()
+        self.load_entries()
 
     def setup_ui(self):
         """Setup the daily entry UI components."""
+        from tkcalendar import DateEntry  # Pulls in babel; loaded with the screen, not at startup
+
         # Daily entry form frame
         form_frame = ttk.LabelFrame(self.parent, text="Daily Entry Form", padding=10)
         form_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -22,6 +48,8 @@ class DailyEntryManager:
         ttk.Label(form_frame, text="Customer:").grid(row=1, column=0, sticky=tk.W)
         self.customer_combobox = ttk.Combobox(form_frame)
         self.customer_combobox.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=2)
+        self.customer_search = TypeAhead(self.customer_combobox, self.tasks, search_customer_labels,
+                                         key="entries.customers")
 
         ttk.Label(form_frame, text="Product:").grid(row=2, column=0, sticky=tk.W)
         self.product_combobox = ttk.Combobox(form_frame)
@@ -37,6 +65,34 @@ class DailyEntryManager:
         
         ttk.Button(btn_frame, text="Add Entry", command=self.add_entry).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Clear", command=self.clear_form).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Import CSV", command=self.import_csv).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Generate Standing Orders",
+                   command=self.generate_standing_orders).pack(side=tk.LEFT, padx=2)
+
+        # Filters for the entries list
+        filter_frame = ttk.LabelFrame(self.parent, text="Filter Entries", padding=10)
+        filter_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Label(filter_frame, text="From (YYYY-MM-DD):").grid(row=0, column=0, sticky=tk.W)
+        self.filter_start_entry = ttk.Entry(filter_frame, width=12)
+        self.filter_start_entry.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=2)
+
+        ttk.Label(filter_frame, text="To:").grid(row=0, column=2, sticky=tk.W)
+        self.filter_end_entry = ttk.Entry(filter_frame, width=12)
+        self.filter_end_entry.grid(row=0, column=3, sticky=tk.EW, padx=5, pady=2)
+
+        ttk.Label(filter_frame, text="Customer:").grid(row=1, column=0, sticky=tk.W)
+        self.filter_customer_combobox = ttk.Combobox(filter_frame)
+        self.filter_customer_combobox.grid(row=1, column=1, sticky=tk.EW, padx=5, pady=2)
+        self.filter_customer_search = TypeAhead(self.filter_customer_combobox, self.tasks,
+                                                search_customer_labels, key="entries.filter_customers")
+
+        ttk.Label(filter_frame, text="Product:").grid(row=1, column=2, sticky=tk.W)
+        self.filter_product_combobox = ttk.Combobox(filter_frame)
+        self.filter_product_combobox.grid(row=1, column=3, sticky=tk.EW, padx=5, pady=2)
+
+        ttk.Button(filter_frame, text="Apply", command=self.apply_filter).grid(row=0, column=4, padx=5)
+        ttk.Button(filter_frame, text="Reset", command=self.reset_filter).grid(row=1, column=4, padx=5)
 
         # Daily entries list
         list_frame = ttk.LabelFrame(self.parent, text="Daily Entries", padding=10)
@@ -47,32 +103,42 @@ class DailyEntryManager:
         self.tree.heading("customer", text="Customer")
         self.tree.heading("product", text="Product")
         self.tree.heading("quantity", text="Quantity")
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
     def load_products(self):
         """Load products from the database into the product combobox."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM Products")
-        products = cursor.fetchall()
-        conn.close()
+        self.tasks.submit(services.product_names, key="entries.products", on_done=self.show_products)
 
-        self.product_combobox['values'] = [product[0] for product in products]
+    def show_products(self, products):
+        """Fill the product comboboxes."""
+        self.product_combobox['values'] = products
+        self.filter_product_combobox['values'] = [""] + products
 
     def load_customers(self):
-        """Load customers from the database into the customer combobox."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM Customers")
-        customers = cursor.fetchall()
-        conn.close()
+        """List the first customers in the customer comboboxes; typing searches."""
+        self.customer_search.refresh()
+        self.filter_customer_search.refresh()
 
-        self.customer_combobox['values'] = [customer[0] for customer in customers]
+    def refresh(self, changed=None):
+        """Reload what depends on the changed tables (default: everything)."""
+        if changed is None or "Products" in changed:
+            self.load_products()
+        if changed is None or "Customers" in changed:
+            self.load_customers()
+        # Entries show customer and product names
+        self.load_entries()
 
     def add_entry(self):
         """Add a new daily entry to the database."""
-        date = self.date_entry.get()
-        customer = self.customer_combobox.get()
+        try:
+            entry_date = self.date_entry.get_date()
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid date")
+            return
+        customer = self.get_customer(self.customer_search)
         product = self.product_combobox.get()
         quantity = self.quantity_entry.get()
 
@@ -80,63 +146,220 @@ class DailyEntryManager:
             messagebox.showerror("Error", "All fields are required")
             return
 
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO DailyEntries (entry_date, customer_id, product_id, quantity) VALUES (?, ?, ?, ?)",
-                (date, self.get_customer_id(customer), self.get_product_id(product), quantity)
-            )
-            conn.commit()
-            conn.close()
-            self.load_entries()
+        def added(row):
+            if row is not None:
+                self.insert_entry_row(row)
             self.clear_form()
             messagebox.showinfo("Success", "Daily entry added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add entry: {str(e)}")
+
+        entry_filter = self.entry_filter
+        self.tasks.submit(lambda: services.add_entry(entry_date, customer, product, quantity, entry_filter),
+                          on_done=added, on_error=lambda e: messagebox.showerror(
+                              "Error", f"Failed to add entry: {str(e)}"))
+
+    def import_csv(self):
+        """Bulk import daily entries from a CSV route sheet."""
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+
+        UIUtils.run_with_progress(self.tasks, self.parent, "Importing entries",
+                                  lambda: services.import_entries(path, progress=report_progress),
+                                  on_done=self.show_import_result)
+
+    def show_import_result(self, result):
+        """Reload the entries and report the outcome of an import."""
+        self.load_entries()
+        message = result.summary()
+        if result.rejected:
+            details = "\n".join(f"Line {line}: {reason}" for line, reason in result.rejected[:20])
+            more = len(result.rejected) - 20
+            if more > 0:
+                details += f"\n... and {more} more"
+            messagebox.showwarning("Import", f"{message}\n\n{details}")
+        else:
+            messagebox.showinfo("Success", message)
+
+    def generate_standing_orders(self):
+        """Write the standing orders' entries for the date in the form."""
+        try:
+            entry_date = self.date_entry.get_date()
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid date")
+            return
+
+        def generated(count):
+            self.load_entries()
+            messagebox.showinfo("Success", f"{count} standing order entries generated for {entry_date.isoformat()}")
+
+        self.tasks.submit(lambda: services.generate_standing_entries(entry_date),
+                          on_done=generated, on_error=lambda e: messagebox.showerror(
+                              "Error", f"Failed to generate entries: {str(e)}"))
+
+    def get_customer(self, search):
+        """Return the ID of the customer picked in a search combobox, else its text."""
+        customer_id = search.value()
+        return customer_id if customer_id is not None else search.combobox.get().strip()
 
     def get_customer_id(self, customer_name):
-        """Get customer ID from the database based on the name."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM Customers WHERE name=?", (customer_name,))
-        customer_id = cursor.fetchone()[0]
-        conn.close()
-        return customer_id
+        """Get customer ID from the lookup cache based on the name."""
+        return lookups.customer_id(customer_name)
 
     def get_product_id(self, product_name):
-        """Get product ID from the database based on the name."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM Products WHERE name=?", (product_name,))
-        product_id = cursor.fetchone()[0]
-        conn.close()
-        return product_id
+        """Get product ID from the lookup cache based on the name."""
+        return lookups.product_id(product_name)
 
     def load_entries(self):
-        """Load daily entries from the database into the treeview."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT entry_date, (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   (SELECT name FROM Products WHERE id = product_id) AS product, quantity
-            FROM DailyEntries
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
-
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Insert new items
+        """Load the first page of daily entries matching the filter."""
+        self.generation += 1
+        self.paging = True
+        self.fetch_page(self.show_first_page)
+
+    def fetch_page(self, on_done, after=None, before=None):
+        """Fetch a page of entries on a worker thread for the current filter."""
+        entry_filter, generation = self.entry_filter, self.generation
+
+        def done(rows):
+            if generation == self.generation:
+                on_done(rows)
+
+        def failed(error):
+            self.paging = False
+            messagebox.showerror("Error", f"Failed to load entries: {str(error)}")
+
+        self.tasks.submit(
+            lambda: fetch_entries_page(get_connection(), entry_filter, after=after, before=before),
+            key="entries.page", on_done=done, on_error=failed)
+
+    def show_first_page(self, rows):
+        """Replace the treeview contents with the first page."""
+        self.paging = False
+        self.tree.delete(*self.tree.get_children())
+        self.row_keys.clear()
         for row in rows:
-            self.tree.insert("", tk.END, values=row)
+            self.insert_tree_row(tk.END, row)
+        self.has_more_before = False
+        self.has_more_after = len(rows) == PAGE_SIZE
+
+    def insert_tree_row(self, index, row):
+        """Insert an (id, entry_date, customer, product, quantity) row."""
+        entry_id, entry_date = row[0], row[1]
+        iid = str(entry_id)
+        if iid in self.row_keys:
+            return  # Already shown, e.g. added while its page was loading
+        self.row_keys[iid] = (entry_date, entry_id)
+        self.tree.insert("", index, iid=iid, values=(day_iso(entry_date), *row[2:]))
+
+    def delete_tree_rows(self, items):
+        """Remove rows from the treeview and forget their keys."""
+        self.tree.delete(*items)
+        for iid in items:
+            del self.row_keys[iid]
+
+    def insert_entry_row(self, row):
+        """Show a newly added entry in place without reloading the list."""
+        key = (row[1], row[0])
+        items = self.tree.get_children()
+        if items and key > self.row_keys[items[0]] and self.has_more_before:
+            return  # Newer than the loaded window; it is fetched on scrolling up
+        if items and key < self.row_keys[items[-1]] and self.has_more_after:
+            return  # Older than the loaded window; it is fetched on scrolling down
+        index = 0
+        while index < len(items) and self.row_keys[items[index]] > key:
+            index += 1
+        self.insert_tree_row(index, row)
+        self.tree.see(str(row[0]))
+
+    def on_tree_scroll(self, first, last):
+        """Update the scrollbar and fetch more rows near either end."""
+        self.scrollbar.set(first, last)
+        if self.paging:
+            return
+        if float(last) > 0.9 and self.has_more_after:
+            self.paging = True
+            self.tree.after_idle(self.load_next_page)
+        elif float(first) < 0.1 and self.has_more_before:
+            self.paging = True
+            self.tree.after_idle(self.load_previous_page)
+
+    def load_next_page(self):
+        """Fetch the page following the last loaded row."""
+        items = self.tree.get_children()
+        if not items:
+            self.paging = False
+            return
+        self.fetch_page(self.append_page, after=self.row_keys[items[-1]])
+
+    def append_page(self, rows):
+        """Append a fetched page, dropping rows far above the view."""
+        try:
+            for row in rows:
+                self.insert_tree_row(tk.END, row)
+            self.has_more_after = len(rows) == PAGE_SIZE
+            items = self.tree.get_children()
+            excess = len(items) - MAX_LOADED_ROWS
+            if excess > 0:
+                self.delete_tree_rows(items[:excess])
+                self.has_more_before = True
+        finally:
+            self.paging = False
+
+    def load_previous_page(self):
+        """Fetch the page preceding the first loaded row."""
+        items = self.tree.get_children()
+        if not items:
+            self.paging = False
+            return
+        self.fetch_page(self.prepend_page, before=self.row_keys[items[0]])
+
+    def prepend_page(self, rows):
+        """Prepend a fetched page, dropping rows far below the view."""
+        try:
+            first = self.tree.get_children()[0]
+            for index, row in enumerate(rows):
+                self.insert_tree_row(index, row)
+            self.has_more_before = len(rows) == PAGE_SIZE
+            items = self.tree.get_children()
+            excess = len(items) - MAX_LOADED_ROWS
+            if excess > 0:
+                self.delete_tree_rows(items[-excess:])
+                self.has_more_after = True
+            self.tree.see(first)
+        finally:
+            self.paging = False
+
+    def apply_filter(self):
+        """Reload the entries list restricted to the filter fields."""
+        try:
+            start, end = services.entry_date_range(self.filter_start_entry.get(), self.filter_end_entry.get())
+            customer = self.get_customer(self.filter_customer_search)
+            product = self.filter_product_combobox.get()
+            if isinstance(customer, str) and customer:
+                customer = self.get_customer_id(customer)
+            self.entry_filter = EntryFilter(
+                start=start,
+                end=end,
+                customer_id=customer if customer != "" else None,
+                product_id=self.get_product_id(product) if product else None,
+            )
+        except (ValueError, LookupError) as e:
+            messagebox.showerror("Error", f"Invalid filter: {str(e)}")
+            return
+        self.load_entries()
+
+    def reset_filter(self):
+        """Clear the filter fields and show all entries."""
+        self.filter_start_entry.delete(0, tk.END)
+        self.filter_end_entry.delete(0, tk.END)
+        self.filter_customer_search.clear()
+        self.filter_product_combobox.set('')
+        self.entry_filter = EntryFilter()
+        self.load_entries()
 
     def clear_form(self):
         """Clear all form fields."""
         self.date_entry.set_date('')
-        self.customer_combobox.set('')
+        self.customer_search.clear()
         self.product_combobox.set('')
         self.quantity_entry.delete(0, tk.END)
 
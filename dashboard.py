@@ -0,0 +1,65 @@
+import threading
+import time
+from datetime import date
+
+from database import get_connection
+from dates import to_day
+
+class DashboardStats:
+    """Short-lived in-process cache of the dashboard figures."""
+
+    def __init__(self, max_age=2.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._stats = None
+        self._fetched_at = 0.0
+
+    def cached(self):
+        """Return the last figures fetched, or None, without querying."""
+        return self._stats
+
+    def invalidate(self):
+        """Make the next get() query the database."""
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def get(self, max_age=None):
+        """Return the figures, refreshing them if older than max_age seconds."""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._fetched_at < max_age:
+                return self._stats
+        return self.refresh()
+
+    def refresh(self):
+        """Query the snapshot tables and return the figures as a dict."""
+        stats = self.fetch(get_connection(), date.today())
+        with self._lock:
+            self._stats = stats
+            self._fetched_at = time.monotonic()
+        return stats
+
+    def fetch(self, conn, today):
+        """Read the dashboard figures for the given date."""
+        first, day = to_day(today.replace(day=1)), to_day(today)
+        counters = dict(conn.execute("SELECT name, value FROM DashboardCounters"))
+        by_product = conn.execute('''
+            SELECT p.name, t.entries, t.quantity
+            FROM DailyProductTotals t
+            JOIN Products p ON p.id = t.product_id
+            WHERE t.entry_date = ?
+            ORDER BY p.name
+        ''', (day,)).fetchall()
+        month_sales = conn.execute(
+            "SELECT SUM(amount) FROM DailyProductTotals WHERE entry_date >= ? AND entry_date <= ?",
+            (first, day)
+        ).fetchone()[0]
+        return {
+            "customers": int(counters.get("customers", 0)),
+            "today": sum(entries for _, entries, _ in by_product),
+            "today_by_product": [(name, quantity) for name, _, quantity in by_product],
+            "outstanding": counters.get("outstanding", 0.0),
+            "month_sales": month_sales or 0.0,
+        }
+
+dashboard_cache = DashboardStats()
@@ -1,61 +1,1548 @@
+import argparse
+import atexit
+import functools
+import itertools
+import logging
+import os
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = 'dairy_management.db'
+
+# DAIRY_PROFILE=1 times statements and screen methods; DAIRY_SLOW_QUERY_MS sets the slow threshold
+PROFILE = os.environ.get("DAIRY_PROFILE", "") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("DAIRY_SLOW_QUERY_MS", "100"))
+# Methods wrapped in timing spans by profiled()
+PROFILED_METHODS = ("load_", "calculate_billing", "export_", "show_")
+
+log = logging.getLogger("dairy.profile")
+
+class Profiler:
+    """Collect statement and span timings from every thread."""
+
+    def __init__(self, enabled, slow_ms):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self.queries = {}  # sql -> [calls, seconds, max seconds, rows]
+        self.spans = {}  # name -> [calls, seconds, max seconds]
+
+    def record_query(self, sql, seconds, rows):
+        """Add one statement execution to the totals."""
+        key = " ".join(sql.split())
+        with self._lock:
+            stats = self.queries.setdefault(key, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += rows
+
+    def slow_query(self, conn, sql, params, seconds):
+        """Log a statement over the threshold together with its query plan."""
+        try:
+            plan_cursor = sqlite3.Cursor(conn)  # Plain cursor; not itself profiled
+            plan = [row[3] for row in plan_cursor.execute("EXPLAIN QUERY PLAN " + sql, params or ())]
+            plan_cursor.close()
+        except sqlite3.Error as e:
+            plan = [f"(no plan: {e})"]
+        log.warning("slow query (%.1f ms so far): %s\n    %s", seconds * 1000,
+                    " ".join(sql.split()), "\n    ".join(plan))
+
+    @contextmanager
+    def span(self, name):
+        """Time the block under name when profiling is enabled."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                stats = self.spans.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def report(self, file=None, limit=20):
+        """Print the span and statement summaries, slowest total first."""
+        file = file or sys.stderr
+        with self._lock:
+            spans = sorted(self.spans.items(), key=lambda item: -item[1][1])
+            queries = sorted(self.queries.items(), key=lambda item: -item[1][1])
+        print(f"{'span':<48} {'calls':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}", file=file)
+        for name, (calls, seconds, longest) in spans:
+            print(f"{name[:48]:<48} {calls:>6} {seconds * 1000:>10.1f} "
+                  f"{seconds * 1000 / calls:>9.2f} {longest * 1000:>9.2f}", file=file)
+        print(f"\n{'statement':<60} {'calls':>6} {'total ms':>10} {'max ms':>9} {'rows':>9}", file=file)
+        for sql, (calls, seconds, longest, rows) in queries[:limit]:
+            print(f"{sql[:60]:<60} {calls:>6} {seconds * 1000:>10.1f} {longest * 1000:>9.2f} {rows:>9}",
+                  file=file)
+
+profiler = Profiler(PROFILE, SLOW_QUERY_MS)
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor that times each statement, including fetching its rows."""
+
+    _sql = None
+
+    def _start(self, sql, params):
+        self._finish()
+        self._sql, self._params = sql, params
+        self._seconds, self._rows, self._logged = 0.0, 0, False
+
+    def _add(self, seconds, rows=0):
+        if self._sql is None:
+            return  # Fetching past the end of a statement already recorded
+        self._seconds += seconds
+        self._rows += rows
+        if not self._logged and self._seconds * 1000 >= profiler.slow_ms:
+            self._logged = True
+            profiler.slow_query(self.connection, self._sql, self._params, self._seconds)
+
+    def _finish(self):
+        if self._sql is not None:
+            rows = self._rows or max(self.rowcount, 0)
+            profiler.record_query(self._sql, self._seconds, rows)
+            self._sql = None
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        # A slow batch is explained with its first row of parameters
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+        self._start(sql, first)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, rows if first is None else itertools.chain((first,), rows))
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._add(time.perf_counter() - started, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add(time.perf_counter() - started, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._add(time.perf_counter() - started, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(time.perf_counter() - started)
+            self._finish()
+            raise
+        self._add(time.perf_counter() - started, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Connection.execute() cursors are rarely exhausted; record them when they go away
+        self._finish()
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection whose cursors, including those of execute(), are profiled."""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def profiled(cls):
+    """Class decorator wrapping PROFILED_METHODS in timing spans when profiling is on."""
+    if not PROFILE:
+        return cls
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith(PROFILED_METHODS):
+            continue
+        static = isinstance(attr, staticmethod)
+        func = attr.__func__ if static else attr
+        if not callable(func):
+            continue
+
+        def wrap(func, span_name=f"{cls.__name__}.{name}"):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with profiler.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+
+        setattr(cls, name, staticmethod(wrap(func)) if static else wrap(func))
+    return cls
+
+if PROFILE:
+    if not log.handlers:
+        log.addHandler(logging.StreamHandler())
+    atexit.register(profiler.report)
+
+class ConnectionManager:
+    """Hand out one long-lived, tuned connection per thread."""
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",  # WAL stays consistent; only fsyncs at checkpoints
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA cache_size = -65536",  # 64 MiB page cache
+        "PRAGMA mmap_size = 268435456",  # 256 MiB memory-mapped I/O
+        "PRAGMA temp_store = MEMORY",
+    )
+    STATEMENT_CACHE_SIZE = 256
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    def connect(self, path):
+        """Open a new tuned connection to path."""
+        conn = sqlite3.connect(path, cached_statements=self.STATEMENT_CACHE_SIZE,
+                               factory=ProfilingConnection if PROFILE else sqlite3.Connection)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        attach_archive(conn)
+        return conn
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path == DB_PATH:
+            return conn
+        if conn is not None:
+            self.close()
+        conn = self.connect(DB_PATH)
+        self._local.conn = conn
+        self._local.path = DB_PATH
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run the block in a transaction, committing on success."""
+        conn = self.connection()
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            # Depth is counted here as in_transaction stays False until a write
+            if depth == 0 and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+                with conn:
+                    yield conn
+                return
+            savepoint = f"sp_{depth + 1}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            conn.execute(f"RELEASE {savepoint}")
+        finally:
+            self._local.depth = depth
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        with self._lock:
+            self._connections.discard(conn)
+        conn.close()
+        self._local.conn = None
+
+    def close_all(self):
+        """Close every connection handed out; call once at shutdown."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # Owned by another thread that has already exited
+        self._local.conn = None
+
+connections = ConnectionManager()
 
 def get_connection():
-    """Establish a connection to the SQLite database."""
-    conn = sqlite3.connect('dairy_management.db')
-    return conn
+    """Return the calling thread's shared connection to the SQLite database."""
+    return connections.connection()
 
-def init_db():
-    """Initialize the database with required tables."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Create Customers table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS Customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        address TEXT,
-        contact TEXT UNIQUE CHECK (LENGTH(contact) = 10)
-    );
-    ''')
-    
-    # Create Products table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS Products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL UNIQUE,
-        rate REAL NOT NULL CHECK (rate > 0)
-    );
-    ''')
-    
-    # Create DailyEntries table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS DailyEntries (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id INTEGER,
-        entry_date DATE,
-        product_id INTEGER,
-        quantity REAL CHECK (quantity > 0),
-        FOREIGN KEY (customer_id) REFERENCES Customers(id),
-        FOREIGN KEY (product_id) REFERENCES Products(id)
-    );
-    ''')
-    
-    # Create Billing table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS Billing (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id INTEGER,
-        month TEXT CHECK (LENGTH(month) = 7), -- Format: YYYY-MM
-        total REAL CHECK (total >= 0),
-        paid REAL DEFAULT 0 CHECK (paid <= total),
-        FOREIGN KEY (customer_id) REFERENCES Customers(id)
+def transaction():
+    """Context manager yielding the shared connection inside a transaction."""
+    return connections.transaction()
+
+# (version, description, steps); a step is SQL or a callable taking the connection.
+# Released migrations are frozen, so steps spell out their SQL instead of reusing live queries.
+MIGRATIONS = [
+    (1, "Create base tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS Customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            address TEXT,
+            contact TEXT UNIQUE CHECK (LENGTH(contact) = 10)
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            rate REAL NOT NULL CHECK (rate > 0)
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS DailyEntries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            entry_date DATE,
+            product_id INTEGER,
+            quantity REAL CHECK (quantity > 0),
+            FOREIGN KEY (customer_id) REFERENCES Customers(id),
+            FOREIGN KEY (product_id) REFERENCES Products(id)
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Billing (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            month TEXT CHECK (LENGTH(month) = 7), -- Format: YYYY-MM
+            total REAL CHECK (total >= 0),
+            paid REAL DEFAULT 0 CHECK (paid <= total),
+            FOREIGN KEY (customer_id) REFERENCES Customers(id)
+        );
+        ''',
+    ]),
+    (2, "Add covering indexes for billing and report queries", [
+        # Covering index for month billing
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_entries_date_cover
+        ON DailyEntries (entry_date, customer_id, product_id, quantity);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_billing_customer_month
+        ON Billing (customer_id, month);
+        ''',
+    ]),
+    (3, "Add incrementally maintained MonthlyTotals", [
+        '''
+        CREATE TABLE IF NOT EXISTS MonthlyTotals (
+            month TEXT NOT NULL, -- Format: YYYY-MM
+            customer_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity REAL NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, customer_id, product_id)
+        ) WITHOUT ROWID;
+        ''',
+        # Totals use the product's rate; verify_monthly_totals() reports drift after a rate change
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_totals_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+        BEGIN
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            VALUES (substr(NEW.entry_date, 1, 7), NEW.customer_id, NEW.product_id, NEW.quantity,
+                    NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id))
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_totals_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.customer_id IS NOT NULL AND OLD.product_id IS NOT NULL
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE month = substr(OLD.entry_date, 1, 7)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = substr(OLD.entry_date, 1, 7)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_totals_update
+        AFTER UPDATE OF entry_date, customer_id, product_id, quantity ON DailyEntries
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE month = substr(OLD.entry_date, 1, 7)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = substr(OLD.entry_date, 1, 7)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            SELECT substr(NEW.entry_date, 1, 7), NEW.customer_id, NEW.product_id, NEW.quantity,
+                   NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id)
+            WHERE NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+        SELECT substr(e.entry_date, 1, 7), e.customer_id, e.product_id,
+               SUM(e.quantity), SUM(e.quantity * p.rate)
+        FROM DailyEntries e
+        JOIN Products p ON p.id = e.product_id
+        WHERE e.customer_id IS NOT NULL
+        GROUP BY 1, 2, 3;
+        ''',
+    ]),
+    (4, "Allow bulk loads to defer MonthlyTotals maintenance", [
+        # A 'defer_totals' row, only set inside a write transaction, skips the insert trigger
+        '''
+        CREATE TABLE IF NOT EXISTS Maintenance (
+            flag TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+        ''',
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_insert;",
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            VALUES (substr(NEW.entry_date, 1, 7), NEW.customer_id, NEW.product_id, NEW.quantity,
+                    NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id))
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+    ]),
+    (5, "Add indexes for paging through daily entries", [
+        # Both end in the implicit rowid, so they also serve the (entry_date, id) order
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_entries_date
+        ON DailyEntries (entry_date);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_entries_customer_date
+        ON DailyEntries (customer_id, entry_date);
+        ''',
+    ]),
+    (6, "Add trigger-maintained dashboard snapshot tables", [
+        # Per day and product entry counts, quantities and amounts
+        '''
+        CREATE TABLE IF NOT EXISTS DailyProductTotals (
+            entry_date TEXT NOT NULL, -- Format: YYYY-MM-DD
+            product_id INTEGER NOT NULL,
+            entries INTEGER NOT NULL DEFAULT 0,
+            quantity REAL NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (entry_date, product_id)
+        ) WITHOUT ROWID;
+        ''',
+        # Named running counters: 'customers' and 'outstanding'.
+        '''
+        CREATE TABLE IF NOT EXISTS DashboardCounters (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_daily_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.product_id IS NOT NULL AND date(NEW.entry_date) IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            VALUES (date(NEW.entry_date), NEW.product_id, 1, NEW.quantity,
+                    NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id))
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_daily_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.product_id IS NOT NULL AND date(OLD.entry_date) IS NOT NULL
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE entry_date = date(OLD.entry_date) AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = date(OLD.entry_date) AND product_id = OLD.product_id AND entries <= 0;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_daily_update
+        AFTER UPDATE OF entry_date, product_id, quantity ON DailyEntries
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE entry_date = date(OLD.entry_date) AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = date(OLD.entry_date) AND product_id = OLD.product_id AND entries <= 0;
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            SELECT date(NEW.entry_date), NEW.product_id, 1, NEW.quantity,
+                   NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id)
+            WHERE NEW.product_id IS NOT NULL AND date(NEW.entry_date) IS NOT NULL
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_count_insert
+        AFTER INSERT ON Customers
+        BEGIN
+            UPDATE DashboardCounters SET value = value + 1 WHERE name = 'customers';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_count_delete
+        AFTER DELETE ON Customers
+        BEGIN
+            UPDATE DashboardCounters SET value = value - 1 WHERE name = 'customers';
+        END;
+        ''',
+        # Outstanding is SUM(total - paid) over bills with paid < total.
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_outstanding_insert
+        AFTER INSERT ON Billing
+        WHEN NEW.paid < NEW.total
+        BEGIN
+            UPDATE DashboardCounters SET value = value + (NEW.total - NEW.paid)
+            WHERE name = 'outstanding';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_outstanding_update
+        AFTER UPDATE OF total, paid ON Billing
+        BEGIN
+            UPDATE DashboardCounters
+            SET value = value
+                - CASE WHEN OLD.paid < OLD.total THEN OLD.total - OLD.paid ELSE 0 END
+                + CASE WHEN NEW.paid < NEW.total THEN NEW.total - NEW.paid ELSE 0 END
+            WHERE name = 'outstanding';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_outstanding_delete
+        AFTER DELETE ON Billing
+        WHEN OLD.paid < OLD.total
+        BEGIN
+            UPDATE DashboardCounters SET value = value - (OLD.total - OLD.paid)
+            WHERE name = 'outstanding';
+        END;
+        ''',
+        '''
+        INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+        SELECT date(e.entry_date), e.product_id, COUNT(*), SUM(e.quantity), SUM(e.quantity * p.rate)
+        FROM DailyEntries e
+        JOIN Products p ON p.id = e.product_id
+        WHERE date(e.entry_date) IS NOT NULL
+        GROUP BY 1, 2;
+        ''',
+        '''
+        INSERT INTO DashboardCounters (name, value)
+        SELECT 'customers', COUNT(*) FROM Customers
+        UNION ALL
+        SELECT 'outstanding', IFNULL(SUM(total - paid), 0) FROM Billing WHERE paid < total;
+        ''',
+    ]),
+    (7, "Store entry dates as YYYYMMDD integers", [
+        # Drop every trigger that reads entry_date before rewriting it
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_insert;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_delete;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_update;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_insert;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_delete;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_update;",
+        # Original text of dates that could not be parsed
+        '''
+        CREATE TABLE IF NOT EXISTS InvalidEntryDates (
+            entry_id INTEGER PRIMARY KEY,
+            entry_date TEXT
+        );
+        ''',
+        lambda conn: normalize_entry_dates(conn),
+        '''
+        CREATE TRIGGER trg_daily_entries_date_insert
+        BEFORE INSERT ON DailyEntries
+        WHEN typeof(NEW.entry_date) != 'integer' OR NEW.entry_date NOT BETWEEN 10000101 AND 99991231
+        BEGIN
+            SELECT RAISE(ABORT, 'entry_date must be a YYYYMMDD integer');
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_date_update
+        BEFORE UPDATE OF entry_date ON DailyEntries
+        WHEN typeof(NEW.entry_date) != 'integer' OR NEW.entry_date NOT BETWEEN 10000101 AND 99991231
+        BEGIN
+            SELECT RAISE(ABORT, 'entry_date must be a YYYYMMDD integer');
+        END;
+        ''',
+        # MonthlyTotals keeps its YYYY-MM text month, matching Billing.month.
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            VALUES (printf('%04d-%02d', NEW.entry_date / 10000, NEW.entry_date / 100 % 100), NEW.customer_id, NEW.product_id, NEW.quantity,
+                    NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id))
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.customer_id IS NOT NULL AND OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_update
+        AFTER UPDATE OF entry_date, customer_id, product_id, quantity ON DailyEntries
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            SELECT printf('%04d-%02d', NEW.entry_date / 10000, NEW.entry_date / 100 % 100), NEW.customer_id, NEW.product_id, NEW.quantity,
+                   NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id)
+            WHERE NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        # Recreated with an integer day key
+        "DROP TABLE IF EXISTS DailyProductTotals;",
+        '''
+        CREATE TABLE DailyProductTotals (
+            entry_date INTEGER NOT NULL, -- YYYYMMDD
+            product_id INTEGER NOT NULL,
+            entries INTEGER NOT NULL DEFAULT 0,
+            quantity REAL NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (entry_date, product_id)
+        ) WITHOUT ROWID;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.product_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            VALUES (NEW.entry_date, NEW.product_id, 1, NEW.quantity,
+                    NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id))
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id AND entries <= 0;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_update
+        AFTER UPDATE OF entry_date, product_id, quantity ON DailyEntries
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id AND entries <= 0;
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            SELECT NEW.entry_date, NEW.product_id, 1, NEW.quantity,
+                   NEW.quantity * (SELECT rate FROM Products WHERE id = NEW.product_id)
+            WHERE NEW.product_id IS NOT NULL
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+        "DELETE FROM MonthlyTotals;",
+        '''
+        INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+        SELECT printf('%04d-%02d', e.entry_date / 10000, e.entry_date / 100 % 100),
+               e.customer_id, e.product_id, SUM(e.quantity), SUM(e.quantity * p.rate)
+        FROM DailyEntries e
+        JOIN Products p ON p.id = e.product_id
+        WHERE e.customer_id IS NOT NULL AND e.entry_date IS NOT NULL
+        GROUP BY e.entry_date / 100, e.customer_id, e.product_id;
+        ''',
+        '''
+        INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+        SELECT e.entry_date, e.product_id, COUNT(*), SUM(e.quantity), SUM(e.quantity * p.rate)
+        FROM DailyEntries e
+        JOIN Products p ON p.id = e.product_id
+        WHERE e.entry_date IS NOT NULL
+        GROUP BY e.entry_date, e.product_id;
+        ''',
+    ]),
+    (8, "Track months needing billing and make bills unique per customer-month", [
+        # Merge duplicate bills into the oldest, keeping every payment
+        '''
+        UPDATE Billing
+        SET total = (SELECT MAX(d.total) FROM Billing d
+                     WHERE d.customer_id = Billing.customer_id AND d.month = Billing.month),
+            paid = MIN((SELECT MAX(d.total) FROM Billing d
+                        WHERE d.customer_id = Billing.customer_id AND d.month = Billing.month),
+                       (SELECT IFNULL(SUM(d.paid), 0) FROM Billing d
+                        WHERE d.customer_id = Billing.customer_id AND d.month = Billing.month))
+        WHERE id IN (SELECT MIN(id) FROM Billing
+                     WHERE customer_id IS NOT NULL AND month IS NOT NULL
+                     GROUP BY customer_id, month HAVING COUNT(*) > 1);
+        ''',
+        '''
+        DELETE FROM Billing
+        WHERE customer_id IS NOT NULL AND month IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM Billing GROUP BY customer_id, month);
+        ''',
+        "DROP INDEX IF EXISTS idx_billing_customer_month;",
+        '''
+        CREATE UNIQUE INDEX idx_billing_customer_month
+        ON Billing (customer_id, month);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_billing_month
+        ON Billing (month);
+        ''',
+        # (month, customer) pairs whose MonthlyTotals changed since their last billing run
+        '''
+        CREATE TABLE IF NOT EXISTS BillingDirty (
+            month TEXT NOT NULL, -- Format: YYYY-MM
+            customer_id INTEGER NOT NULL,
+            PRIMARY KEY (month, customer_id)
+        ) WITHOUT ROWID;
+        ''',
+        # DO NOTHING rather than OR IGNORE, which the firing upsert's DO UPDATE would override
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_monthly_totals_dirty_insert
+        AFTER INSERT ON MonthlyTotals
+        BEGIN
+            INSERT INTO BillingDirty (month, customer_id) VALUES (NEW.month, NEW.customer_id)
+            ON CONFLICT DO NOTHING;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_monthly_totals_dirty_update
+        AFTER UPDATE ON MonthlyTotals
+        BEGIN
+            INSERT INTO BillingDirty (month, customer_id) VALUES (NEW.month, NEW.customer_id)
+            ON CONFLICT DO NOTHING;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_monthly_totals_dirty_delete
+        AFTER DELETE ON MonthlyTotals
+        BEGIN
+            INSERT INTO BillingDirty (month, customer_id) VALUES (OLD.month, OLD.customer_id)
+            ON CONFLICT DO NOTHING;
+        END;
+        ''',
+        # Everything billed so far is recomputed by the first run
+        '''
+        INSERT OR IGNORE INTO BillingDirty (month, customer_id)
+        SELECT DISTINCT month, customer_id FROM MonthlyTotals;
+        ''',
+    ]),
+    (9, "Add a full-text index for customer search", [
+        lambda conn: create_customer_search(conn),
+    ]),
+    (10, "Allow closed months to be archived out of DailyEntries", [
+        # One row per archived month; see archive.py
+        '''
+        CREATE TABLE IF NOT EXISTS ArchivedMonths (
+            month TEXT PRIMARY KEY, -- Format: YYYY-MM
+            end_day INTEGER NOT NULL, -- First day after the month, YYYYMMDD
+            entries INTEGER NOT NULL,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID;
+        ''',
+        # Archived entries stay counted in the totals tables
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_delete;",
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.customer_id IS NOT NULL AND OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'archiving')
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+        END;
+        ''',
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_delete;",
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'archiving')
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity,
+                amount = amount - OLD.quantity * (SELECT rate FROM Products WHERE id = OLD.product_id)
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id AND entries <= 0;
+        END;
+        ''',
+        # Archived months are closed: the live table only holds later days
+        '''
+        CREATE TRIGGER trg_daily_entries_archived_insert
+        BEFORE INSERT ON DailyEntries
+        WHEN NEW.entry_date < (SELECT MAX(end_day) FROM ArchivedMonths)
+        BEGIN
+            SELECT RAISE(ABORT, 'entry_date is in an archived month');
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_archived_update
+        BEFORE UPDATE OF entry_date ON DailyEntries
+        WHEN NEW.entry_date < (SELECT MAX(end_day) FROM ArchivedMonths)
+        BEGIN
+            SELECT RAISE(ABORT, 'entry_date is in an archived month');
+        END;
+        ''',
+    ]),
+    (11, "Price entries from effective-dated ProductRates when written", [
+        # A product's rate from effective_from until the next row's date
+        '''
+        CREATE TABLE IF NOT EXISTS ProductRates (
+            product_id INTEGER NOT NULL REFERENCES Products(id),
+            effective_from INTEGER NOT NULL, -- YYYYMMDD
+            rate REAL NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (product_id, effective_from)
+        ) WITHOUT ROWID;
+        ''',
+        '''
+        INSERT OR IGNORE INTO ProductRates (product_id, effective_from, rate)
+        SELECT id, 10000101, rate FROM Products;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_products_rate_insert
+        AFTER INSERT ON Products
+        BEGIN
+            INSERT OR IGNORE INTO ProductRates (product_id, effective_from, rate)
+            VALUES (NEW.id, 10000101, NEW.rate);
+        END;
+        ''',
+        # The rate applied to each entry and its amount, fixed when written
+        "ALTER TABLE DailyEntries ADD COLUMN rate REAL;",
+        "ALTER TABLE DailyEntries ADD COLUMN amount REAL;",
+        # Existing entries get the current rate, the one the totals were computed at
+        lambda conn: backfill_entry_rates(conn),
+        # Billing and reports read SUM(amount) straight from the date index
+        "DROP INDEX IF EXISTS idx_daily_entries_date_cover;",
+        '''
+        CREATE INDEX idx_daily_entries_date_cover
+        ON DailyEntries (entry_date, customer_id, product_id, quantity, amount);
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_rate_insert
+        BEFORE INSERT ON DailyEntries
+        WHEN NEW.product_id IS NOT NULL AND NEW.amount IS NULL
+        BEGIN
+            SELECT RAISE(ABORT, 'entry rate and amount must be set; see database.ENTRY_INSERT_SQL');
+        END;
+        ''',
+        # The totals now add and subtract each entry's own amount
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_insert;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_delete;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_totals_update;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_insert;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_delete;",
+        "DROP TRIGGER IF EXISTS trg_daily_entries_daily_update;",
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            VALUES (printf('%04d-%02d', NEW.entry_date / 10000, NEW.entry_date / 100 % 100),
+                    NEW.customer_id, NEW.product_id, NEW.quantity, NEW.amount)
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.customer_id IS NOT NULL AND OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'archiving')
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity, amount = amount - OLD.amount
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_totals_update
+        AFTER UPDATE OF entry_date, customer_id, product_id, quantity, amount ON DailyEntries
+        BEGIN
+            UPDATE MonthlyTotals
+            SET quantity = quantity - OLD.quantity, amount = amount - OLD.amount
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id;
+            DELETE FROM MonthlyTotals
+            WHERE month = printf('%04d-%02d', OLD.entry_date / 10000, OLD.entry_date / 100 % 100)
+              AND customer_id = OLD.customer_id AND product_id = OLD.product_id
+              AND quantity < 1e-9;
+            INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+            SELECT printf('%04d-%02d', NEW.entry_date / 10000, NEW.entry_date / 100 % 100),
+                   NEW.customer_id, NEW.product_id, NEW.quantity, NEW.amount
+            WHERE NEW.customer_id IS NOT NULL AND NEW.product_id IS NOT NULL
+            ON CONFLICT (month, customer_id, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NEW.product_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            VALUES (NEW.entry_date, NEW.product_id, 1, NEW.quantity, NEW.amount)
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_delete
+        AFTER DELETE ON DailyEntries
+        WHEN OLD.product_id IS NOT NULL AND OLD.entry_date IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'archiving')
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity, amount = amount - OLD.amount
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id AND entries <= 0;
+        END;
+        ''',
+        '''
+        CREATE TRIGGER trg_daily_entries_daily_update
+        AFTER UPDATE OF entry_date, product_id, quantity, amount ON DailyEntries
+        BEGIN
+            UPDATE DailyProductTotals
+            SET entries = entries - 1, quantity = quantity - OLD.quantity, amount = amount - OLD.amount
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id;
+            DELETE FROM DailyProductTotals
+            WHERE entry_date = OLD.entry_date AND product_id = OLD.product_id AND entries <= 0;
+            INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+            SELECT NEW.entry_date, NEW.product_id, 1, NEW.quantity, NEW.amount
+            WHERE NEW.product_id IS NOT NULL
+            ON CONFLICT (entry_date, product_id) DO UPDATE
+            SET entries = entries + 1, quantity = quantity + excluded.quantity,
+                amount = amount + excluded.amount;
+        END;
+        ''',
+    ]),
+    (12, "Add standing orders", [
+        # weekdays is a bitmask (bit 0 = Monday); last_day is NULL until ended
+        '''
+        CREATE TABLE IF NOT EXISTS StandingOrders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL REFERENCES Customers(id) ON DELETE CASCADE,
+            product_id INTEGER NOT NULL REFERENCES Products(id),
+            quantity REAL NOT NULL CHECK (quantity > 0),
+            weekdays INTEGER NOT NULL DEFAULT 127 CHECK (weekdays BETWEEN 1 AND 127),
+            first_day INTEGER NOT NULL,
+            last_day INTEGER CHECK (last_day >= first_day)
+        );
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_standing_orders_customer
+        ON StandingOrders (customer_id);
+        ''',
+        # Days an order is suspended, e.g. while the customer is away
+        '''
+        CREATE TABLE IF NOT EXISTS StandingOrderPauses (
+            order_id INTEGER NOT NULL REFERENCES StandingOrders(id) ON DELETE CASCADE,
+            first_day INTEGER NOT NULL,
+            last_day INTEGER NOT NULL CHECK (last_day >= first_day),
+            PRIMARY KEY (order_id, first_day)
+        ) WITHOUT ROWID;
+        ''',
+        # Days each order has been generated for, so generation can be re-run
+        '''
+        CREATE TABLE IF NOT EXISTS StandingOrderDays (
+            entry_date INTEGER NOT NULL,
+            order_id INTEGER NOT NULL,
+            PRIMARY KEY (entry_date, order_id)
+        ) WITHOUT ROWID;
+        ''',
+    ]),
+    (13, "Track a data version per table for screen refreshes", [
+        # One row per table whose version screens compare, see data_versions()
+        '''
+        CREATE TABLE IF NOT EXISTS DataVersions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        ''',
+        '''
+        INSERT OR IGNORE INTO DataVersions (name)
+        VALUES ('Customers'), ('Products'), ('DailyEntries'), ('Billing');
+        ''',
+        # Maintenance flags skip these triggers; bump_data_version() counts such writes once
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_version_insert
+        AFTER INSERT ON Customers
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Customers';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_version_update
+        AFTER UPDATE ON Customers
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Customers';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_version_delete
+        AFTER DELETE ON Customers
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Customers';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_products_version_insert
+        AFTER INSERT ON Products
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Products';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_products_version_update
+        AFTER UPDATE ON Products
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Products';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_products_version_delete
+        AFTER DELETE ON Products
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Products';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_version_insert
+        AFTER INSERT ON DailyEntries
+        WHEN NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'defer_totals')
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'DailyEntries';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_version_update
+        AFTER UPDATE ON DailyEntries
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'DailyEntries';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_entries_version_delete
+        AFTER DELETE ON DailyEntries
+        WHEN NOT EXISTS (SELECT 1 FROM Maintenance WHERE flag = 'archiving')
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'DailyEntries';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_version_insert
+        AFTER INSERT ON Billing
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Billing';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_version_update
+        AFTER UPDATE ON Billing
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Billing';
+        END;
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_billing_version_delete
+        AFTER DELETE ON Billing
+        BEGIN
+            UPDATE DataVersions SET version = version + 1 WHERE name = 'Billing';
+        END;
+        ''',
+    ]),
+]
+
+# The rate of product {product} effective on day {day}
+ENTRY_RATE_SQL = '''(
+    SELECT r.rate FROM ProductRates r
+    WHERE r.product_id = {product} AND r.effective_from <= {day}
+    ORDER BY r.effective_from DESC LIMIT 1
+)'''
+
+# Inserts one daily entry priced at the rate effective on its day
+ENTRY_INSERT_SQL = '''
+    INSERT INTO DailyEntries (entry_date, customer_id, product_id, quantity, rate, amount)
+    SELECT entry_date, customer_id, product_id, quantity, rate, quantity * rate
+    FROM (SELECT e.*, ''' + ENTRY_RATE_SQL.format(product="e.product_id", day="e.entry_date") + ''' AS rate
+          FROM (SELECT ? AS entry_date, ? AS customer_id, ? AS product_id, ? AS quantity) e)
+'''
+
+# Recomputes MonthlyTotals from the daily entries, live and archived
+MONTHLY_TOTALS_SQL = '''
+    SELECT printf('%04d-%02d', e.entry_date / 10000, e.entry_date / 100 % 100) AS month,
+           e.customer_id, e.product_id,
+           SUM(e.quantity) AS quantity, SUM({amount}) AS amount
+    FROM {entries} e
+    WHERE e.customer_id IS NOT NULL AND e.product_id IS NOT NULL AND e.entry_date IS NOT NULL
+    GROUP BY e.entry_date / 100, e.customer_id, e.product_id
+'''
+
+# Recomputes DailyProductTotals from the daily entries, live and archived.
+DAILY_PRODUCT_TOTALS_SQL = '''
+    SELECT e.entry_date, e.product_id, COUNT(*) AS entries,
+           SUM(e.quantity) AS quantity, SUM({amount}) AS amount
+    FROM {entries} e
+    WHERE e.product_id IS NOT NULL AND e.entry_date IS NOT NULL
+    GROUP BY e.entry_date, e.product_id
+'''
+
+# Hot queries with representative parameters, for check_query_plans()
+HOT_QUERIES = [
+    ("month billing", '''
+        SELECT c.name AS customer, SUM(t.amount) AS total
+        FROM MonthlyTotals t
+        LEFT JOIN Customers c ON c.id = t.customer_id
+        WHERE t.month = ?
+        GROUP BY t.customer_id
+    ''', ("2025-01",)),
+    ("today's entries", '''
+        SELECT SUM(entries), SUM(quantity) FROM DailyProductTotals WHERE entry_date = ?
+    ''', (20250115,)),
+    ("month revenue to date", '''
+        SELECT SUM(amount) FROM DailyProductTotals WHERE entry_date >= ? AND entry_date <= ?
+    ''', (20250101, 20250115)),
+    ("entries page", '''
+        SELECT e.id, e.entry_date, c.name AS customer, p.name AS product, e.quantity
+        FROM DailyEntries e
+        LEFT JOIN Customers c ON c.id = e.customer_id
+        LEFT JOIN Products p ON p.id = e.product_id
+        WHERE (e.entry_date, e.id) < (?, ?)
+        ORDER BY e.entry_date DESC, e.id DESC LIMIT 200
+    ''', (20250115, 1000)),
+    ("month bills", '''
+        SELECT c.name, b.total, b.paid
+        FROM Billing b
+        LEFT JOIN Customers c ON c.id = b.customer_id
+        WHERE b.month = ?
+    ''', ("2025-01",)),
+    ("dirty billing pairs", '''
+        SELECT customer_id FROM BillingDirty WHERE month = ?
+    ''', ("2025-01",)),
+    ("customer bill", '''
+        SELECT total, paid FROM Billing WHERE customer_id = ? AND month = ?
+    ''', (1, "2025-01")),
+    ("entry rate", "SELECT " + ENTRY_RATE_SQL.format(product="?", day="?"), (1, 20250115)),
+]
+
+def schema_version(conn):
+    """Return the schema version recorded in the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations in order, each in its own transaction."""
+    current = schema_version(conn)
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # Manage transactions explicitly
+    try:
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {version:d}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            current = version
+    finally:
+        conn.isolation_level = isolation_level
+    return current
+
+def check_query_plans(conn):
+    """Return (name, uses_index, plan_lines) for each hot query."""
+    report = []
+    for name, sql, params in HOT_QUERIES:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        full_scan = any(
+            line.startswith("SCAN ") and line != "SCAN CONSTANT ROW" for line in plan
+        )
+        report.append((name, not full_scan, plan))
+    return report
+
+def normalize_entry_dates(conn):
+    """Convert text entry dates to YYYYMMDD integers; return the number left invalid."""
+    from dates import to_day
+
+    values = [row[0] for row in conn.execute(
+        "SELECT DISTINCT entry_date FROM DailyEntries WHERE typeof(entry_date) != 'integer'"
+    )]
+    converted, invalid = [], []
+    for value in values:
+        try:
+            converted.append((to_day(value), value))
+        except ValueError:
+            invalid.append((value,))
+    conn.executemany("UPDATE DailyEntries SET entry_date = ? WHERE entry_date = ?", converted)
+    conn.executemany(
+        "INSERT OR REPLACE INTO InvalidEntryDates (entry_id, entry_date) "
+        "SELECT id, entry_date FROM DailyEntries WHERE entry_date IS ?", invalid
+    )
+    conn.executemany("UPDATE DailyEntries SET entry_date = NULL WHERE entry_date IS ?", invalid)
+    return conn.execute("SELECT COUNT(*) FROM InvalidEntryDates").fetchone()[0]
+
+# Trigram index over customer name, address and contact
+CUSTOMER_SEARCH_DDL = [
+    '''
+    CREATE VIRTUAL TABLE CustomerSearch USING fts5(
+        name, address, contact,
+        content='Customers', content_rowid='id', tokenize='trigram'
     );
+    ''',
+    '''
+    CREATE TRIGGER trg_customers_search_insert
+    AFTER INSERT ON Customers
+    BEGIN
+        INSERT INTO CustomerSearch (rowid, name, address, contact)
+        VALUES (NEW.id, NEW.name, NEW.address, NEW.contact);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER trg_customers_search_delete
+    AFTER DELETE ON Customers
+    BEGIN
+        INSERT INTO CustomerSearch (CustomerSearch, rowid, name, address, contact)
+        VALUES ('delete', OLD.id, OLD.name, OLD.address, OLD.contact);
+    END;
+    ''',
+    '''
+    CREATE TRIGGER trg_customers_search_update
+    AFTER UPDATE OF id, name, address, contact ON Customers
+    BEGIN
+        INSERT INTO CustomerSearch (CustomerSearch, rowid, name, address, contact)
+        VALUES ('delete', OLD.id, OLD.name, OLD.address, OLD.contact);
+        INSERT INTO CustomerSearch (rowid, name, address, contact)
+        VALUES (NEW.id, NEW.name, NEW.address, NEW.contact);
+    END;
+    ''',
+    "INSERT INTO CustomerSearch (CustomerSearch) VALUES ('rebuild');",
+]
+
+def create_customer_search(conn):
+    """Create and fill the CustomerSearch index if SQLite supports it."""
+    conn.execute("SAVEPOINT customer_search")
+    try:
+        for sql in CUSTOMER_SEARCH_DDL:
+            conn.execute(sql)
+    except sqlite3.OperationalError as e:
+        conn.execute("ROLLBACK TO customer_search")
+        conn.execute("RELEASE customer_search")
+        logging.getLogger("dairy").warning("customer search index not created: %s", e)
+        return False
+    conn.execute("RELEASE customer_search")
+    return True
+
+def bump_data_version(conn, *tables):
+    """Count one change to tables written with their version triggers skipped."""
+    conn.executemany("UPDATE DataVersions SET version = version + 1 WHERE name = ?",
+                     [(table,) for table in tables])
+
+def data_versions(conn):
+    """Return {table: version}; a version grows whenever its table changes."""
+    return dict(conn.execute("SELECT name, version FROM DataVersions"))
+
+def backfill_entry_rates(conn):
+    """Price the entries written before ProductRates, live and archived."""
+    tables = ["main.DailyEntries"]
+    if any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list")):
+        names = [row[0] for row in conn.execute(
+            f"SELECT name FROM {ARCHIVE_SCHEMA}.sqlite_master "
+            "WHERE type = 'table' AND name LIKE 'DailyEntries_%'"
+        )]
+        for name in names:
+            columns = {row[1] for row in conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({name})")}
+            for column in ("rate", "amount"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} ADD COLUMN {column} REAL")
+            tables.append(f"{ARCHIVE_SCHEMA}.{name}")
+    rate = '''(
+        SELECT r.rate FROM ProductRates r
+        WHERE r.product_id = e.product_id AND r.effective_from <= IFNULL(e.entry_date, 99991231)
+        ORDER BY r.effective_from DESC LIMIT 1
+    )'''
+    for table in tables:
+        conn.execute(f"UPDATE {table} AS e SET rate = {rate} WHERE e.product_id IS NOT NULL AND e.amount IS NULL")
+        conn.execute(f"UPDATE {table} SET amount = quantity * rate WHERE amount IS NULL AND rate IS NOT NULL")
+
+def entry_amount(conn):
+    """Return the SQL for the amount of entry e in this database."""
+    columns = {row[1] for row in conn.execute("PRAGMA main.table_info(DailyEntries)")}
+    if "amount" in columns:
+        return "e.amount"
+    return "e.quantity * (SELECT rate FROM Products WHERE id = e.product_id)"
+
+def rebuild_monthly_totals(conn):
+    """Recompute MonthlyTotals from scratch out of DailyEntries."""
+    conn.execute("DELETE FROM MonthlyTotals")
+    conn.execute(
+        "INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount) "
+        + MONTHLY_TOTALS_SQL.format(entries=entries_source(conn), amount=entry_amount(conn))
+    )
+
+def rebuild_dashboard_snapshot(conn):
+    """Recompute DailyProductTotals and DashboardCounters from their sources."""
+    conn.execute("DELETE FROM DailyProductTotals")
+    conn.execute(
+        "INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount) "
+        + DAILY_PRODUCT_TOTALS_SQL.format(entries=entries_source(conn), amount=entry_amount(conn))
+    )
+    conn.execute("DELETE FROM DashboardCounters")
+    conn.execute('''
+        INSERT INTO DashboardCounters (name, value)
+        SELECT 'customers', COUNT(*) FROM Customers
+        UNION ALL
+        SELECT 'outstanding', IFNULL(SUM(total - paid), 0) FROM Billing WHERE paid < total
     ''')
-    
-    conn.commit()
-    conn.close()
+
+@contextmanager
+def deferred_totals(conn):
+    """Fold rows appended in the block into the totals tables once; use inside a transaction."""
+    # Taking the write lock first keeps other writers out until the fold
+    conn.execute("INSERT OR IGNORE INTO Maintenance (flag) VALUES ('defer_totals')")
+    try:
+        first_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM DailyEntries").fetchone()[0]
+        yield conn
+    finally:
+        conn.execute("DELETE FROM Maintenance WHERE flag = 'defer_totals'")
+    conn.execute('''
+        INSERT INTO MonthlyTotals (month, customer_id, product_id, quantity, amount)
+        SELECT printf('%04d-%02d', e.entry_date / 10000, e.entry_date / 100 % 100),
+               e.customer_id, e.product_id, SUM(e.quantity), SUM(e.amount)
+        FROM DailyEntries e
+        WHERE e.id > ? AND e.customer_id IS NOT NULL AND e.product_id IS NOT NULL
+        GROUP BY e.entry_date / 100, e.customer_id, e.product_id
+        ON CONFLICT (month, customer_id, product_id) DO UPDATE
+        SET quantity = quantity + excluded.quantity, amount = amount + excluded.amount
+    ''', (first_id,))
+    conn.execute('''
+        INSERT INTO DailyProductTotals (entry_date, product_id, entries, quantity, amount)
+        SELECT e.entry_date, e.product_id, COUNT(*), SUM(e.quantity), SUM(e.amount)
+        FROM DailyEntries e
+        WHERE e.id > ? AND e.product_id IS NOT NULL
+        GROUP BY e.entry_date, e.product_id
+        ON CONFLICT (entry_date, product_id) DO UPDATE
+        SET entries = entries + excluded.entries, quantity = quantity + excluded.quantity,
+            amount = amount + excluded.amount
+    ''', (first_id,))
+    bump_data_version(conn, "DailyEntries")
+
+ARCHIVE_SCHEMA = "archive"
+ENTRY_FIELDS = "id, customer_id, entry_date, product_id, quantity, rate, amount"
+
+def archive_path(conn):
+    """Return the archive file kept next to conn's database, or None in memory."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main" and path:
+            root, ext = os.path.splitext(path)
+            return f"{root}_archive{ext or '.db'}"
+    return None
+
+def attach_archive(conn, create=False):
+    """Attach the archive database, creating it if create; not inside a transaction."""
+    if any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list")):
+        return True
+    path = archive_path(conn)
+    if path is None or not (create or os.path.exists(path)):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    return True
+
+def hot_start(conn):
+    """Return the first day kept in DailyEntries, or None if nothing is archived."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ArchivedMonths'").fetchone() is None:
+        return None  # Before migration 10
+    return conn.execute("SELECT MAX(end_day) FROM ArchivedMonths").fetchone()[0]
+
+def entry_tables(conn, start=None, end=None, descending=False):
+    """Return the tables holding the daily entries in [start, end), oldest first."""
+    boundary = hot_start(conn)
+    tables = []
+    if boundary is not None and (start is None or start < boundary):
+        for (year,) in conn.execute(
+            "SELECT DISTINCT CAST(substr(month, 1, 4) AS INTEGER) FROM ArchivedMonths "
+            "WHERE entries > 0 ORDER BY 1"
+        ):
+            if (start is None or start < (year + 1) * 10000) and (end is None or end > year * 10000 + 101):
+                tables.append(f"{ARCHIVE_SCHEMA}.DailyEntries_{year}")
+    if tables:
+        attach_archive(conn)  # Connections opened before the first archive run
+    if boundary is None or end is None or end > boundary:
+        tables.append("DailyEntries")
+    return tables[::-1] if descending else tables
+
+def entries_source(conn, start=None, end=None):
+    """Return a FROM source for the daily entries in [start, end)."""
+    tables = entry_tables(conn, start, end)
+    if len(tables) == 1:
+        return tables[0]
+    return "(" + " UNION ALL ".join(f"SELECT {ENTRY_FIELDS} FROM {table}" for table in tables) + ")"
+
+def verify_monthly_totals(conn, tolerance=1e-6):
+    """Diff the maintained MonthlyTotals against a fresh recomputation."""
+    expected = {row[:3]: row[3:] for row in conn.execute(
+        MONTHLY_TOTALS_SQL.format(entries=entries_source(conn), amount=entry_amount(conn))
+    )}
+    maintained = {
+        row[:3]: row[3:] for row in conn.execute(
+            "SELECT month, customer_id, product_id, quantity, amount FROM MonthlyTotals"
+        )
+    }
+    mismatches = []
+    for key in sorted(expected.keys() | maintained.keys()):
+        have, want = maintained.get(key), expected.get(key)
+        if have is not None and want is not None and all(
+            abs(a - b) <= tolerance for a, b in zip(have, want)
+        ):
+            continue
+        mismatches.append((*key, have, want))
+    return mismatches
+
+def init_db():
+    """Initialize the database by applying all pending migrations."""
+    migrate(get_connection())
+
+def main(argv=None):
+    """Initialize the database and run the requested maintenance commands."""
+    parser = argparse.ArgumentParser(description="Initialize and maintain the dairy database.")
+    parser.add_argument("--check-indexes", action="store_true",
+                        help="report whether the hot queries are served by an index")
+    parser.add_argument("--verify-totals", action="store_true",
+                        help="diff MonthlyTotals against a fresh recomputation")
+    parser.add_argument("--rebuild-totals", action="store_true",
+                        help="recompute MonthlyTotals and the dashboard snapshot")
+    args = parser.parse_args(argv)
+
+    init_db()
+    conn = get_connection()
+    if args.check_indexes:
+        for name, uses_index, plan in check_query_plans(conn):
+            print(f"{name}: {'index' if uses_index else 'FULL SCAN'}")
+            for line in plan:
+                print(f"    {line}")
+    if args.verify_totals:
+        mismatches = verify_monthly_totals(conn)
+        for month, customer_id, product_id, have, want in mismatches:
+            print(f"{month} customer {customer_id} product {product_id}: "
+                  f"maintained {have}, expected {want}")
+        print(f"MonthlyTotals: {len(mismatches)} mismatched row(s)")
+        if mismatches and not args.rebuild_totals:
+            return 1
+    if args.rebuild_totals:
+        with transaction():
+            rebuild_monthly_totals(conn)
+            rebuild_dashboard_snapshot(conn)
+        print("MonthlyTotals and dashboard snapshot rebuilt")
+    return 0
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    sys.exit(main())
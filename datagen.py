@@ -0,0 +1,103 @@
+"""Generate a reproducible synthetic dairy database for benchmarks."""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+import database
+from dates import to_day
+from services import DEFAULT_PRODUCTS
+
+QUANTITIES = (0.5, 1.0, 1.5, 2.0)
+
+def generate_dataset(path, customers=200, years=5, end=date(2025, 1, 1), seed=42, days=None,
+                     billing=True):
+    """Create a database at path with one delivery per customer per day."""
+    database.DB_PATH = path
+    database.init_db()
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany("INSERT INTO Products (name, rate) VALUES (?, ?)", DEFAULT_PRODUCTS)
+    conn.executemany(
+        "INSERT INTO Customers (name, address, contact) VALUES (?, ?, ?)",
+        ((f"Customer {i}", f"House {i}", f"9{i:09d}") for i in range(1, customers + 1))
+    )
+    if days is None:
+        days = 365 * years
+    start = end - timedelta(days=days)
+
+    def rows():
+        for offset in range(days):
+            day = to_day(start + timedelta(days=offset))
+            for customer_id in range(1, customers + 1):
+                product_id = rng.randint(1, len(DEFAULT_PRODUCTS))
+                yield day, customer_id, product_id, rng.choice(QUANTITIES)
+
+    # Skip the per-row totals triggers and rebuild the totals once instead
+    conn.execute("INSERT OR IGNORE INTO Maintenance (flag) VALUES ('defer_totals')")
+    conn.executemany(database.ENTRY_INSERT_SQL, rows())
+    conn.execute("DELETE FROM Maintenance WHERE flag = 'defer_totals'")
+    database.rebuild_monthly_totals(conn)
+    if billing:
+        generate_billing(conn, rng, end.strftime("%Y-%m"))
+    database.rebuild_dashboard_snapshot(conn)
+    conn.commit()
+    conn.close()
+    return customers * days
+
+def generate_billing(conn, rng, before_month):
+    """Bill every customer for each complete month before before_month."""
+    bills = conn.execute('''
+        SELECT month, customer_id, ROUND(SUM(amount), 2)
+        FROM MonthlyTotals
+        WHERE month < ?
+        GROUP BY month, customer_id
+        ORDER BY month, customer_id
+    ''', (before_month,)).fetchall()
+    latest = bills[-1][0] if bills else None
+
+    def rows():
+        for month, customer_id, total in bills:
+            roll = rng.random()
+            if month == latest:
+                paid = total if roll < 0.5 else 0.0
+            elif roll < 0.9:
+                paid = total
+            elif roll < 0.97:
+                paid = round(total * rng.random(), 2)
+            else:
+                paid = 0.0
+            yield customer_id, month, total, paid
+
+    conn.executemany("INSERT INTO Billing (customer_id, month, total, paid) VALUES (?, ?, ?, ?)", rows())
+    conn.execute("DELETE FROM BillingDirty WHERE month < ?", (before_month,))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="database file to create; must not exist")
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--days", type=int, help="history length in days instead of years")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 1, 1),
+                        help="first day after the history (default: 2025-01-01)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-billing", dest="billing", action="store_false",
+                        help="leave the Billing table empty")
+    args = parser.parse_args(argv)
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+
+    started = time.perf_counter()
+    rows = generate_dataset(args.path, args.customers, args.years, args.end, args.seed, args.days,
+                            args.billing)
+    database.connections.close_all()
+    print(f"{rows:,} daily entries for {args.customers:,} customers written to {args.path} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Conversion between dates and the YYYYMMDD integers stored in the database."""
+from datetime import date, datetime
+
+def to_day(value, locale=None):
+    """Return a date, datetime, YYYYMMDD int or date text as a YYYYMMDD int."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, int) and not isinstance(value, bool):
+        from_day(value)  # Validates
+        return value
+    if isinstance(value, str):
+        return to_day(parse_date_text(value, locale))
+    raise ValueError(f"Invalid date {value!r}")
+
+def from_day(day):
+    """Return the date for a YYYYMMDD int."""
+    try:
+        return date(day // 10000, day // 100 % 100, day % 100)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid day number {day!r}, expected YYYYMMDD") from None
+
+def day_iso(day):
+    """Format a YYYYMMDD int as YYYY-MM-DD; None gives an empty string."""
+    if day is None:
+        return ""
+    return f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}"
+
+def parse_date_text(text, locale=None):
+    """Parse date text in any of the forms accepted by to_day()."""
+    text = text.strip()
+    if len(text) == 8 and text.isdigit():
+        return from_day(int(text))
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    try:
+        from babel.dates import default_locale, parse_date  # Installed with tkcalendar
+    except ImportError:
+        raise ValueError(f"Invalid date '{text}', expected YYYY-MM-DD") from None
+    try:
+        return parse_date(text, locale=locale or default_locale("LC_TIME") or "en_US")
+    except Exception:
+        raise ValueError(f"Invalid date '{text}', expected YYYY-MM-DD") from None
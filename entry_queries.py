@@ -0,0 +1,76 @@
+from database import entry_tables
+from dates import to_day
+
+PAGE_SIZE = 200
+
+# Daily entries with customer and product names, newest first, keyset paged by (entry_date, id)
+ENTRY_SELECT_SQL = '''
+    SELECT e.id, e.entry_date, c.name AS customer, p.name AS product, e.quantity
+    FROM {entries} e
+    LEFT JOIN Customers c ON c.id = e.customer_id
+    LEFT JOIN Products p ON p.id = e.product_id
+'''
+
+class EntryFilter:
+    """Optional date range, customer and product restrictions for entries."""
+
+    def __init__(self, start=None, end=None, customer_id=None, product_id=None):
+        # Dates may be given in any form dates.to_day() accepts
+        self.start = None if start is None else to_day(start)  # inclusive
+        self.end = None if end is None else to_day(end)  # exclusive
+        self.customer_id = customer_id
+        self.product_id = product_id
+
+    def where(self):
+        """Return the SQL conditions and parameters for this filter."""
+        conditions, params = [], []
+        if self.start is not None:
+            conditions.append("e.entry_date >= ?")
+            params.append(self.start)
+        if self.end is not None:
+            conditions.append("e.entry_date < ?")
+            params.append(self.end)
+        if self.customer_id is not None:
+            conditions.append("e.customer_id = ?")
+            params.append(self.customer_id)
+        if self.product_id is not None:
+            conditions.append("e.product_id = ?")
+            params.append(self.product_id)
+        return conditions, params
+
+    def matches(self, entry_date, customer_id, product_id):
+        """Tell whether an entry with these values passes the filter."""
+        entry_date = to_day(entry_date)
+        return ((self.start is None or entry_date >= self.start)
+                and (self.end is None or entry_date < self.end)
+                and (self.customer_id is None or customer_id == self.customer_id)
+                and (self.product_id is None or product_id == self.product_id))
+
+def fetch_entries_page(conn, entry_filter=None, after=None, before=None, limit=PAGE_SIZE):
+    """Fetch one page of (id, entry_date, customer, product, quantity) rows, newest first."""
+    entry_filter = entry_filter or EntryFilter()
+    conditions, params = entry_filter.where()
+    if after is not None:
+        conditions.append("(e.entry_date, e.id) < (?, ?)")
+        params.extend(after)
+    if before is not None:
+        conditions.append("(e.entry_date, e.id) > (?, ?)")
+        params.extend(before)
+    sql = ENTRY_SELECT_SQL
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    direction = "ASC" if before is not None else "DESC"
+    sql += f" ORDER BY e.entry_date {direction}, e.id {direction} LIMIT ?"
+    rows = []
+    for table in entry_tables(conn, entry_filter.start, entry_filter.end, descending=before is None):
+        rows += conn.execute(sql.format(entries=table), (*params, limit - len(rows))).fetchall()
+        if len(rows) >= limit:
+            break
+    if before is not None:
+        rows.reverse()
+    return rows
+
+def fetch_entry(conn, entry_id):
+    """Fetch a single entry row in the same shape as fetch_entries_page."""
+    return conn.execute(ENTRY_SELECT_SQL.format(entries="DailyEntries") + " WHERE e.id = ?",
+                        (entry_id,)).fetchone()
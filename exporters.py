@@ -0,0 +1,128 @@
+import csv
+
+from database import entry_tables, get_connection
+from entry_queries import EntryFilter
+
+CHUNK_SIZE = 5000
+ENTRY_COLUMNS = ["Date", "Customer", "Product", "Quantity"]
+
+# Daily entries in date order for reports
+ENTRY_REPORT_SQL = '''
+    SELECT CASE WHEN e.entry_date IS NOT NULL
+                THEN printf('%04d-%02d-%02d', e.entry_date / 10000, e.entry_date / 100 % 100, e.entry_date % 100)
+           END AS entry_date,
+           c.name AS customer, p.name AS product, e.quantity
+    FROM {entries} e
+    LEFT JOIN Customers c ON c.id = e.customer_id
+    LEFT JOIN Products p ON p.id = e.product_id
+'''
+
+def iter_entry_chunks(entry_filter=None, chunk_size=CHUNK_SIZE):
+    """Yield lists of (date, customer, product, quantity) rows in date order."""
+    entry_filter = entry_filter or EntryFilter()
+    conditions, params = entry_filter.where()
+    sql = ENTRY_REPORT_SQL
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY e.entry_date, e.id"
+    conn = get_connection()
+    for table in entry_tables(conn, entry_filter.start, entry_filter.end):
+        cursor = conn.execute(sql.format(entries=table), params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+class CsvSink:
+    """Write rows to a CSV file as they arrive."""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+
+    def write_header(self, columns):
+        """Write the column headers."""
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        """Append a chunk of rows."""
+        self.writer.writerows(rows)
+
+    def close(self):
+        """Finish and save the file."""
+        self.file.close()
+
+class XlsxSink:
+    """Write rows to an XLSX workbook in openpyxl's write-only mode."""
+
+    MAX_ROWS_PER_SHEET = 1048576
+
+    def __init__(self, path, title="Sheet"):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.title = title
+        self.workbook = Workbook(write_only=True)
+        self.columns = None
+        self.sheet = None
+        self.sheet_rows = 0
+        self.sheets = 0
+
+    def new_sheet(self):
+        """Start the next worksheet, repeating the header row."""
+        self.sheets += 1
+        name = self.title if self.sheets == 1 else f"{self.title} {self.sheets}"
+        self.sheet = self.workbook.create_sheet(name)
+        self.sheet_rows = 0
+        if self.columns:
+            self.sheet.append(self.columns)
+            self.sheet_rows = 1
+
+    def write_header(self, columns):
+        """Write the column headers."""
+        self.columns = list(columns)
+        self.new_sheet()
+
+    def write_rows(self, rows):
+        """Append a chunk of rows."""
+        if self.sheet is None:
+            self.new_sheet()
+        for row in rows:
+            if self.sheet_rows >= self.MAX_ROWS_PER_SHEET:
+                self.new_sheet()
+            self.sheet.append(row)
+            self.sheet_rows += 1
+
+    def close(self):
+        """Finish and save the file."""
+        if self.sheet is None:
+            self.new_sheet()
+        self.workbook.save(self.path)
+
+def pdf_sink(path, title):
+    """Return a paginated PDF table sink for daily entry rows."""
+    from pdf_render import Column, PdfTable
+
+    columns = [
+        Column("Date", 90),
+        Column("Customer", 200),
+        Column("Product", 150),
+        Column("Quantity", 90, align="right", total=True,
+               fmt=lambda value: "" if value is None else f"{value:.2f}"),
+    ]
+    return PdfTable(path, title, columns)
+
+def export_entries(sink, entry_filter=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream daily entries into a sink and return the number of rows written."""
+    count = 0
+    try:
+        sink.write_header(ENTRY_COLUMNS)
+        for rows in iter_entry_chunks(entry_filter, chunk_size):
+            sink.write_rows(rows)
+            count += len(rows)
+            if progress:
+                progress(count)
+    finally:
+        sink.close()
+    return count
@@ -0,0 +1,103 @@
+import csv
+import sqlite3
+from datetime import date
+
+from database import ENTRY_INSERT_SQL, deferred_totals, transaction
+from dates import to_day
+from lookups import lookups
+
+COLUMNS = ("date", "customer", "product", "quantity")
+
+class ImportResult:
+    """Outcome of a bulk import: rows inserted and (line, reason) rejections."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = []
+
+    def summary(self):
+        """Return a one-line human readable summary."""
+        return f"{self.inserted} entries imported, {len(self.rejected)} lines rejected"
+
+def parse_row(row, customers, products, dates):
+    """Validate one CSV row and return the insert parameters."""
+    if len(row) != len(COLUMNS):
+        raise ValueError(f"expected {len(COLUMNS)} columns, got {len(row)}")
+    entry_date, customer, product, quantity = row
+    day = dates.get(entry_date)
+    if day is None:
+        try:
+            day = dates[entry_date] = to_day(date.fromisoformat(entry_date.strip()))
+        except ValueError:
+            raise ValueError(f"invalid date '{entry_date}', expected YYYY-MM-DD") from None
+    customer_id = customers.get(customer)
+    if customer_id is None:
+        customer_id = resolve_name(customer.strip(), customers, "customer")
+    product_id = products.get(product)
+    if product_id is None:
+        product_id = resolve_name(product.strip(), products, "product")
+    try:
+        quantity = float(quantity)
+    except ValueError:
+        raise ValueError(f"invalid quantity '{quantity}'") from None
+    if not quantity > 0:
+        raise ValueError("quantity must be positive")
+    return day, customer_id, product_id, quantity
+
+def resolve_name(name, ids, kind):
+    """Resolve a name that missed the fast path, explaining any failure."""
+    if name not in ids:
+        raise ValueError(f"unknown {kind} '{name}'")
+    if ids[name] is None:
+        raise ValueError(f"ambiguous {kind} '{name}'")
+    return ids[name]
+
+def insert_batch(batch, result):
+    """Insert a batch in one transaction, isolating bad rows if it fails."""
+    try:
+        with transaction() as conn, deferred_totals(conn):
+            conn.executemany(ENTRY_INSERT_SQL, (params for _, params in batch))
+        result.inserted += len(batch)
+        return
+    except sqlite3.IntegrityError:
+        pass
+    # Retry row by row so that one bad line does not reject the whole batch
+    with transaction() as conn:
+        for line_no, params in batch:
+            try:
+                with transaction():
+                    conn.execute(ENTRY_INSERT_SQL, params)
+                result.inserted += 1
+            except sqlite3.IntegrityError as e:
+                result.rejected.append((line_no, str(e)))
+
+def import_entries_csv(path, batch_size=10000, progress=None):
+    """Stream daily entries from a CSV file into DailyEntries."""
+    customers = lookups.customer_name_map()
+    products = lookups.product_name_map()
+    dates = {}
+    result = ImportResult()
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or tuple(col.strip().lower() for col in header) != COLUMNS:
+            raise ValueError(f"CSV header must be: {','.join(COLUMNS)}")
+
+        batch = []
+        for row in reader:
+            if not any(row):
+                continue
+            try:
+                batch.append((reader.line_num, parse_row(row, customers, products, dates)))
+            except ValueError as e:
+                result.rejected.append((reader.line_num, str(e)))
+                continue
+            if len(batch) >= batch_size:
+                insert_batch(batch, result)
+                batch = []
+                if progress:
+                    progress(reader.line_num)
+        if batch:
+            insert_batch(batch, result)
+    return result
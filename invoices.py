@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+
+from billing_queries import month_bounds, month_key
+from database import entries_source, get_connection
+
+INVOICE_DIR = 'invoices'
+# Customers rendered per worker task; amortizes process pool overhead.
+INVOICES_PER_TASK = 25
+
+# Every invoice line for a month, each customer's lines contiguous
+INVOICE_LINES_SQL = '''
+    SELECT e.customer_id, c.name, c.address, c.contact,
+           printf('%04d-%02d-%02d', e.entry_date / 10000, e.entry_date / 100 % 100, e.entry_date % 100),
+           p.name, SUM(e.quantity), e.rate, SUM(e.amount)
+    FROM {entries} e
+    JOIN Customers c ON c.id = e.customer_id
+    JOIN Products p ON p.id = e.product_id
+    WHERE e.entry_date >= ? AND e.entry_date < ?
+    GROUP BY e.customer_id, e.entry_date, e.product_id, e.rate
+    ORDER BY e.customer_id, e.entry_date, p.name
+'''
+
+class InvoiceRunResult:
+    """Outcome of a batch invoice run."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.written = 0
+        self.skipped = 0
+        self.failed = []  # (customer_id, reason)
+
+    def summary(self):
+        """Return a one-line human readable summary."""
+        text = f"{self.written} invoices written to {self.directory}, {self.skipped} already present"
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        return text
+
+def invoice_path(directory, month, customer_id):
+    """Return the file name of a customer's invoice for the month."""
+    return os.path.join(directory, f"invoice_{month}_{customer_id}.pdf")
+
+def fetch_invoices(conn, month):
+    """Yield (customer, lines) for every customer with entries in the month."""
+    start, end = month_bounds(month)
+    rows = conn.execute(INVOICE_LINES_SQL.format(entries=entries_source(conn, start, end)), (start, end))
+    for customer, group in groupby(rows, key=lambda row: row[:4]):
+        yield customer, [row[4:] for row in group]
+
+def render_invoice(path, month, customer, lines):
+    """Render one customer's invoice, writing it atomically to path."""
+    from pdf_render import Column, PdfTable  # Imported in the worker process
+
+    customer_id, name, address, contact = customer
+    columns = [
+        Column("Date", 100),
+        Column("Product", 160),
+        Column("Quantity", 80, align="right", total=True, fmt=lambda value: f"{value:.2f}"),
+        Column("Rate", 80, align="right", fmt=lambda value: f"{value or 0:.2f}"),
+        Column("Amount", 100, align="right", total=True, fmt=lambda value: f"{value or 0:.2f}"),
+    ]
+    details = [f"Customer: {name} (#{customer_id})"]
+    if address:
+        details.append(f"Address: {address}")
+    if contact:
+        details.append(f"Contact: {contact}")
+    partial = path + ".part"
+    table = PdfTable(partial, f"Invoice for {month}", columns, subtitle_lines=details)
+    table.write_rows(lines)
+    table.close()
+    # Only complete invoices get their final name, so a rerun can skip them
+    os.replace(partial, path)
+
+def render_invoice_batch(directory, month, batch):
+    """Render a batch of invoices in a worker; return [(customer_id, error)]."""
+    outcomes = []
+    for customer, lines in batch:
+        try:
+            render_invoice(invoice_path(directory, month, customer[0]), month, customer, lines)
+            outcomes.append((customer[0], None))
+        except Exception as e:
+            outcomes.append((customer[0], str(e)))
+    return outcomes
+
+def generate_invoices(month, base_dir=INVOICE_DIR, workers=None, progress=None):
+    """Write one PDF invoice per customer billed in the month."""
+    month = month_key(month)
+    directory = os.path.join(base_dir, month)
+    os.makedirs(directory, exist_ok=True)
+    result = InvoiceRunResult(directory)
+
+    pending = []
+    for customer, lines in fetch_invoices(get_connection(), month):
+        if os.path.exists(invoice_path(directory, month, customer[0])):
+            result.skipped += 1
+        else:
+            pending.append((customer, lines))
+    total = len(pending)
+    if progress:
+        progress(0, total)
+    if not pending:
+        return result
+
+    batches = [pending[i:i + INVOICES_PER_TASK] for i in range(0, total, INVOICES_PER_TASK)]
+    done = 0
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(render_invoice_batch, directory, month, batch) for batch in batches]
+        for future in as_completed(futures):
+            for customer_id, error in future.result():
+                if error is None:
+                    result.written += 1
+                else:
+                    result.failed.append((customer_id, error))
+                done += 1
+            if progress:
+                progress(done, total)
+    finally:
+        # Drop the batches that have not started; finished invoices are kept
+        pool.shutdown(wait=True, cancel_futures=True)
+    return result
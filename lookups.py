@@ -0,0 +1,139 @@
+import threading
+
+from database import get_connection
+
+class NotFoundError(LookupError):
+    """Raised when a name or contact does not match any row."""
+
+class AmbiguousNameError(LookupError):
+    """Raised when a name matches more than one row."""
+
+class LookupCache:
+    """In-process name and contact to ID maps for customers and products."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._customers = None  # id -> (name, contact)
+        self._customer_ids = None  # name -> [id, ...]
+        self._contacts = None  # contact -> id
+        self._products = None  # name -> id
+        self._versions = None  # Data versions of Customers and Products when loaded
+
+    def _read_versions(self, conn):
+        return [row[0] for row in conn.execute(
+            "SELECT version FROM DataVersions WHERE name IN ('Customers', 'Products') ORDER BY name"
+        )]
+
+    def _ensure_loaded(self):
+        conn = get_connection()
+        versions = self._read_versions(conn)
+        if self._customers is not None and versions == self._versions:
+            return
+        customers = {row[0]: (row[1], row[2]) for row in conn.execute(
+            "SELECT id, name, contact FROM Customers"
+        )}
+        self._customer_ids = {}
+        self._contacts = {}
+        for customer_id, (name, contact) in customers.items():
+            self._index_customer(customer_id, name, contact)
+        self._products = dict(conn.execute("SELECT name, id FROM Products"))
+        self._customers = customers
+        self._versions = versions
+
+    def _patchable(self):
+        """Return whether only the edit being patched in changed the maps' tables."""
+        if self._customers is None:
+            return False
+        customers, products = self._read_versions(get_connection())
+        if self._versions != [customers - 1, products]:
+            self._customers = None
+            return False
+        self._versions = [customers, products]
+        return True
+
+    def _index_customer(self, customer_id, name, contact):
+        self._customer_ids.setdefault(name, []).append(customer_id)
+        if contact:
+            self._contacts[contact] = customer_id
+
+    def _unindex_customer(self, customer_id):
+        name, contact = self._customers.pop(customer_id)
+        ids = self._customer_ids[name]
+        ids.remove(customer_id)
+        if not ids:
+            del self._customer_ids[name]
+        if contact and self._contacts.get(contact) == customer_id:
+            del self._contacts[contact]
+
+    def invalidate(self):
+        """Drop the cached maps; they are reloaded on next use."""
+        with self._lock:
+            self._customers = None
+
+    def customer_id(self, name):
+        """Return the ID of the customer with this name."""
+        with self._lock:
+            self._ensure_loaded()
+            ids = self._customer_ids.get(name)
+        if not ids:
+            raise NotFoundError(f"Customer '{name}' not found")
+        if len(ids) > 1:
+            raise AmbiguousNameError(f"More than one customer is named '{name}'")
+        return ids[0]
+
+    def customer_id_by_contact(self, contact):
+        """Return the ID of the customer with this contact number."""
+        with self._lock:
+            self._ensure_loaded()
+            customer_id = self._contacts.get(contact)
+        if customer_id is None:
+            raise NotFoundError(f"No customer with contact '{contact}'")
+        return customer_id
+
+    def product_id(self, name):
+        """Return the ID of the product with this name."""
+        with self._lock:
+            self._ensure_loaded()
+            product_id = self._products.get(name)
+        if product_id is None:
+            raise NotFoundError(f"Product '{name}' not found")
+        return product_id
+
+    def customer_name_map(self):
+        """Return a name -> ID dict; names shared by several customers map to None."""
+        with self._lock:
+            self._ensure_loaded()
+            return {name: ids[0] if len(ids) == 1 else None
+                    for name, ids in self._customer_ids.items()}
+
+    def product_name_map(self):
+        """Return a copy of the name -> ID dict for products."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._products)
+
+    def customer_added(self, customer_id, name, contact):
+        """Record a newly inserted customer."""
+        with self._lock:
+            if not self._patchable():
+                return
+            self._customers[customer_id] = (name, contact)
+            self._index_customer(customer_id, name, contact)
+
+    def customer_updated(self, customer_id, name, contact):
+        """Record new details for an existing customer."""
+        with self._lock:
+            if not self._patchable():
+                return
+            if customer_id in self._customers:
+                self._unindex_customer(customer_id)
+            self._customers[customer_id] = (name, contact)
+            self._index_customer(customer_id, name, contact)
+
+    def customer_deleted(self, customer_id):
+        """Forget a deleted customer."""
+        with self._lock:
+            if self._patchable() and customer_id in self._customers:
+                self._unindex_customer(customer_id)
+
+lookups = LookupCache()
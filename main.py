@@ -1,14 +1,76 @@
 import tkinter as tk
 from tkinter import ttk
-from tkcalendar import DateEntry
 from ttkthemes import ThemedStyle
-from database import get_connection, init_db
+from database import connections, init_db, profiled
 from customer import CustomerManager
+from dashboard import dashboard_cache
 from daily_entry import DailyEntryManager
 from billing import BillingManager
-from reports import ReportGenerator
-from ui_utils import UIUtils
+from reports import ReportsManager
+import services
+from tasks import TaskRunner
 
+# How often the dashboard re-reads its figures while it is on screen
+DASHBOARD_REFRESH_MS = 5000
+
+class Screen:
+    """A screen built on its first visit and kept, stacked under the others."""
+
+    def __init__(self, frame, manager, tables):
+        self.frame = frame
+        self.manager = manager
+        self.tables = tables
+        self.versions = None  # Versions of tables its contents reflect
+
+class DashboardView:
+    """The dashboard figures, re-read every DASHBOARD_REFRESH_MS while shown."""
+
+    def __init__(self, parent, tasks, is_shown):
+        self.tasks = tasks
+        self.is_shown = is_shown
+        self.pending = None
+
+        # Create dashboard widgets; figures are filled in once loaded
+        self.frame = ttk.Frame(parent)
+        self.frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        self.labels = {}
+        for key in ("customers", "today", "outstanding", "month_sales", "today_by_product"):
+            self.labels[key] = ttk.Label(self.frame, text="Loading...", font=('Helvetica', 12))
+            self.labels[key].pack(anchor=tk.W, pady=5)
+        self.labels["today_by_product"].configure(text="", justify=tk.LEFT)
+
+        # Paint the last known figures at once; show() brings them up to date
+        cached = dashboard_cache.cached()
+        if cached is not None:
+            self.show_stats(cached)
+
+    def show_stats(self, stats):
+        """Fill in the figures."""
+        labels = self.labels
+        labels["customers"].configure(text=f"Total Customers: {stats['customers']}")
+        labels["today"].configure(text=f"Today's Entries: {stats['today']}")
+        labels["outstanding"].configure(text=f"Outstanding Payments: ₹{stats['outstanding']:.2f}")
+        labels["month_sales"].configure(text=f"This Month's Sales to Date: ₹{stats['month_sales']:.2f}")
+        lines = [f"    {name}: {quantity:.2f}" for name, quantity in stats["today_by_product"]]
+        labels["today_by_product"].configure(
+            text="\n".join(["Today's Quantity by Product:"] + (lines or ["    none yet"])))
+
+    def show(self):
+        """Refresh now and keep refreshing until another screen is shown."""
+        if self.pending is not None:
+            self.frame.after_cancel(self.pending)
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the figures, then schedule the next refresh while shown."""
+        self.pending = None
+        if not self.frame.winfo_exists() or not self.is_shown():
+            return  # Stop refreshing until shown again
+        self.tasks.submit(services.dashboard_stats, key="dashboard", on_done=self.show_stats)
+        self.pending = self.frame.after(DASHBOARD_REFRESH_MS, self.refresh)
+
+@profiled
 class DairyManagementApp:
     def __init__(self, root):
         self.root = root
@@ -18,6 +80,9 @@ class DairyManagementApp:
         # Initialize database and create default products if needed
         init_db()
         self.create_default_products()
+
+        # Database work runs here, off the Tk thread
+        self.tasks = TaskRunner(self.root)
         
         # Apply modern theme
         self.style = ThemedStyle(self.root)
@@ -30,14 +95,27 @@ class DairyManagementApp:
         # Create sidebar
         self.create_sidebar()
         
-        # Create content frame
+        # Create content frame; screens are stacked in its single cell
         self.content_frame = ttk.Frame(self.main_container)
         self.content_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
-        
-        # Initialize screens
+        self.content_frame.rowconfigure(0, weight=1)
+        self.content_frame.columnconfigure(0, weight=1)
+        
+        # Screens: title, how to build one on a frame, and the tables it shows
+        self.screen_specs = {
+            "dashboard": ("Dashboard", self.build_dashboard, ()),
+            "customer": ("Customer Management", CustomerManager, ("Customers",)),
+            "daily_entry": ("Daily Entry", DailyEntryManager, ("DailyEntries", "Customers", "Products")),
+            "billing": ("Billing", BillingManager, ("Billing", "Customers")),
+            "reports": ("Reports", ReportsManager, ("DailyEntries", "Customers", "Products")),
+        }
+        self.screens = {}
+        self.current = None
+        self.dashboard_manager = None
         self.customer_manager = None
         self.daily_entry_manager = None
         self.billing_manager = None
+        self.reports_manager = None
         
         # Show dashboard by default
         self.show_dashboard()
@@ -61,97 +139,68 @@ class DairyManagementApp:
     
     def create_default_products(self):
         """Create default products if they don't exist."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM Products")
-        if cursor.fetchone()[0] == 0:
-            default_products = [
-                ("Milk Type 1", 50.0),
-                ("Milk Type 2", 55.0),
-                ("Milk Type 3", 60.0),
-                ("Paneer", 300.0),
-                ("Chach", 40.0),
-                ("Ghee", 500.0),
-                ("Dahi", 60.0)
-            ]
-            cursor.executemany("INSERT INTO Products (name, rate) VALUES (?, ?)", default_products)
-            conn.commit()
-        conn.close()
+        services.ensure_default_products()
+
+    def build_dashboard(self, parent, tasks):
+        """Create the dashboard view."""
+        return DashboardView(parent, tasks, lambda: self.current == "dashboard")
 
     def show_dashboard(self):
         """Show dashboard screen with actual data."""
-        self.clear_content()
-        ttk.Label(self.content_frame, text="Dashboard", font=('Helvetica', 16)).pack(pady=20)
-        
-        # Get data from database
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Total customers
-        cursor.execute("SELECT COUNT(*) FROM Customers")
-        total_customers = cursor.fetchone()[0]
-        
-        # Today's entries
-        cursor.execute("SELECT COUNT(*) FROM DailyEntries WHERE date(entry_date) = date('now')")
-        today_entries = cursor.fetchone()[0]
-        
-        # Outstanding payments
-        cursor.execute("SELECT SUM(total - paid) FROM Billing WHERE paid < total")
-        outstanding = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        self.show_screen("dashboard")
+        self.dashboard_manager.show()
 
-        # Create dashboard widgets
-        dashboard_frame = ttk.Frame(self.content_frame)
-        dashboard_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-        
-        ttk.Label(dashboard_frame, 
-                text=f"Total Customers: {total_customers}", 
-                font=('Helvetica', 12)).pack(anchor=tk.W, pady=5)
-                
-        ttk.Label(dashboard_frame, 
-                text=f"Today's Entries: {today_entries}", 
-                font=('Helvetica', 12)).pack(anchor=tk.W, pady=5)
-                
-        ttk.Label(dashboard_frame, 
-                text=f"Outstanding Payments: ₹{outstanding:.2f}", 
-                font=('Helvetica', 12)).pack(anchor=tk.W, pady=5)
-    
     def show_customer_management(self):
         """Show customer management screen."""
-        self.clear_content()
-        ttk.Label(self.content_frame, text="Customer Management", font=('Helvetica', 16)).pack(pady=20)
-        
-        # Add customer management widgets here
+        self.show_screen("customer")
     
     def show_daily_entry(self):
         """Show daily entry screen."""
-        self.clear_content()
-        ttk.Label(self.content_frame, text="Daily Entry", font=('Helvetica', 16)).pack(pady=20)
-        
-        # Add daily entry widgets here
+        self.show_screen("daily_entry")
     
     def show_billing(self):
         """Show billing screen."""
-        self.clear_content()
-        ttk.Label(self.content_frame, text="Billing", font=('Helvetica', 16)).pack(pady=20)
-        
-        # Add billing widgets here
+        self.show_screen("billing")
     
     def show_reports(self):
         """Show reports screen."""
-        self.clear_content()
-        ttk.Label(self.content_frame, text="Reports", font=('Helvetica', 16)).pack(pady=20)
-        
-        # Add report widgets here
+        self.show_screen("reports")
     
-    def clear_content(self):
-        """Clear the content frame."""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+    def show_screen(self, name):
+        """Raise a screen, building it on first visit."""
+        if self.screen_specs[name][2]:
+            # Submitted before the first load, so changes made meanwhile are caught
+            self.tasks.submit(services.data_versions, key=f"versions.{name}",
+                              on_done=lambda versions: self.refresh_screen(self.screens[name], versions))
+        screen = self.screens.get(name)
+        if screen is None:
+            screen = self.screens[name] = self.build_screen(name)
+        screen.frame.tkraise()
+        self.current = name
+
+    def build_screen(self, name):
+        """Build a screen on its own frame in the content area."""
+        title, build, tables = self.screen_specs[name]
+        frame = ttk.Frame(self.content_frame)
+        frame.grid(row=0, column=0, sticky=tk.NSEW)
+        ttk.Label(frame, text=title, font=('Helvetica', 16)).pack(pady=20)
+        manager = build(frame, self.tasks)
+        setattr(self, f"{name}_manager", manager)
+        return Screen(frame, manager, tables)
+
+    def refresh_screen(self, screen, versions):
+        """Reload a screen if the tables it shows changed since it was last shown."""
+        seen = {table: versions.get(table) for table in screen.tables}
+        if screen.versions is not None:
+            changed = {table for table in screen.tables if seen[table] != screen.versions[table]}
+            if changed:
+                screen.manager.refresh(changed)
+        # On the first visit the screen has just loaded its data itself
+        screen.versions = seen
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = DairyManagementApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.tasks.shutdown()
+    connections.close_all()
@@ -0,0 +1,169 @@
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+class Column:
+    """A table column: heading, width in points, alignment and total flag."""
+
+    def __init__(self, title, width, align="left", total=False, fmt=None):
+        self.title = title
+        self.width = width
+        self.align = align
+        self.total = total
+        self.fmt = fmt or (lambda value: "" if value is None else str(value))
+
+class TableStyle:
+    """Fonts and metrics shared by every page of a rendered table."""
+
+    def __init__(self, font="Helvetica", bold_font="Helvetica-Bold", font_size=9,
+                 title_size=14, row_height=14, margin=40, cell_padding=4,
+                 header_fill=(0.9, 0.9, 0.9), pagesize=letter):
+        self.font = font
+        self.bold_font = bold_font
+        self.font_size = font_size
+        self.title_size = title_size
+        self.row_height = row_height
+        self.margin = margin
+        self.cell_padding = cell_padding
+        self.header_fill = header_fill
+        self.pagesize = pagesize
+
+DEFAULT_STYLE = TableStyle()
+
+class PdfTable:
+    """Render rows as a table spread over as many pages as needed."""
+
+    def __init__(self, path, title, columns, style=DEFAULT_STYLE, subtitle_lines=()):
+        self.canvas = canvas.Canvas(path, pagesize=style.pagesize, pageCompression=1)
+        self.title = title
+        self.subtitle_lines = list(subtitle_lines)
+        self.columns = columns
+        self.style = style
+        width, height = style.pagesize
+        self.top = height - style.margin
+        # Room for the title, headings, page total and footer
+        self.bottom = style.margin + 2 * style.row_height
+
+        # Precompute where each cell's text is anchored
+        self.anchors = []
+        x = style.margin
+        for column in columns:
+            if column.align == "right":
+                self.anchors.append(x + column.width - style.cell_padding)
+            else:
+                self.anchors.append(x + style.cell_padding)
+            x += column.width
+        self.right = x
+        self.total_indexes = [i for i, column in enumerate(columns) if column.total]
+        self.clip_cache = [{} for _ in columns]
+
+        self.page = 0
+        self.y = None
+        self.page_totals = [0.0] * len(columns)
+        self.grand_totals = [0.0] * len(columns)
+
+    def clip(self, index, text, font):
+        """Return text shortened to fit its column, with its x position."""
+        cache = self.clip_cache[index]
+        key = text if font == self.style.font else (font, text)
+        placed = cache.get(key)
+        if placed is None:
+            column = self.columns[index]
+            limit = column.width - 2 * self.style.cell_padding
+            size = self.style.font_size
+            clipped = text
+            width = stringWidth(text, font, size)
+            if width > limit:
+                while clipped and stringWidth(clipped + "…", font, size) > limit:
+                    clipped = clipped[:-1]
+                clipped += "…"
+                width = stringWidth(clipped, font, size)
+            x = self.anchors[index] - width if column.align == "right" else self.anchors[index]
+            placed = (clipped, x)
+            if len(cache) < 10000:
+                cache[key] = placed
+        return placed
+
+    def draw_cells(self, values, font):
+        """Add one line of already formatted cell values at the current y."""
+        text = self.text
+        if font != self.text_font:
+            text.setFont(font, self.style.font_size)
+            self.text_font = font
+        baseline = self.y - self.style.row_height + self.style.cell_padding
+        for index, value in enumerate(values):
+            if value:
+                clipped, x = self.clip(index, value, font)
+                text.setTextOrigin(x, baseline)
+                text.textOut(clipped)
+        self.y -= self.style.row_height
+
+    def start_page(self):
+        """Begin a page with the title and the column headings."""
+        style, c = self.style, self.canvas
+        self.page += 1
+        self.y = self.top
+        c.setFont(style.bold_font, style.title_size)
+        c.drawString(style.margin, self.y - style.title_size, self.title)
+        self.y -= style.title_size + style.row_height / 2
+        c.setFont(style.font, style.font_size)
+        for line in self.subtitle_lines:
+            c.drawString(style.margin, self.y - style.font_size, line)
+            self.y -= style.row_height
+        c.setFillColorRGB(*style.header_fill)
+        c.rect(style.margin, self.y - style.row_height, self.right - style.margin,
+               style.row_height, stroke=0, fill=1)
+        c.setFillColorRGB(0, 0, 0)
+        # One text object per page is far cheaper than a drawString per cell
+        self.text = c.beginText()
+        self.text_font = None
+        self.draw_cells([column.title for column in self.columns], style.bold_font)
+
+    def totals_line(self, label, totals):
+        """Format a totals row, putting the label in the first column."""
+        values = [""] * len(self.columns)
+        values[0] = label
+        for index in self.total_indexes:
+            values[index] = self.columns[index].fmt(totals[index])
+        return values
+
+    def finish_page(self, last=False):
+        """Close the current page with its totals and page number."""
+        style, c = self.style, self.canvas
+        if self.total_indexes:
+            c.line(style.margin, self.y, self.right, self.y)
+            self.draw_cells(self.totals_line("Page total", self.page_totals), style.bold_font)
+            if last:
+                self.draw_cells(self.totals_line("Grand total", self.grand_totals), style.bold_font)
+        c.drawText(self.text)
+        c.setFont(style.font, style.font_size)
+        c.drawRightString(self.right, style.margin / 2, f"Page {self.page}")
+        c.showPage()
+        self.page_totals = [0.0] * len(self.columns)
+
+    def write_header(self, columns):
+        """Accept the sink protocol's header; headings come from the columns."""
+
+    def write_rows(self, rows):
+        """Draw rows, breaking pages and accumulating totals."""
+        font = self.style.font
+        fmts = [column.fmt for column in self.columns]
+        totals = self.total_indexes
+        for row in rows:
+            if self.y is None:
+                self.start_page()
+            elif self.y - self.style.row_height < self.bottom:
+                self.finish_page()
+                self.start_page()
+            for index in totals:
+                value = row[index] or 0
+                self.page_totals[index] += value
+                self.grand_totals[index] += value
+            self.draw_cells([fmt(value) for fmt, value in zip(fmts, row)], font)
+
+    def close(self):
+        """Finish the last page and write the file."""
+        if self.y is None:
+            self.start_page()
+        self.finish_page(last=True)
+        self.canvas.save()
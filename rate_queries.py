@@ -0,0 +1,40 @@
+from database import ENTRY_RATE_SQL, hot_start
+
+# Every rate of one product with the day it took effect, newest first
+PRODUCT_RATES_SQL = '''
+    SELECT effective_from, rate FROM ProductRates
+    WHERE product_id = ?
+    ORDER BY effective_from DESC
+'''
+
+# Rewrites the rate and amount of a product's live entries in [start, end)
+REPRICE_ENTRIES_SQL = '''
+    UPDATE DailyEntries SET rate = ?, amount = quantity * ?
+    WHERE product_id = ? AND entry_date >= ? AND entry_date < ?
+'''
+
+def product_rates(conn, product_id):
+    """Return (effective_from, rate) rows for a product, newest first."""
+    return conn.execute(PRODUCT_RATES_SQL, (product_id,)).fetchall()
+
+def set_product_rate(conn, product_id, rate, effective_from, today, reprice=False):
+    """Make rate the product's rate from effective_from on; call inside a transaction."""
+    if not rate > 0:
+        raise ValueError("rate must be positive")
+    if reprice and effective_from < (hot_start(conn) or 0):
+        raise ValueError("Cannot reprice archived months; restore them first")
+    conn.execute(
+        "INSERT OR REPLACE INTO ProductRates (product_id, effective_from, rate) VALUES (?, ?, ?)",
+        (product_id, effective_from, rate)
+    )
+    conn.execute(
+        "UPDATE Products SET rate = " + ENTRY_RATE_SQL.format(product="id", day="?") + " WHERE id = ?",
+        (today, product_id)
+    )
+    if not reprice:
+        return 0
+    end = conn.execute(
+        "SELECT IFNULL(MIN(effective_from), 99991232) FROM ProductRates WHERE product_id = ? AND effective_from > ?",
+        (product_id, effective_from)
+    ).fetchone()[0]
+    return conn.execute(REPRICE_ENTRIES_SQL, (rate, rate, product_id, effective_from, end)).rowcount
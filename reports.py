@@ -1,52 +1,180 @@
-import pandas as pd
-from database import get_connection
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import tkinter as tk
+from datetime import date, timedelta
+from tkinter import ttk, messagebox
+from customer_queries import customer_label
+from database import profiled
+from dates import to_day
+import services
+from services import export_daily_entries
+from tasks import TaskRunner, report_progress
+from ui_utils import TypeAhead, UIUtils
 
+# Analysis periods offered on the Reports screen, as days before today
+PERIODS = {
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last 365 days": 365,
+    "All time": None,
+}
+
+@profiled
 class ReportGenerator:
     @staticmethod
-    def export_daily_entries_to_excel():
-        """Export daily entries to Excel."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT entry_date, (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   (SELECT name FROM Products WHERE id = product_id) AS product, quantity
-            FROM DailyEntries
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
-
-        df = pd.DataFrame(rows, columns=["Date", "Customer", "Product", "Quantity"])
-        df.to_excel('daily_entries.xlsx', index=False)
+    def export_daily_entries_to_excel(path='daily_entries.xlsx', start=None, end=None, progress=None):
+        """Export daily entries, optionally limited to [start, end), to Excel."""
+        return export_daily_entries(path, start, end, fmt="xlsx", progress=progress)
+
+    @staticmethod
+    def export_daily_entries_to_csv(path='daily_entries.csv', start=None, end=None, progress=None):
+        """Export daily entries, optionally limited to [start, end), to CSV."""
+        return export_daily_entries(path, start, end, fmt="csv", progress=progress)
 
     @staticmethod
-    def export_daily_entries_to_pdf():
-        """Export daily entries to PDF."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT entry_date, (SELECT name FROM Customers WHERE id = customer_id) AS customer,
-                   (SELECT name FROM Products WHERE id = product_id) AS product, quantity
-            FROM DailyEntries
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
-
-        pdf_file = 'daily_entries.pdf'
-        c = canvas.Canvas(pdf_file, pagesize=letter)
-        c.drawString(100, 750, "Daily Entries Report")
-        c.drawString(100, 730, "Date")
-        c.drawString(200, 730, "Customer")
-        c.drawString(300, 730, "Product")
-        c.drawString(400, 730, "Quantity")
-
-        y = 710
-        for row in rows:
-            c.drawString(100, y, str(row[0]))
-            c.drawString(200, y, row[1])
-            c.drawString(300, y, row[2])
-            c.drawString(400, y, str(row[3]))
-            y -= 20
-
-        c.save()
\ No newline at end of file
+    def export_daily_entries_to_pdf(path='daily_entries.pdf', start=None, end=None, progress=None):
+        """Export daily entries, optionally limited to [start, end), to PDF."""
+        return export_daily_entries(path, start, end, fmt="pdf", progress=progress)
+
+@profiled
+class ReportsManager:
+    """Exports and the analytics views of the Reports screen."""
+
+    def __init__(self, parent_frame, tasks=None):
+        self.parent = parent_frame
+        self.tasks = tasks or TaskRunner(parent_frame)
+        self.setup_ui()
+        self.load_analytics()
+
+    def setup_ui(self):
+        """Setup the reports UI components."""
+        export_frame = ttk.LabelFrame(self.parent, text="Export Daily Entries", padding=10)
+        export_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        self.report_start_entry = UIUtils.create_labeled_entry(export_frame, "From (YYYY-MM-DD):", 0)
+        self.report_end_entry = UIUtils.create_labeled_entry(export_frame, "To (YYYY-MM-DD):", 1)
+
+        btn_frame = ttk.Frame(export_frame)
+        btn_frame.grid(row=2, column=0, columnspan=2, pady=5)
+        exports = [
+            ("Export to Excel", ReportGenerator.export_daily_entries_to_excel, 'daily_entries.xlsx'),
+            ("Export to CSV", ReportGenerator.export_daily_entries_to_csv, 'daily_entries.csv'),
+            ("Export to PDF", ReportGenerator.export_daily_entries_to_pdf, 'daily_entries.pdf'),
+        ]
+        for text, export, path in exports:
+            ttk.Button(btn_frame, text=text,
+                       command=lambda export=export, path=path: self.export_daily_entries(export, path)
+                       ).pack(side=tk.LEFT, padx=2)
+
+        # Analytics
+        analytics_frame = ttk.LabelFrame(self.parent, text="Analytics", padding=10)
+        analytics_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        period_frame = ttk.Frame(analytics_frame)
+        period_frame.pack(fill=tk.X)
+        ttk.Label(period_frame, text="Period:").pack(side=tk.LEFT)
+        self.period_combobox = ttk.Combobox(period_frame, values=list(PERIODS), state="readonly", width=15)
+        self.period_combobox.set("Last 90 days")
+        self.period_combobox.pack(side=tk.LEFT, padx=5)
+        self.period_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_analytics())
+        ttk.Button(period_frame, text="Refresh", command=self.load_analytics).pack(side=tk.LEFT, padx=2)
+        self.status_label = ttk.Label(period_frame, text="Loading...")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+        notebook = ttk.Notebook(analytics_frame)
+        notebook.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        volume_tab = ttk.Frame(notebook)
+        notebook.add(volume_tab, text="Daily Volume")
+        self.volume_tree = ttk.Treeview(volume_tab, show="headings")
+        self.volume_tree.pack(fill=tk.BOTH, expand=True)
+
+        top_tab = ttk.Frame(notebook)
+        notebook.add(top_tab, text="Top Customers")
+        self.top_tree = UIUtils.create_treeview(top_tab, ("customer", "quantity", "amount"))
+        self.top_tree.pack(fill=tk.BOTH, expand=True)
+
+        trend_tab = ttk.Frame(notebook)
+        notebook.add(trend_tab, text="Customer Trend")
+        trend_form = ttk.Frame(trend_tab)
+        trend_form.pack(fill=tk.X, pady=5)
+        ttk.Label(trend_form, text="Customer:").pack(side=tk.LEFT)
+        self.trend_combobox = ttk.Combobox(trend_form, width=40)
+        self.trend_combobox.pack(side=tk.LEFT, padx=5)
+        self.trend_customer = TypeAhead(
+            self.trend_combobox, self.tasks, key="reports.customers",
+            search=lambda text: [(row[0], customer_label(row)) for row in services.search_customers(text)])
+        self.trend_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_analytics())
+        self.trend_chart = tk.Canvas(trend_tab, height=150, width=600, background="white")
+        self.trend_chart.pack(fill=tk.X)
+        self.trend_tree = UIUtils.create_treeview(trend_tab, ("month", "quantity", "amount"))
+        self.trend_tree.pack(fill=tk.BOTH, expand=True)
+
+        weekday_tab = ttk.Frame(notebook)
+        notebook.add(weekday_tab, text="Weekday Pattern")
+        self.weekday_chart = tk.Canvas(weekday_tab, height=150, width=600, background="white")
+        self.weekday_chart.pack(fill=tk.X)
+        self.weekday_tree = UIUtils.create_treeview(weekday_tab, ("weekday", "quantity", "amount"))
+        self.weekday_tree.heading("quantity", text="Average Quantity")
+        self.weekday_tree.heading("amount", text="Average Amount")
+        self.weekday_tree.pack(fill=tk.BOTH, expand=True)
+
+    def get_period(self):
+        """Return the [start, end) days of the selected period."""
+        days = PERIODS[self.period_combobox.get()]
+        if days is None:
+            return None, None
+        return to_day(date.today() - timedelta(days=days - 1)), None
+
+    def load_analytics(self):
+        """Compute the analytics for the selected period and customer."""
+        start, end = self.get_period()
+        customer_id = self.trend_customer.value()
+        self.tasks.submit(lambda: services.entry_analytics(start, end, customer_id),
+                          key="reports.analytics", on_done=self.show_analytics,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load analytics: {str(e)}"))
+
+    def refresh(self, changed=None):
+        """Recompute the analytics after entries, customers or products changed."""
+        self.load_analytics()
+
+    def show_analytics(self, report):
+        """Fill the analytics views."""
+        if not self.volume_tree.winfo_exists():
+            return  # The window has been closed
+        self.status_label.configure(text=f"{report['entries']:,} entries")
+
+        columns = ["date"] + [f"product{i}" for i in range(len(report["products"]))]
+        self.volume_tree.delete(*self.volume_tree.get_children())
+        self.volume_tree.configure(columns=columns)
+        self.volume_tree.heading("date", text="Date")
+        for i, name in enumerate(report["products"]):
+            self.volume_tree.heading(f"product{i}", text=name)
+            self.volume_tree.column(f"product{i}", width=80, anchor=tk.E)
+        for day, volumes in reversed(report["daily_volume"]):
+            self.volume_tree.insert("", tk.END, values=(day.isoformat(), *(f"{v:.2f}" for v in volumes)))
+
+        self.show_rows(self.top_tree, report["top_customers"])
+        self.show_rows(self.trend_tree, report["trend"])
+        UIUtils.draw_bar_chart(self.trend_chart, [month[2:] for month, _, _ in report["trend"]],
+                               [amount for _, _, amount in report["trend"]])
+        self.show_rows(self.weekday_tree, report["weekdays"])
+        UIUtils.draw_bar_chart(self.weekday_chart, [name[:3] for name, _, _ in report["weekdays"]],
+                               [quantity for _, quantity, _ in report["weekdays"]])
+
+    def show_rows(self, tree, rows):
+        """Replace a tree's rows with (label, quantity, amount) rows."""
+        tree.delete(*tree.get_children())
+        for label, quantity, amount in rows:
+            tree.insert("", tk.END, values=(label, f"{quantity:.2f}", f"{amount:.2f}"))
+
+    def export_daily_entries(self, export, path):
+        """Export daily entries in the entered date range with the given exporter."""
+        try:
+            start, end = services.entry_date_range(self.report_start_entry.get(), self.report_end_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid date: {str(e)}")
+            return
+
+        UIUtils.run_with_progress(
+            self.tasks, self.parent, "Exporting entries",
+            lambda: export(path, start, end, progress=report_progress),
+            on_done=lambda count: messagebox.showinfo("Success", f"{count} entries exported to {path}"))
@@ -0,0 +1,289 @@
+"""UI-free operations shared by the Tk screens and the command line."""
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import archive
+import billing_queries
+from billing_queries import fetch_month_bills, fetch_month_summary
+import customer_queries
+from dashboard import dashboard_cache
+import database
+from database import ENTRY_INSERT_SQL, get_connection, transaction
+from dates import day_iso, from_day, to_day
+from entry_queries import EntryFilter, fetch_entry
+from exporters import CsvSink, XlsxSink, export_entries, pdf_sink
+from importer import import_entries_csv
+from lookups import lookups
+import rate_queries
+import standing_orders
+
+DEFAULT_PRODUCTS = [
+    ("Milk Type 1", 50.0),
+    ("Milk Type 2", 55.0),
+    ("Milk Type 3", 60.0),
+    ("Paneer", 300.0),
+    ("Chach", 40.0),
+    ("Ghee", 500.0),
+    ("Dahi", 60.0)
+]
+
+def ensure_default_products():
+    """Create the default products if there are none yet."""
+    with transaction() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) FROM Products")
+        if cursor.fetchone()[0] != 0:
+            return
+        cursor.executemany("INSERT INTO Products (name, rate) VALUES (?, ?)", DEFAULT_PRODUCTS)
+    lookups.invalidate()
+
+def dashboard_stats(max_age=None):
+    """Return the dashboard figures as a dict; see dashboard.DashboardStats."""
+    return dashboard_cache.get(max_age)
+
+def data_versions():
+    """Return {table: version} for the tables screens watch; see migration 13."""
+    return database.data_versions(get_connection())
+
+def search_customers(text, limit=customer_queries.SEARCH_LIMIT):
+    """Return (id, name, address, contact) rows matching text; see customer_queries."""
+    return customer_queries.search_customers(get_connection(), text, limit)
+
+def product_names():
+    """Return every product name."""
+    return [row[0] for row in get_connection().execute("SELECT name FROM Products")]
+
+def product_rates(product_name):
+    """Return (YYYY-MM-DD effective from, rate) rows for a product, newest first."""
+    rows = rate_queries.product_rates(get_connection(), lookups.product_id(product_name))
+    return [(from_day(day).isoformat() if day > 10000101 else "always", rate) for day, rate in rows]
+
+def set_product_rate(product_name, rate, effective_from=None, reprice=False):
+    """Set a product's rate from a date on; return the number of entries repriced."""
+    today = to_day(date.today())
+    effective_from = to_day(effective_from) if effective_from is not None else today
+    with transaction() as conn:
+        repriced = rate_queries.set_product_rate(
+            conn, lookups.product_id(product_name), rate, effective_from, today, reprice)
+    if repriced:
+        dashboard_cache.invalidate()
+    return repriced
+
+def add_customer(name, address, contact):
+    """Insert a customer and return its id."""
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO Customers (name, address, contact) VALUES (?, ?, ?)",
+            (name, address, contact)
+        )
+        customer_id = cursor.lastrowid
+    lookups.customer_added(customer_id, name, contact)
+    dashboard_cache.invalidate()
+    return customer_id
+
+def update_customer(customer_id, name, address, contact):
+    """Update a customer's details."""
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE Customers SET name=?, address=?, contact=? WHERE id=?",
+            (name, address, contact, customer_id)
+        )
+    lookups.customer_updated(customer_id, name, contact)
+
+def delete_customer(customer_id):
+    """Delete a customer."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM Customers WHERE id=?", (customer_id,))
+    lookups.customer_deleted(customer_id)
+    dashboard_cache.invalidate()
+
+def entry_params(entry_date, customer, product_name, quantity):
+    """Validate an entry and return its ENTRY_INSERT_SQL parameters."""
+    entry_date = to_day(entry_date)
+    customer_id = customer if isinstance(customer, int) else lookups.customer_id(customer)
+    product_id = lookups.product_id(product_name)
+    try:
+        quantity = float(quantity)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid quantity {quantity!r}") from None
+    if not quantity > 0:
+        raise ValueError("quantity must be positive")
+    return entry_date, customer_id, product_id, quantity
+
+def add_entry(entry_date, customer, product_name, quantity, entry_filter=None):
+    """Insert a daily entry and return its list row if it matches entry_filter."""
+    entry_date, customer_id, product_id, quantity = entry_params(entry_date, customer, product_name, quantity)
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ENTRY_INSERT_SQL, (entry_date, customer_id, product_id, quantity))
+        entry_id = cursor.lastrowid
+    dashboard_cache.invalidate()
+    if entry_filter is not None and not entry_filter.matches(entry_date, customer_id, product_id):
+        return None
+    return fetch_entry(get_connection(), entry_id)
+
+def add_entries(params_list):
+    """Insert entry_params() results in one transaction; return their IDs."""
+    try:
+        with transaction() as conn:
+            results = [conn.execute(ENTRY_INSERT_SQL, params).lastrowid for params in params_list]
+    except sqlite3.IntegrityError:
+        # Rare: retry entry by entry so that one bad entry fails alone
+        results = []
+        with transaction() as conn:
+            for params in params_list:
+                try:
+                    with transaction():
+                        results.append(conn.execute(ENTRY_INSERT_SQL, params).lastrowid)
+                except sqlite3.IntegrityError as e:
+                    results.append(e)
+    dashboard_cache.invalidate()
+    return results
+
+def import_entries(path, progress=None):
+    """Bulk import daily entries from a CSV file; see importer.import_entries_csv."""
+    try:
+        return import_entries_csv(path, progress=progress)
+    finally:
+        dashboard_cache.invalidate()
+
+def add_standing_order(customer, product_name, quantity, first_day=None, last_day=None, weekdays=None):
+    """Add a standing order for a customer ID or name and return its id."""
+    first_day, customer_id, product_id, quantity = entry_params(
+        first_day or date.today(), customer, product_name, quantity)
+    last_day = to_day(last_day) if last_day else None
+    mask = standing_orders.weekday_mask(weekdays)
+    with transaction() as conn:
+        return standing_orders.add_standing_order(conn, customer_id, product_id, quantity, first_day, last_day, mask)
+
+def list_standing_orders(customer=None):
+    """Return the current standing orders as display rows."""
+    customer_id = customer if customer is None or isinstance(customer, int) else lookups.customer_id(customer)
+    rows = standing_orders.standing_orders(get_connection(), to_day(date.today()), customer_id)
+    return [(order_id, name, product, quantity, standing_orders.weekday_names(weekdays), day_iso(first), day_iso(last))
+            for order_id, name, product, quantity, weekdays, first, last in rows]
+
+def pause_standing_order(order_id, first_day, last_day):
+    """Suspend a standing order between two dates, both inclusive."""
+    with transaction() as conn:
+        standing_orders.pause_standing_order(conn, order_id, to_day(first_day), to_day(last_day))
+
+def end_standing_order(order_id, last_day=None):
+    """End a standing order after last_day (default today)."""
+    with transaction() as conn:
+        standing_orders.end_standing_order(conn, order_id, to_day(last_day or date.today()))
+
+def generate_standing_entries(first_day=None, last_day=None):
+    """Write the standing orders' entries from first_day to last_day, both inclusive."""
+    first_day = to_day(first_day or date.today())
+    last_day = to_day(last_day) if last_day else first_day
+    with transaction() as conn:
+        written = standing_orders.generate_entries(conn, first_day, last_day)
+    if written:
+        dashboard_cache.invalidate()
+    return written
+
+def month_billing(month):
+    """Return (customer, total) rows for a YYYY-MM month."""
+    return fetch_month_summary(get_connection(), month)
+
+def run_billing(month):
+    """Bring the month's Billing rows up to date; return (result, bill rows)."""
+    with transaction() as conn:
+        result = billing_queries.run_billing(conn, month)
+    if result.billed:
+        dashboard_cache.invalidate()
+    return result, fetch_month_bills(conn, month)
+
+def month_bills(month):
+    """Return the (bill id, customer, total, paid) rows of a month's bills without recalculating."""
+    return fetch_month_bills(get_connection(), month)
+
+def export_billing_excel(month, path=None):
+    """Write the month's billing summary to Excel and return the path."""
+    import pandas as pd  # Heavy libraries are imported where used, so batch jobs start quickly
+
+    path = path or f'billing_summary_{month}.xlsx'
+    df = pd.DataFrame(month_billing(month), columns=["Customer", "Total"])
+    df.to_excel(path, index=False)
+    return path
+
+def export_billing_pdf(month, path=None):
+    """Write the month's billing summary to PDF and return the path."""
+    from pdf_render import Column, PdfTable
+
+    path = path or f'billing_summary_{month}.pdf'
+    table = PdfTable(path, f"Billing Summary for {month}", [
+        Column("Customer", 300),
+        Column("Total", 120, align="right", total=True, fmt=lambda value: f"{value or 0:.2f}"),
+    ])
+    table.write_rows(month_billing(month))
+    table.close()
+    return path
+
+def generate_invoices(month, base_dir=None, workers=None, progress=None):
+    """Write per-customer invoices for the month; see invoices.generate_invoices."""
+    import invoices
+
+    return invoices.generate_invoices(month, base_dir or invoices.INVOICE_DIR, workers, progress)
+
+def entry_analytics(start=None, end=None, customer_id=None, top=10):
+    """Return the Reports screen figures for the entries in [start, end)."""
+    from analytics import analytics_cache
+
+    report = analytics_cache.get(start, end).report(customer_id, top)
+    dates, product_ids, volumes = report["daily_volume"]
+    product_names = {product_id: name for name, product_id in lookups.product_name_map().items()}
+    ids = [row[0] for row in report["top_customers"]]
+    names = dict(get_connection().execute(
+        f"SELECT id, name FROM Customers WHERE id IN ({','.join('?' * len(ids))})", ids
+    )) if ids else {}
+    return {
+        "entries": report["entries"],
+        "products": [product_names.get(product_id, f"Product {product_id}") for product_id in product_ids],
+        "daily_volume": [(day, volumes[i].tolist()) for i, day in enumerate(dates)],
+        "top_customers": [(names.get(customer_id, f"Customer #{customer_id}"), quantity, amount)
+                          for customer_id, quantity, amount in report["top_customers"]],
+        "trend": report["trend"],
+        "weekdays": report["weekdays"],
+    }
+
+def archive_entries(through):
+    """Archive every live entry up to the end of a YYYY-MM month; see archive.archive_through."""
+    return archive.archive_through(get_connection(), through)
+
+def restore_entries(month):
+    """Move archived entries from a YYYY-MM month on back to the live table."""
+    return archive.restore_from(get_connection(), month)
+
+def archived_months():
+    """Return (month, entries, archived_at) for every archived month."""
+    return archive.archived_months(get_connection())
+
+def vacuum():
+    """Compact the live database file, e.g. after archiving."""
+    get_connection().execute("VACUUM")
+
+def entry_date_range(start_text, end_text):
+    """Turn inclusive From/To date strings into an export's [start, end) days."""
+    start_text, end_text = (start_text or "").strip(), (end_text or "").strip()
+    start = to_day(start_text) if start_text else None
+    end = to_day(from_day(to_day(end_text)) + timedelta(days=1)) if end_text else None
+    return start, end
+
+ENTRY_EXPORT_FORMATS = {
+    "csv": lambda path: CsvSink(path),
+    "xlsx": lambda path: XlsxSink(path, title="Daily Entries"),
+    "pdf": lambda path: pdf_sink(path, "Daily Entries Report"),
+}
+
+def export_daily_entries(path, start=None, end=None, fmt=None, progress=None):
+    """Export daily entries in [start, end) and return the row count."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in ENTRY_EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt or path}")
+    sink = ENTRY_EXPORT_FORMATS[fmt](path)
+    return export_entries(sink, EntryFilter(start, end), progress=progress)
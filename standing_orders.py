@@ -0,0 +1,127 @@
+"""Standing orders: the same delivery every day, or on given weekdays."""
+from database import ENTRY_RATE_SQL, deferred_totals, hot_start
+from dates import day_iso
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+EVERY_DAY = 0b1111111
+
+# (day, order) pairs in [?, ?] where an order is in effect and not yet generated
+ORDER_DAYS_SQL = '''
+    WITH RECURSIVE calendar (iso) AS (
+        SELECT date(?)
+        UNION ALL
+        SELECT date(iso, '+1 day') FROM calendar WHERE iso < date(?)
+    ),
+    days (entry_date, weekday) AS (
+        SELECT CAST(strftime('%Y%m%d', iso) AS INTEGER), (CAST(strftime('%w', iso) AS INTEGER) + 6) % 7
+        FROM calendar
+    ),
+    order_days AS (
+        SELECT d.entry_date, o.id AS order_id, o.customer_id, o.product_id, o.quantity
+        FROM days d
+        JOIN StandingOrders o
+          ON o.first_day <= d.entry_date AND (o.last_day IS NULL OR o.last_day >= d.entry_date)
+         AND o.weekdays & (1 << d.weekday)
+        WHERE NOT EXISTS (SELECT 1 FROM StandingOrderPauses p
+                          WHERE p.order_id = o.id AND p.first_day <= d.entry_date AND p.last_day >= d.entry_date)
+          AND NOT EXISTS (SELECT 1 FROM StandingOrderDays g
+                          WHERE g.entry_date = d.entry_date AND g.order_id = o.id)
+    )
+'''
+
+# Writes the entries, skipping days the customer already has the product
+GENERATE_ENTRIES_SQL = '''
+    INSERT INTO DailyEntries (entry_date, customer_id, product_id, quantity, rate, amount)
+''' + ORDER_DAYS_SQL + '''
+    SELECT entry_date, customer_id, product_id, quantity, rate, quantity * rate
+    FROM (SELECT od.*, ''' + ENTRY_RATE_SQL.format(product="od.product_id", day="od.entry_date") + ''' AS rate
+          FROM order_days od
+          WHERE NOT EXISTS (SELECT 1 FROM DailyEntries e
+                            WHERE e.entry_date = od.entry_date AND e.customer_id = od.customer_id
+                              AND e.product_id = od.product_id))
+'''
+
+LOG_ORDER_DAYS_SQL = '''
+    INSERT INTO StandingOrderDays (entry_date, order_id)
+''' + ORDER_DAYS_SQL + '''
+    SELECT entry_date, order_id FROM order_days
+'''
+
+STANDING_ORDERS_SQL = '''
+    SELECT o.id, c.name, p.name, o.quantity, o.weekdays, o.first_day, o.last_day
+    FROM StandingOrders o
+    JOIN Customers c ON c.id = o.customer_id
+    JOIN Products p ON p.id = o.product_id
+    WHERE (? IS NULL OR o.customer_id = ?) AND (o.last_day IS NULL OR o.last_day >= ?)
+    ORDER BY c.name, o.id
+'''
+
+def weekday_mask(text):
+    """Parse 'mon,wed,fri' (or 'daily') into a weekdays bit mask."""
+    if not text or text.strip().lower() in ("daily", "all"):
+        return EVERY_DAY
+    mask = 0
+    for name in text.split(","):
+        name = name.strip().lower()[:3]
+        if name not in WEEKDAYS:
+            raise ValueError(f"unknown weekday '{name}', expected e.g. mon,wed,fri")
+        mask |= 1 << WEEKDAYS.index(name)
+    return mask
+
+def weekday_names(mask):
+    """Format a weekdays bit mask as 'mon,wed,fri', or 'daily'."""
+    if mask == EVERY_DAY:
+        return "daily"
+    return ",".join(name for i, name in enumerate(WEEKDAYS) if mask & 1 << i)
+
+def add_standing_order(conn, customer_id, product_id, quantity, first_day, last_day=None, weekdays=EVERY_DAY):
+    """Insert a standing order and return its id."""
+    if not quantity > 0:
+        raise ValueError("quantity must be positive")
+    if not 0 < weekdays <= EVERY_DAY:
+        raise ValueError("an order needs at least one weekday")
+    if last_day is not None and last_day < first_day:
+        raise ValueError("the last day is before the first")
+    return conn.execute(
+        "INSERT INTO StandingOrders (customer_id, product_id, quantity, weekdays, first_day, last_day) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (customer_id, product_id, quantity, weekdays, first_day, last_day)
+    ).lastrowid
+
+def end_standing_order(conn, order_id, last_day):
+    """Make last_day the order's last delivery."""
+    row = conn.execute("SELECT first_day FROM StandingOrders WHERE id = ?", (order_id,)).fetchone()
+    if row is None:
+        raise LookupError(f"no standing order {order_id}")
+    if last_day < row[0]:
+        # Ended before it began: no delivery at all
+        conn.execute("DELETE FROM StandingOrders WHERE id = ?", (order_id,))
+    else:
+        conn.execute("UPDATE StandingOrders SET last_day = ? WHERE id = ?", (last_day, order_id))
+
+def pause_standing_order(conn, order_id, first_day, last_day):
+    """Suspend an order from first_day to last_day inclusive."""
+    if last_day < first_day:
+        raise ValueError("the last day is before the first")
+    if conn.execute("SELECT 1 FROM StandingOrders WHERE id = ?", (order_id,)).fetchone() is None:
+        raise LookupError(f"no standing order {order_id}")
+    conn.execute(
+        "INSERT OR REPLACE INTO StandingOrderPauses (order_id, first_day, last_day) VALUES (?, ?, ?)",
+        (order_id, first_day, last_day)
+    )
+
+def standing_orders(conn, today, customer_id=None):
+    """Return the orders not ended before today, of one customer or all."""
+    return conn.execute(STANDING_ORDERS_SQL, (customer_id, customer_id, today)).fetchall()
+
+def generate_entries(conn, first_day, last_day):
+    """Write the standing orders' entries from first_day to last_day; call inside a transaction."""
+    if last_day < first_day:
+        raise ValueError("the last day is before the first")
+    if first_day < (hot_start(conn) or 0):
+        raise ValueError("Cannot generate entries in archived months; restore them first")
+    bounds = (day_iso(first_day), day_iso(last_day))
+    with deferred_totals(conn):
+        written = conn.execute(GENERATE_ENTRIES_SQL, bounds).rowcount
+    conn.execute(LOG_ORDER_DAYS_SQL, bounds)
+    return written
@@ -0,0 +1,137 @@
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from database import profiler
+
+_local = threading.local()
+
+def current_task():
+    """Return the Task running on this thread, or None outside a worker."""
+    return getattr(_local, "task", None)
+
+def report_progress(done, total=None):
+    """Report progress from inside a task; a no-op anywhere else."""
+    task = current_task()
+    if task is not None:
+        task.report(done, total)
+
+class Task:
+    """A unit of work submitted to a TaskRunner."""
+
+    def __init__(self, fn, key, on_done, on_error, on_progress):
+        self.fn = fn
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+        self.started = False
+        self.latest_progress = None
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Ask the task to stop; it ends at its next progress report."""
+        self.cancelled = True
+
+    def report(self, done, total=None):
+        """Record progress for the UI thread; raise if cancelled."""
+        if self.cancelled:
+            raise CancelledError()
+        with self.lock:
+            self.latest_progress = (done, total)
+
+class TaskRunner:
+    """Run database work off the Tk thread and deliver results back to it."""
+
+    def __init__(self, widget, workers=2, poll_ms=30):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-worker")
+        self.results = queue.Queue()
+        self.pending = {}  # key -> Task not yet started
+        self.active = set()  # Tasks with progress callbacks still running
+        self.lock = threading.Lock()
+        self.closed = False
+        self.widget.after(self.poll_ms, self.poll)
+
+    def submit(self, fn, key=None, on_done=None, on_error=None, on_progress=None):
+        """Run fn() on a worker thread and return its Task."""
+        with self.lock:
+            task = self.pending.get(key) if key is not None else None
+            if task is not None:
+                task.fn, task.on_done, task.on_error, task.on_progress = fn, on_done, on_error, on_progress
+                return task
+            task = Task(fn, key, on_done, on_error, on_progress)
+            if key is not None:
+                self.pending[key] = task
+        if on_progress is not None:
+            self.active.add(task)
+        self.executor.submit(self.run, task)
+        return task
+
+    def run(self, task):
+        """Execute a task on the worker thread and queue its outcome."""
+        with self.lock:
+            if task.key is not None and self.pending.get(task.key) is task:
+                del self.pending[task.key]
+            task.started = True
+        if task.cancelled:
+            self.results.put((task, "cancelled", None))
+            return
+        _local.task = task
+        try:
+            with profiler.span(f"task {task.key or getattr(task.fn, '__qualname__', 'task')}"):
+                result = task.fn()
+        except CancelledError:
+            self.results.put((task, "cancelled", None))
+        except Exception as e:
+            self.results.put((task, "error", e))
+        else:
+            self.results.put((task, "done", result))
+        finally:
+            _local.task = None
+
+    def poll(self):
+        """Deliver queued outcomes and progress on the Tk thread."""
+        if self.closed:
+            return
+        for task in list(self.active):
+            with task.lock:
+                progress, task.latest_progress = task.latest_progress, None
+            if progress is not None and not task.cancelled:
+                task.on_progress(*progress)
+        while True:
+            try:
+                task, outcome, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.active.discard(task)
+            try:
+                if outcome == "done" and task.on_done is not None:
+                    task.on_done(value)
+                elif outcome == "error":
+                    if task.on_error is not None:
+                        task.on_error(value)
+                    else:
+                        from tkinter import messagebox
+                        messagebox.showerror("Error", str(value))
+            except Exception as e:
+                # A failing callback must not stop result delivery
+                self.widget.after_idle(lambda e=e: self.report_callback_error(e))
+        self.widget.after(self.poll_ms, self.poll)
+
+    def report_callback_error(self, error):
+        """Surface an exception raised by a result callback."""
+        from tkinter import messagebox
+        messagebox.showerror("Error", str(error))
+
+    def shutdown(self):
+        """Stop delivering results and cancel work that has not started."""
+        self.closed = True
+        with self.lock:
+            for task in self.pending.values():
+                task.cancel()
+        for task in self.active:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
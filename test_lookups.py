@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import database
+import services
+from lookups import NotFoundError, lookups
+
+class LookupCacheTest(unittest.TestCase):
+    """The name lookup cache follows edits from this and other processes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_path = database.DB_PATH
+        database.DB_PATH = os.path.join(self.tmp.name, "test.db")
+        database.init_db()
+        services.ensure_default_products()
+        lookups.invalidate()
+        self.alice = services.add_customer("Alice", "", "9000000001")
+
+    def tearDown(self):
+        lookups.invalidate()
+        database.connections.close()
+        database.DB_PATH = self.saved_path
+        self.tmp.cleanup()
+
+    def test_edit_in_process_is_patched_without_reload(self):
+        self.assertEqual(lookups.customer_id("Alice"), self.alice)
+        maps = lookups._customers
+        bob = services.add_customer("Bob", "", "9000000002")
+        self.assertEqual(lookups.customer_id("Bob"), bob)
+        services.update_customer(bob, "Robert", "", "9000000002")
+        self.assertEqual(lookups.customer_id("Robert"), bob)
+        services.delete_customer(bob)
+        with self.assertRaises(NotFoundError):
+            lookups.customer_id("Robert")
+        self.assertIs(lookups._customers, maps)
+
+    def test_write_from_another_process_is_seen(self):
+        lookups.customer_id("Alice")
+        other = sqlite3.connect(database.DB_PATH)
+        other.execute("INSERT INTO Customers (name, contact) VALUES ('Carol', '9000000003')")
+        other.commit()
+        other.close()
+        carol = lookups.customer_id("Carol")
+        self.assertIsInstance(carol, int)
+        # An edit here after another process wrote reloads instead of patching
+        maps = lookups._customers
+        other = sqlite3.connect(database.DB_PATH)
+        other.execute("INSERT INTO Customers (name, contact) VALUES ('Dave', '9000000004')")
+        other.commit()
+        other.close()
+        erin = services.add_customer("Erin", "", "9000000005")
+        self.assertEqual(lookups.customer_id("Erin"), erin)
+        self.assertIsInstance(lookups.customer_id("Dave"), int)
+        self.assertIsNot(lookups._customers, maps)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+# Pause in typing after which a type-ahead search runs
+TYPE_AHEAD_DELAY_MS = 250
+
 class UIUtils:
     @staticmethod
     def create_labeled_entry(parent, label_text, row):
@@ -28,11 +31,11 @@ class UIUtils:
         return button
 
     @staticmethod
-    def create_treeview(parent, columns, show="headings"):
-        """Create a treeview widget."""
+    def create_treeview(parent, columns, show="headings", headings=None):
+        """Create a treeview widget; headings maps columns to their titles."""
         tree = ttk.Treeview(parent, columns=columns, show=show)
         for col in columns:
-            tree.heading(col, text=col.capitalize())
+            tree.heading(col, text=(headings or {}).get(col, col.capitalize()))
         return tree
 
     @staticmethod
@@ -48,4 +51,255 @@ class UIUtils:
     @staticmethod
     def confirm_action(message):
         """Show a confirmation dialog."""
-        return messagebox.askyesno("Confirm", message)
\ No newline at end of file
+        return messagebox.askyesno("Confirm", message)
+
+    @staticmethod
+    def draw_bar_chart(canvas, labels, values):
+        """Draw a simple vertical bar chart of values on a canvas."""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1:  # Not laid out yet
+            width, height = int(canvas["width"]), int(canvas["height"])
+        if not values:
+            return
+        top = max(values) or 1
+        slot = width / len(values)
+        for i, (label, value) in enumerate(zip(labels, values)):
+            bar_height = (height - 30) * value / top
+            x0, x1 = i * slot + slot * 0.15, (i + 1) * slot - slot * 0.15
+            canvas.create_rectangle(x0, height - 20 - bar_height, x1, height - 20, fill="steelblue", outline="")
+            canvas.create_text((x0 + x1) / 2, height - 10, text=label, font=("Helvetica", 8))
+
+    @staticmethod
+    def run_with_progress(tasks, parent, title, fn, on_done=None):
+        """Run fn on a TaskRunner behind a cancellable progress dialog."""
+        def finish(result):
+            dialog.close()
+            if on_done:
+                on_done(result)
+
+        def fail(error):
+            dialog.close()
+            messagebox.showerror("Error", f"{title} failed: {str(error)}")
+
+        dialog = ProgressDialog(parent, title)
+        task = tasks.submit(fn, on_done=finish, on_error=fail, on_progress=dialog.update)
+        dialog.on_cancel = task.cancel
+        return task
+
+def row_matches(row, words):
+    """Return whether every word occurs in some value of row, ignoring case."""
+    text = "\x00".join("" if value is None else str(value) for value in row).casefold()
+    return all(word in text for word in words)
+
+class TreeBinding:
+    """A Treeview of rows keyed by primary key, updated by change sets."""
+
+    def __init__(self, parent, columns, headings=None, display=None, key=None):
+        self.tree = UIUtils.create_treeview(parent, columns, headings=headings)
+        if display is not None:
+            self.tree["displaycolumns"] = display
+        self.columns = list(columns)
+        self.headings = {column: self.tree.heading(column, "text") for column in columns}
+        self.key = key or (lambda row: row[0])
+        self.rows = {}  # iid -> row, in load order
+        self.shown = []  # iids attached to the tree, in display order
+        self.sort_column = None
+        self.descending = False
+        self.words = []  # Current filter
+        self.filter_columns = None  # Indexes searched by the filter; None for all
+        for column in columns:
+            self.tree.heading(column, command=lambda column=column: self.sort_by(column))
+
+    def iid(self, row):
+        """Return the iid of a row."""
+        return str(self.key(row))
+
+    def set_rows(self, rows):
+        """Show exactly rows, touching only the items that differ."""
+        new = {self.iid(row): tuple(row) for row in rows}
+        deleted = [iid for iid in self.rows if iid not in new]
+        if deleted:
+            self._delete(deleted)
+        for iid, row in new.items():
+            self._put(iid, row)
+        self.rows = new  # Keep the new load order
+        self._arrange()
+
+    def apply(self, inserted=(), updated=(), deleted=()):
+        """Apply a change set: rows inserted or updated and keys deleted."""
+        iids = [str(key) for key in deleted if str(key) in self.rows]
+        if iids:
+            self._delete(iids)
+        for row in (*inserted, *updated):
+            self._put(self.iid(row), tuple(row))
+        self._arrange()
+
+    def _put(self, iid, row):
+        old = self.rows.get(iid)
+        if old is None:
+            self.tree.insert("", tk.END, iid=iid, values=row)
+            self.shown.append(iid)
+        elif old != row:
+            self.tree.item(iid, values=row)
+        self.rows[iid] = row
+
+    def _delete(self, iids):
+        self.tree.delete(*iids)
+        gone = set(iids)
+        for iid in gone:
+            del self.rows[iid]
+        self.shown = [iid for iid in self.shown if iid not in gone]
+
+    def _arrange(self):
+        """Attach the rows passing the filter, in sort order, if that changed."""
+        if self.words:
+            indexes = self.filter_columns or range(len(self.columns))
+            order = [iid for iid, row in self.rows.items()
+                     if row_matches([row[i] for i in indexes], self.words)]
+        else:
+            order = list(self.rows)
+        if self.sort_column is not None:
+            index = self.columns.index(self.sort_column)
+            order.sort(key=lambda iid: (self.rows[iid][index] is not None, self.rows[iid][index]),
+                       reverse=self.descending)
+        if order != self.shown:
+            self.tree.set_children("", *order)
+            self.shown = order
+
+    def sort_by(self, column, descending=None):
+        """Sort by a column; by default a second click reverses the order."""
+        if descending is None:
+            descending = column == self.sort_column and not self.descending
+        for name, text in self.headings.items():
+            arrow = (" \u25bc" if descending else " \u25b2") if name == column else ""
+            self.tree.heading(name, text=text + arrow)
+        self.sort_column, self.descending = column, descending
+        self._arrange()
+
+    def filter(self, text, columns=None):
+        """Show only rows containing every word of text; empty text shows all."""
+        self.words = (text or "").casefold().split()
+        self.filter_columns = [self.columns.index(column) for column in columns] if columns else None
+        self._arrange()
+
+    def row(self, iid):
+        """Return the row of an item."""
+        return self.rows[iid]
+
+    def selected(self):
+        """Return the rows of the selected items."""
+        return [self.rows[iid] for iid in self.tree.selection() if iid in self.rows]
+
+    def __len__(self):
+        """Return the number of rows shown."""
+        return len(self.shown)
+
+class ProgressDialog:
+    """A small window with a progress bar and a Cancel button."""
+
+    def __init__(self, parent, title, on_cancel=None):
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.resizable(False, False)
+        self.window.transient(parent.winfo_toplevel())
+        self.label = ttk.Label(self.window, text="Working...")
+        self.label.pack(padx=20, pady=(15, 5))
+        self.bar = ttk.Progressbar(self.window, length=300, mode="indeterminate")
+        self.bar.pack(padx=20, pady=5)
+        self.bar.start(15)
+        self.on_cancel = on_cancel
+        ttk.Button(self.window, text="Cancel", command=self.cancel).pack(pady=(5, 15))
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def update(self, done, total=None):
+        """Show progress; an unknown total keeps the bar indeterminate."""
+        if total:
+            if self.bar["mode"] != "determinate":
+                self.bar.stop()
+                self.bar.configure(mode="determinate", maximum=total)
+            self.bar["value"] = done
+            self.label.configure(text=f"{done} of {total}")
+        else:
+            self.label.configure(text=f"{done} processed")
+
+    def cancel(self):
+        """Close the dialog and ask the work to stop."""
+        if self.on_cancel:
+            self.on_cancel()
+        self.close()
+
+    def close(self):
+        """Close the dialog."""
+        if self.window.winfo_exists():
+            self.bar.stop()
+            self.window.destroy()
+
+class Debouncer:
+    """Call fn once input has been quiet for delay_ms, e.g. for type-ahead."""
+
+    def __init__(self, widget, delay_ms, fn):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self.fn = fn
+        self.pending = None
+
+    def trigger(self, *args):
+        """Restart the delay; fn(*args) runs when it expires."""
+        self.cancel()
+        self.pending = self.widget.after(self.delay_ms, self.fire, args)
+
+    def fire(self, args):
+        self.pending = None
+        self.fn(*args)
+
+    def cancel(self):
+        """Drop a pending call."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.pending = None
+
+class TypeAhead:
+    """Fill a combobox with search results as the user types."""
+
+    def __init__(self, combobox, tasks, search, key, delay_ms=TYPE_AHEAD_DELAY_MS):
+        self.combobox = combobox
+        self.tasks = tasks
+        self.search = search
+        self.key = key
+        self.values = {}  # label -> value
+        self.generation = 0  # Bumped per search so stale results are dropped
+        self.debouncer = Debouncer(combobox, delay_ms, self.refresh)
+        combobox.bind("<KeyRelease>", self.on_key, add="+")
+
+    def on_key(self, event):
+        """Search again after typing, but not for list navigation keys."""
+        if event.keysym not in ("Up", "Down", "Return", "Tab", "Escape"):
+            self.debouncer.trigger()
+
+    def refresh(self):
+        """Search for the current text now."""
+        text = self.combobox.get()
+        self.generation += 1
+        generation = self.generation
+
+        def done(pairs):
+            if generation == self.generation:
+                self.show(pairs)
+
+        self.tasks.submit(lambda: self.search(text), key=self.key, on_done=done)
+
+    def show(self, pairs):
+        """List the labels of the given (value, label) pairs."""
+        self.values = {label: value for value, label in pairs}
+        self.combobox["values"] = list(self.values)
+
+    def value(self):
+        """Return the value of the chosen label, or None for other text."""
+        return self.values.get(self.combobox.get())
+
+    def clear(self):
+        """Empty the text and list the unfiltered results again."""
+        self.debouncer.cancel()
+        self.combobox.set("")
+        self.refresh()